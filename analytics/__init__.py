@@ -0,0 +1,30 @@
+"""
+Offline hydration analytics over exported water logs.
+
+Logs are streamed in chunks from the API's NDJSON export or a Postgres COPY
+dump into NumPy arrays, folded into per-user daily totals, and summarized
+with vectorized goal attainment, streak, rolling average and hour-of-day
+metrics.
+
+    from analytics import build_report, daily_totals, iter_copy_dump
+    daily = daily_totals(iter_copy_dump('logs.tsv'), tz='Europe/Berlin')
+    report = build_report(daily, goals={user_id: 3000})
+"""
+
+from analytics.daily import DailyAccumulator, DailyTotals, daily_totals
+from analytics.report import build_report, goal_met, hourly_share, rolling_average, streaks
+from analytics.sources import LogChunk, iter_api_export, iter_copy_dump
+
+__all__ = [
+    'DailyAccumulator',
+    'DailyTotals',
+    'LogChunk',
+    'build_report',
+    'daily_totals',
+    'goal_met',
+    'hourly_share',
+    'iter_api_export',
+    'iter_copy_dump',
+    'rolling_average',
+    'streaks',
+]
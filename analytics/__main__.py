@@ -0,0 +1,94 @@
+"""
+Weekly (or any N-day) hydration report for every user.
+
+Logs come from the API's NDJSON export, or from a COPY dump with --dump.
+Daily goals are read from GET /api/users.
+
+Usage:
+    python -m analytics --days 7
+    python -m analytics --dump logs.csv --days 28 --tz Europe/Berlin --output report.json
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import requests
+from dotenv import load_dotenv
+
+from analytics.daily import DailyAccumulator, resolve_timezone
+from analytics.report import DEFAULT_ROLLING_WINDOW, build_report
+from analytics.sources import DEFAULT_CHUNK_SIZE, DUMP_COLUMNS, iter_api_export, iter_copy_dump
+
+load_dotenv()
+
+BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'https://drinklog-1.preview.emergentagent.com')
+API_BASE = f"{BASE_URL}/api"
+
+
+def fetch_goals(api_base):
+    response = requests.get(f"{api_base}/users", timeout=10)
+    response.raise_for_status()
+    return {user['id']: user['dailyGoal'] for user in response.json()}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m analytics', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dump', help='COPY dump of water_logs to read instead of the API export')
+    parser.add_argument('--dump-columns', type=lambda value: tuple(value.split(',')), default=DUMP_COLUMNS,
+                        help=f"comma-separated columns of --dump (default {','.join(DUMP_COLUMNS)})")
+    parser.add_argument('--days', type=int, default=7, help='days in the report, ending with --end')
+    parser.add_argument('--end', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                        help='last day of the report (YYYY-MM-DD, default today)')
+    parser.add_argument('--tz', default=os.getenv('ROLLUP_TIMEZONE', 'UTC'), help='timezone of calendar days')
+    parser.add_argument('--window', type=int, default=DEFAULT_ROLLING_WINDOW, help='rolling average window in days')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='logs held in memory at a time')
+    parser.add_argument('--default-goal', type=int, help='goal for users /api/users does not list')
+    parser.add_argument('--api-base', default=API_BASE)
+    parser.add_argument('--output', help='write the report as JSON')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    zone = resolve_timezone(args.tz)
+    end = args.end or datetime.now(zone).date()
+    start = end - timedelta(days=args.days - 1)
+
+    if args.dump:
+        chunks = iter_copy_dump(args.dump, args.chunk_size, args.dump_columns)
+    else:
+        # Local midnights of the range in UTC; the accumulator trims to exact days
+        start_at = datetime(start.year, start.month, start.day, tzinfo=zone)
+        end_at = datetime(end.year, end.month, end.day, tzinfo=zone) + timedelta(days=1, milliseconds=-1)
+        chunks = iter_api_export(args.api_base, {
+            'startDate': start_at.isoformat(),
+            'endDate': end_at.isoformat(),
+        }, args.chunk_size)
+
+    started = time.perf_counter()
+    accumulator = DailyAccumulator(args.tz, start, end)
+    for chunk in chunks:
+        accumulator.add(chunk)
+    report = build_report(accumulator.result(), fetch_goals(args.api_base), args.window, args.default_goal)
+    elapsed = time.perf_counter() - started
+
+    print(f"📊 {start} – {end} ({args.tz}): {accumulator.logs:,} logs, {len(report)} users in {elapsed:.2f}s")
+    print(f"{'user':<38}{'total ml':>10}{'mean/day':>10}{'goal %':>8}{'met':>5}{'streak':>8}{'peak h':>8}")
+    for row in report:
+        attainment = f"{row['goalAttainment']:.0%}"
+        peak = '-' if row['peakHour'] is None else row['peakHour']
+        print(f"{row['userId']:<38}{row['totalMl']:>10}{row['meanDailyMl']:>10.0f}{attainment:>8}"
+              f"{row['daysMetGoal']:>5}{row['currentStreak']:>8}{peak:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'from': start.isoformat(), 'to': end.isoformat(), 'timezone': args.tz, 'users': report}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
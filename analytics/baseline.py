@@ -0,0 +1,91 @@
+"""
+Naive pure-Python version of the report: one dict lookup and datetime
+conversion per log, loops over every user and day. Kept as the benchmark
+baseline and as a reference the vectorized code is checked against.
+"""
+
+import csv
+from datetime import datetime, timedelta
+
+from analytics.daily import resolve_timezone
+from analytics.sources import DUMP_COLUMNS, dump_positions
+
+
+def read_copy_dump(path, columns=DUMP_COLUMNS):
+    """Yield (user_id, amount_ml, logged_at) rows of a COPY dump with the given columns"""
+    user_id, amount_ml, logged_at = dump_positions(columns)
+    with open(path, newline='') as f:
+        first = f.readline()
+        f.seek(0)
+        rows = (line.rstrip('\n').split('\t') for line in f) if '\t' in first else csv.reader(f)
+        for row in rows:
+            timestamp = row[logged_at].replace('Z', '+00:00')
+            if len(timestamp) > 3 and timestamp[-3] in '+-':
+                timestamp += ':00'
+            yield row[user_id], int(row[amount_ml]), datetime.fromisoformat(timestamp)
+
+
+def naive_report(rows, goals, tz='UTC', start=None, end=None, window=7, default_goal=None):
+    """Same output as build_report(daily_totals(...)) computed row by row"""
+    zone = resolve_timezone(tz)
+    totals = {}
+    counts = {}
+    hourly = {}
+    for user_id, amount, logged_at in rows:
+        local = logged_at.astimezone(zone)
+        day = local.date()
+        if (start is not None and day < start) or (end is not None and day > end):
+            continue
+        totals.setdefault(user_id, {})
+        counts.setdefault(user_id, {})
+        hourly.setdefault(user_id, [0] * 24)
+        totals[user_id][day] = totals[user_id].get(day, 0) + amount
+        counts[user_id][day] = counts[user_id].get(day, 0) + 1
+        hourly[user_id][local.hour] += amount
+
+    logged_days = [day for per_user in totals.values() for day in per_user]
+    first = start if start is not None else min(logged_days)
+    last = end if end is not None else max(logged_days)
+    days = []
+    day = first
+    while day <= last:
+        days.append(day)
+        day += timedelta(days=1)
+
+    report = []
+    for user_id in sorted(totals):
+        goal = goals.get(user_id, default_goal)
+        series = [totals[user_id].get(day, 0) for day in days]
+        met = [goal is not None and total >= goal for total in series]
+
+        longest = current = 0
+        for hit in met:
+            current = current + 1 if hit else 0
+            longest = max(longest, current)
+
+        rolling = None
+        if len(series) >= window:
+            rolling = sum(series[-window:]) / window
+
+        user_total = sum(series)
+        user_hourly = hourly[user_id]
+        mean_daily = user_total / len(days) if days else 0.0
+        report.append({
+            'userId': user_id,
+            'from': first.isoformat(),
+            'to': last.isoformat(),
+            'dailyGoal': goal,
+            'totalMl': user_total,
+            'logCount': sum(counts[user_id].values()),
+            'daysLogged': len(counts[user_id]),
+            'meanDailyMl': mean_daily,
+            'daysMetGoal': sum(met),
+            'goalAttainment': sum(met) / len(days) if days else 0.0,
+            'meanPercentOfGoal': mean_daily * 100 / goal if goal else None,
+            'longestStreak': longest,
+            'currentStreak': current,
+            'rollingAverageMl': rolling,
+            'peakHour': max(range(24), key=lambda hour: (user_hourly[hour], -hour)) if any(user_hourly) else None,
+            'hourlyShare': [amount / sum(user_hourly) for amount in user_hourly] if any(user_hourly) else [0.0] * 24,
+        })
+    return report
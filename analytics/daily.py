@@ -0,0 +1,175 @@
+"""
+Streaming per-user daily aggregation. DailyAccumulator folds LogChunks into
+(user, local day) totals and per-user hour-of-day histograms, so memory grows
+with users x days rather than with the number of logs.
+"""
+
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+MINUTE_US = 60 * 1_000_000
+HOUR_US = 60 * MINUTE_US
+DAY_US = 24 * HOUR_US
+
+# Every zone in the tz database changes offset on a quarter hour (UTC)
+OFFSET_STEP_US = 15 * MINUTE_US
+
+# (user code, day) pairs are packed into one int64 key; days count from
+# 1970-01-01 and must fit below the stride
+KEY_STRIDE = 1 << 24
+
+# users: user ids (sorted); first_day: date of column 0; totals/counts:
+# int64 [user, day] over every calendar day in range, zero where nothing was
+# logged; hourly: int64 [user, hour] ml per local hour of day
+DailyTotals = namedtuple('DailyTotals', ['users', 'first_day', 'totals', 'counts', 'hourly'])
+
+
+def epoch_day(day):
+    return (day - date(1970, 1, 1)).days
+
+
+def utc_offset_us(us, tz):
+    return datetime.fromtimestamp(us / 1_000_000, tz).utcoffset() // timedelta(microseconds=1)
+
+
+def to_local_us(logged_at, tz):
+    """datetime64 UTC timestamps -> int64 microseconds of local wall time in `tz`.
+
+    The offset is looked up at each midnight (UTC) of the covered range and,
+    on days where it changes, every quarter hour to find the transition; the
+    timestamps are then mapped onto those transitions in one searchsorted.
+    """
+    utc_us = logged_at.astype('datetime64[us]').astype(np.int64)
+    if tz is timezone.utc or len(utc_us) == 0:
+        return utc_us
+    first_day = int(utc_us.min() // DAY_US)
+    last_day = int(utc_us.max() // DAY_US)
+
+    starts = [first_day * DAY_US]
+    offsets = [utc_offset_us(starts[0], tz)]
+    for day in range(first_day, last_day + 1):
+        if utc_offset_us((day + 1) * DAY_US, tz) == offsets[-1]:
+            continue
+        for step in range(day * DAY_US + OFFSET_STEP_US, (day + 1) * DAY_US + 1, OFFSET_STEP_US):
+            offset = utc_offset_us(step, tz)
+            if offset != offsets[-1]:
+                starts.append(step)
+                offsets.append(offset)
+
+    index = np.searchsorted(np.array(starts), utc_us, side='right') - 1
+    return utc_us + np.array(offsets, dtype=np.int64)[index]
+
+
+def resolve_timezone(name):
+    return timezone.utc if name in (None, 'UTC') else ZoneInfo(name)
+
+
+class DailyAccumulator:
+    """Fold log chunks into per-user daily totals in `tz`.
+
+    With `start`/`end` (local dates, inclusive) logs outside the range are
+    ignored and the result covers exactly that range.
+    """
+
+    def __init__(self, tz='UTC', start=None, end=None):
+        self.tz = resolve_timezone(tz)
+        self.start = start
+        self.end = end
+        self.logs = 0
+        self._codes = {}
+        self._keys = np.empty(0, dtype=np.int64)
+        self._totals = np.empty(0, dtype=np.int64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._hourly = np.zeros((0, 24), dtype=np.int64)
+
+    def _encode(self, user_ids):
+        distinct, inverse = np.unique(user_ids, return_inverse=True)
+        codes = np.array([
+            self._codes.setdefault(user_id.decode() if isinstance(user_id, bytes) else user_id, len(self._codes))
+            for user_id in distinct.tolist()
+        ], dtype=np.int64)
+        if len(self._codes) > len(self._hourly):
+            grown = np.zeros((len(self._codes), 24), dtype=np.int64)
+            grown[:len(self._hourly)] = self._hourly
+            self._hourly = grown
+        return codes[inverse.reshape(-1)]
+
+    def add(self, chunk):
+        local_us = to_local_us(chunk.logged_at, self.tz)
+        days = local_us // DAY_US
+        keep = np.ones(len(days), dtype=bool)
+        if self.start is not None:
+            keep &= days >= epoch_day(self.start)
+        if self.end is not None:
+            keep &= days <= epoch_day(self.end)
+        if not keep.all():
+            chunk = chunk._replace(**{field: values[keep] for field, values in chunk._asdict().items()})
+            local_us, days = local_us[keep], days[keep]
+        if len(days) == 0:
+            return
+        if days.min() < 0 or days.max() >= KEY_STRIDE:
+            raise ValueError("Log timestamps must fall between 1970 and 47000")
+
+        codes = self._encode(chunk.user_ids)
+        amounts = chunk.amounts
+        self.logs += len(amounts)
+
+        hours = (local_us % DAY_US) // HOUR_US
+        self._hourly += np.bincount(
+            codes * 24 + hours, weights=amounts, minlength=self._hourly.size
+        ).astype(np.int64).reshape(self._hourly.shape)
+
+        keys, inverse = np.unique(codes * KEY_STRIDE + days, return_inverse=True)
+        self._merge(
+            keys,
+            np.bincount(inverse, weights=amounts).astype(np.int64),
+            np.bincount(inverse).astype(np.int64),
+        )
+
+    def _merge(self, keys, totals, counts):
+        keys = np.concatenate([self._keys, keys])
+        merged, inverse = np.unique(keys, return_inverse=True)
+        self._totals = np.bincount(inverse, weights=np.concatenate([self._totals, totals]),
+                                   minlength=len(merged)).astype(np.int64)
+        self._counts = np.bincount(inverse, weights=np.concatenate([self._counts, counts]),
+                                   minlength=len(merged)).astype(np.int64)
+        self._keys = merged
+
+    def result(self):
+        """Dense DailyTotals over every day in range (users sorted by id)"""
+        codes, days = np.divmod(self._keys, KEY_STRIDE)
+        if self.start is not None:
+            first = epoch_day(self.start)
+        else:
+            first = int(days.min()) if len(days) else epoch_day(date.today())
+        if self.end is not None:
+            last = epoch_day(self.end)
+        else:
+            last = int(days.max()) if len(days) else first
+        span = max(last - first + 1, 0)
+
+        user_ids = list(self._codes)
+        totals = np.zeros((len(user_ids), span), dtype=np.int64)
+        counts = np.zeros((len(user_ids), span), dtype=np.int64)
+        totals[codes, days - first] = self._totals
+        counts[codes, days - first] = self._counts
+
+        order = np.argsort(np.array(user_ids, dtype=str), kind='stable')
+        return DailyTotals(
+            users=[user_ids[i] for i in order],
+            first_day=date(1970, 1, 1) + timedelta(days=first),
+            totals=totals[order],
+            counts=counts[order],
+            hourly=self._hourly[order],
+        )
+
+
+def daily_totals(chunks, tz='UTC', start=None, end=None):
+    """Aggregate an iterable of LogChunks into DailyTotals"""
+    accumulator = DailyAccumulator(tz, start, end)
+    for chunk in chunks:
+        accumulator.add(chunk)
+    return accumulator.result()
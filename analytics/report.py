@@ -0,0 +1,86 @@
+"""
+Hydration metrics over DailyTotals, computed on whole [user, day] matrices:
+goal attainment, streaks of days meeting the goal, trailing rolling averages
+and hour-of-day distributions.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+DEFAULT_ROLLING_WINDOW = 7
+
+
+def goal_vector(daily, goals, default_goal=None):
+    """dailyGoal per row of `daily`; users without one get `default_goal` (or NaN)"""
+    fallback = np.nan if default_goal is None else default_goal
+    return np.array([goals.get(user_id, fallback) for user_id in daily.users], dtype=float)
+
+
+def goal_met(daily, goal):
+    """bool [user, day]: the day's total reached the user's goal"""
+    return daily.totals >= goal[:, None]
+
+
+def streaks(met):
+    """Longest and current (ending on the last day) run of True per row"""
+    if met.shape[1] == 0:
+        empty = np.zeros(met.shape[0], dtype=np.int64)
+        return empty, empty
+    position = np.arange(1, met.shape[1] + 1)
+    # Index of the latest miss at or before each day; the run is the distance
+    last_miss = np.maximum.accumulate(np.where(met, 0, position), axis=1)
+    runs = position - last_miss
+    return runs.max(axis=1), runs[:, -1]
+
+
+def rolling_average(totals, window=DEFAULT_ROLLING_WINDOW):
+    """Trailing `window`-day mean per [user, day]; NaN until a full window exists"""
+    result = np.full(totals.shape, np.nan)
+    if totals.shape[1] >= window:
+        cumulative = np.cumsum(totals, axis=1, dtype=np.int64)
+        cumulative = np.concatenate([np.zeros((totals.shape[0], 1), dtype=np.int64), cumulative], axis=1)
+        result[:, window - 1:] = (cumulative[:, window:] - cumulative[:, :-window]) / window
+    return result
+
+
+def hourly_share(hourly):
+    """Fraction of each user's intake per local hour of day"""
+    totals = hourly.sum(axis=1, keepdims=True)
+    return np.divide(hourly, totals, out=np.zeros(hourly.shape), where=totals > 0)
+
+
+def build_report(daily, goals, window=DEFAULT_ROLLING_WINDOW, default_goal=None):
+    """Per-user summary of `daily` as JSON-ready dicts (camelCase like the API)"""
+    goal = goal_vector(daily, goals, default_goal)
+    met = goal_met(daily, goal)
+    longest, current = streaks(met)
+    rolling = rolling_average(daily.totals, window)
+    share = hourly_share(daily.hourly)
+    days = daily.totals.shape[1]
+    totals = daily.totals.sum(axis=1)
+    mean_daily = totals / days if days else np.zeros(len(goal))
+    days_met = met.sum(axis=1)
+    percent_of_goal = np.divide(mean_daily * 100, goal, out=np.full(len(goal), np.nan), where=goal > 0)
+
+    report = []
+    for i, user_id in enumerate(daily.users):
+        report.append({
+            'userId': user_id,
+            'from': daily.first_day.isoformat(),
+            'to': (daily.first_day + timedelta(days=days - 1)).isoformat(),
+            'dailyGoal': None if np.isnan(goal[i]) else int(goal[i]),
+            'totalMl': int(totals[i]),
+            'logCount': int(daily.counts[i].sum()),
+            'daysLogged': int((daily.counts[i] > 0).sum()),
+            'meanDailyMl': float(mean_daily[i]),
+            'daysMetGoal': int(days_met[i]),
+            'goalAttainment': float(days_met[i] / days) if days else 0.0,
+            'meanPercentOfGoal': None if np.isnan(percent_of_goal[i]) else float(percent_of_goal[i]),
+            'longestStreak': int(longest[i]),
+            'currentStreak': int(current[i]),
+            'rollingAverageMl': None if not days or np.isnan(rolling[i, -1]) else float(rolling[i, -1]),
+            'peakHour': int(daily.hourly[i].argmax()) if daily.hourly[i].any() else None,
+            'hourlyShare': [float(value) for value in share[i]],
+        })
+    return report
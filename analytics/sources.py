@@ -0,0 +1,237 @@
+"""
+Chunked log sources. Every source yields LogChunk tuples of parallel NumPy
+arrays, at most `chunk_size` logs at a time, so a full export never has to
+fit in memory.
+
+Text is parsed column-wise: a chunk's lines are joined into one byte buffer,
+field boundaries are found with a single scan, and numbers and timestamps
+are decoded by indexing that buffer at per-row offsets.
+
+A Postgres dump can be taken with:
+    psql "$DATABASE_URL" -c "\\copy (SELECT user_id, amount_ml, logged_at FROM water_logs_all) TO 'logs.csv' WITH (FORMAT csv)"
+Dumps with other columns, or in another order, are read by passing their
+column names (`columns=`, or --dump-columns on the command line).
+"""
+
+import json
+from collections import namedtuple
+from itertools import islice
+
+import numpy as np
+import requests
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_CHUNK_SIZE = 100_000
+# Columns of a dump taken as documented above
+DUMP_COLUMNS = ('user_id', 'amount_ml', 'logged_at')
+
+# user_ids: str or ASCII bytes, amounts: int64 ml, logged_at: datetime64[us] in UTC
+LogChunk = namedtuple('LogChunk', ['user_ids', 'amounts', 'logged_at'])
+
+# Byte offsets in 'YYYY-MM-DD HH:MM:SS' ('T' also accepted)
+TIMESTAMP_FIELDS = {'year': (0, 4), 'month': (5, 2), 'day': (8, 2), 'hour': (11, 2), 'minute': (14, 2), 'second': (17, 2)}
+TIMESTAMP_SEPARATORS = {4: '-', 7: '-', 13: ':', 16: ':'}
+ZERO = ord('0')
+# Timestamps are read as windows covering the fixed layout and six fraction
+# digits, plus lookahead past the end of the offset
+TIMESTAMP_MIN_WIDTH = 26
+TIMESTAMP_LOOKAHEAD = 3
+
+TIMESTAMP_FORMAT_ERROR = "Timestamps must look like YYYY-MM-DD HH:MM:SS[.ffffff]+HH[:MM] (or end in Z)"
+
+
+class Fields:
+    """One chunk of delimited text: a byte buffer plus [row, field] start/end offsets"""
+
+    def __init__(self, buffer, starts, ends):
+        # Zero padding lets any field (or timestamp lookahead) be read as a
+        # full-width window
+        padding = int((ends - starts).max(initial=0)) + TIMESTAMP_MIN_WIDTH + TIMESTAMP_LOOKAHEAD
+        self.buffer = np.concatenate([buffer, np.zeros(padding, dtype=np.uint8)])
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def split(cls, lines, separator=None):
+        """Bytes lines -> Fields; without a separator each line is one field"""
+        lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+        buffer = np.frombuffer(b''.join(lines), dtype=np.uint8)
+        line_ends = np.cumsum(lengths)
+        line_starts = line_ends - lengths
+        # Line ends exclude the newline (and a CR before it)
+        for terminator in (b'\n', b'\r'):
+            last = np.maximum(line_ends - 1, 0)
+            line_ends -= (line_ends > line_starts) & (buffer[last] == ord(terminator))
+
+        if separator is None:
+            return cls(buffer, line_starts[:, None], line_ends[:, None])
+
+        cuts = np.flatnonzero(buffer == ord(separator))
+        per_line = len(cuts) // len(lines)
+        # Cuts are in buffer order, so every line holding exactly `per_line`
+        # of them is the same as the first and last of each row staying
+        # inside that line
+        if len(cuts) != per_line * len(lines):
+            raise ValueError("Every line must have the same number of fields")
+        cuts = cuts.reshape(len(lines), per_line)
+        if per_line and ((cuts[:, 0] < line_starts) | (cuts[:, -1] >= line_ends)).any():
+            raise ValueError("Every line must have the same number of fields")
+        return cls(
+            buffer,
+            np.column_stack([line_starts, cuts + 1]),
+            np.column_stack([cuts, line_ends]),
+        )
+
+    @property
+    def count(self):
+        return self.starts.shape[1]
+
+    def matrix(self, field, width):
+        """uint8 [row, offset] of the first `width` bytes of `field`, 0 past its end"""
+        # Each row is one contiguous copy out of a strided view of the buffer
+        matrix = sliding_window_view(self.buffer, width)[self.starts[:, field]]
+        matrix[np.arange(width) >= (self.ends[:, field] - self.starts[:, field])[:, None]] = 0
+        return matrix
+
+    def bytes(self, field):
+        """A field as a fixed-width bytes array"""
+        width = max(int((self.ends[:, field] - self.starts[:, field]).max()), 1)
+        return self.matrix(field, width).view(f'S{width}').reshape(len(self.starts))
+
+    def integers(self, field):
+        """A field of unsigned decimal integers as int64"""
+        lengths = self.ends[:, field] - self.starts[:, field]
+        if (lengths == 0).any() or lengths.max() > 18:
+            raise ValueError("Expected an integer of 1-18 digits")
+        chars = self.matrix(field, int(lengths.max()))
+        inside = np.arange(chars.shape[1]) < lengths[:, None]
+        if (((chars < ZERO) | (chars > ZERO + 9)) & inside).any():
+            raise ValueError("Expected an integer of 1-18 digits")
+        value = np.zeros(len(lengths), dtype=np.int64)
+        for offset in range(chars.shape[1]):
+            value = np.where(inside[:, offset], value * 10 + chars[:, offset] - ZERO, value)
+        return value
+
+    def timestamps(self, field):
+        """ISO 8601 timestamps with a UTC offset as datetime64[us] in UTC.
+
+        Accepts Postgres output ('2024-03-01 08:15:00.25+01', '+05:30') and
+        JavaScript's ('2024-03-01T07:15:00.250Z').
+        """
+        longest = int((self.ends[:, field] - self.starts[:, field]).max())
+        chars = self.matrix(field, max(longest, TIMESTAMP_MIN_WIDTH) + TIMESTAMP_LOOKAHEAD)
+        is_digit = (chars >= ZERO) & (chars <= ZERO + 9)
+        rows = np.arange(len(chars))
+
+        def number(start, length):
+            if not is_digit[:, start:start + length].all():
+                raise ValueError(TIMESTAMP_FORMAT_ERROR)
+            value = np.zeros(len(chars), dtype=np.int64)
+            for offset in range(start, start + length):
+                value = value * 10 + chars[:, offset] - ZERO
+            return value
+
+        for offset, separator in TIMESTAMP_SEPARATORS.items():
+            if not (chars[:, offset] == ord(separator)).all():
+                raise ValueError(TIMESTAMP_FORMAT_ERROR)
+        if not np.isin(chars[:, 10], [ord(' '), ord('T')]).all():
+            raise ValueError(TIMESTAMP_FORMAT_ERROR)
+        parts = {name: number(start, length) for name, (start, length) in TIMESTAMP_FIELDS.items()}
+
+        # Up to six fraction digits after a '.'
+        reading = chars[:, 19] == ord('.')
+        offset_at = 19 + reading
+        micros = np.zeros(len(chars), dtype=np.int64)
+        for place in range(6):
+            reading &= is_digit[:, 20 + place]
+            micros += np.where(reading, (chars[:, 20 + place].astype(np.int64) - ZERO) * 10 ** (5 - place), 0)
+            offset_at += reading
+
+        # 'Z', or +HH then optional [:]MM and [:]SS
+        sign = chars[rows, offset_at]
+        signed = (sign == ord('+')) | (sign == ord('-'))
+        if not (signed | (sign == ord('Z'))).all():
+            raise ValueError(TIMESTAMP_FORMAT_ERROR)
+        offset_seconds = np.zeros(len(chars), dtype=np.int64)
+        position = offset_at + 1
+        for unit in (3600, 60, 1):
+            if unit != 3600:
+                position = position + (chars[rows, position] == ord(':'))
+            present = signed & is_digit[rows, position] & is_digit[rows, position + 1]
+            if unit == 3600 and (signed & ~present).any():
+                raise ValueError(TIMESTAMP_FORMAT_ERROR)
+            pair = (chars[rows, position].astype(np.int64) - ZERO) * 10 + chars[rows, position + 1] - ZERO
+            offset_seconds += np.where(present, pair, 0) * unit
+            position = position + 2 * present
+        offset_seconds *= np.where(sign == ord('-'), -1, 1)
+
+        days = days_from_civil(parts['year'], parts['month'], parts['day'])
+        seconds = ((days * 24 + parts['hour']) * 60 + parts['minute']) * 60 + parts['second'] - offset_seconds
+        return (seconds * 1_000_000 + micros).astype('datetime64[us]')
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 of proleptic Gregorian dates (arrays)"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_timestamps(values):
+    """ISO 8601 strings with a UTC offset -> datetime64[us] in UTC"""
+    return Fields.split([value.encode('ascii') for value in values]).timestamps(0)
+
+
+def iter_api_export(api_base, params=None, chunk_size=DEFAULT_CHUNK_SIZE, session=None):
+    """Stream GET /api/water-logs?format=ndjson (filters as for that endpoint)"""
+    session = session or requests.Session()
+    query = {**(params or {}), 'format': 'ndjson'}
+    with session.get(f"{api_base}/water-logs", params=query, stream=True, timeout=(10, 300)) as response:
+        response.raise_for_status()
+        lines = (line for line in response.iter_lines(decode_unicode=True) if line)
+        while True:
+            batch = [json.loads(line) for line in islice(lines, chunk_size)]
+            if not batch:
+                return
+            yield LogChunk(
+                np.array([log['userId'] for log in batch], dtype=str),
+                np.array([log['amountMl'] for log in batch], dtype=np.int64),
+                parse_timestamps([log['loggedAt'] for log in batch]),
+            )
+
+
+def dump_positions(columns):
+    """Positions of user_id, amount_ml and logged_at among a dump's columns"""
+    missing = [name for name in DUMP_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"Dump columns must include {', '.join(missing)}")
+    return tuple(list(columns).index(name) for name in DUMP_COLUMNS)
+
+
+def iter_copy_dump(path, chunk_size=DEFAULT_CHUNK_SIZE, columns=DUMP_COLUMNS):
+    """Stream a COPY dump of water_logs, in text (tab-separated) or CSV format.
+
+    `columns` names the dump's columns in order; only user_id, amount_ml and
+    logged_at are read. None of the table's columns can contain a delimiter
+    or quote, so lines are split directly.
+    """
+    user_id, amount_ml, logged_at = dump_positions(columns)
+    with open(path, 'rb') as f:
+        first = f.readline()
+        f.seek(0)
+        separator = '\t' if b'\t' in first else ','
+        while True:
+            batch = list(islice(f, chunk_size))
+            if not batch:
+                return
+            fields = Fields.split(batch, separator)
+            if fields.count != len(columns):
+                raise ValueError(f"Expected {len(columns)} columns ({', '.join(columns)}), found {fields.count}")
+            yield LogChunk(
+                fields.bytes(user_id),
+                fields.integers(amount_ml),
+                fields.timestamps(logged_at),
+            )
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Water Tracker Analytics Benchmark
+Times the vectorized analytics package against the naive pure-Python
+baseline on the same COPY dump. It checks that both produce the same report,
+and records peak memory to show that chunked streaming stays bounded.
+
+Two timings are reported: end to end (parse the dump and build the report,
+streaming) and compute only (aggregation and metrics over logs already in
+memory, as NumPy chunks vs Python tuples).
+
+Without --dump a synthetic dump is generated in a temporary file.
+
+Usage:
+    python analytics_benchmark.py
+    python analytics_benchmark.py --users 1000 --days 365 --chunk-size 50000 --output analytics.json
+    python analytics_benchmark.py --dump logs.tsv --tz Europe/Berlin
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+import backend_benchmark
+from analytics import build_report, daily_totals, iter_copy_dump
+from analytics.baseline import naive_report, read_copy_dump
+from analytics.sources import DEFAULT_CHUNK_SIZE
+
+WRITE_BATCH = 100_000
+GOALS = [2000, 2500, 3000, 3000, 3500, 4000]
+
+
+def write_synthetic_dump(path, users, days, logs_per_day, seed):
+    """Write a (user_id, amount_ml, logged_at) CSV dump like COPY produces; returns goals and count"""
+    rng = np.random.default_rng(seed)
+    user_ids = np.array([str(uuid.UUID(int=int(value), version=4)) for value in rng.integers(0, 2**63, users)])
+    goals = {user_id: int(rng.choice(GOALS)) for user_id in user_ids}
+    start = np.datetime64(date.today() - timedelta(days=days - 1), 'us')
+    span_us = days * 24 * 3600 * 1_000_000
+
+    total = rng.poisson(users * days * logs_per_day)
+    with open(path, 'w') as f:
+        for offset in range(0, total, WRITE_BATCH):
+            size = min(WRITE_BATCH, total - offset)
+            owners = user_ids[rng.integers(0, users, size)]
+            amounts = rng.integers(1, 11, size) * 50
+            stamps = np.datetime_as_string(start + rng.integers(0, span_us, size).astype('timedelta64[us]'), unit='us')
+            f.writelines(
+                f"{owner},{amount},{stamp.replace('T', ' ')}+00\n"
+                for owner, amount, stamp in zip(owners.tolist(), amounts.tolist(), stamps.tolist())
+            )
+    return goals, total
+
+
+def run_vectorized(chunks, goals, args, start, end):
+    daily = daily_totals(chunks, args.tz, start, end)
+    return build_report(daily, goals, args.window, args.default_goal)
+
+
+def run_naive(rows, goals, args, start, end):
+    return naive_report(rows, goals, args.tz, start, end, args.window, args.default_goal)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def measure(fn):
+    """(result, seconds, peak traced MiB); the timed run is not traced"""
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def same_report(left, right):
+    """Reports match exactly apart from float rounding"""
+    if len(left) != len(right):
+        return False
+    for a, b in zip(left, right):
+        for key in a:
+            x, y = a[key], b[key]
+            if isinstance(x, list):
+                if not all(math.isclose(p, q, rel_tol=1e-9, abs_tol=1e-12) for p, q in zip(x, y)):
+                    return False
+            elif isinstance(x, float) or isinstance(y, float):
+                if x is None or y is None or not math.isclose(x, y, rel_tol=1e-9):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dump', help='existing COPY dump to analyze instead of synthetic data')
+    parser.add_argument('--users', type=int, default=200, help='synthetic users')
+    parser.add_argument('--days', type=int, default=365, help='synthetic days of history')
+    parser.add_argument('--logs-per-day', type=float, default=8, help='synthetic logs per user and day')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tz', default='UTC', help='timezone of calendar days')
+    parser.add_argument('--report-days', type=int, help='only report the last N days (default: everything)')
+    parser.add_argument('--window', type=int, default=7, help='rolling average window in days')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--default-goal', type=int, default=3000, help='goal for users the dump has no goal for')
+    parser.add_argument('--output', help='write machine-readable results to this JSON file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    temporary = None
+    if args.dump:
+        path = args.dump
+        goals, logs = {}, None
+    else:
+        temporary = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+        temporary.close()
+        path = temporary.name
+        print(f"📦 Writing {args.users} users x {args.days} days of synthetic logs...")
+        goals, logs = write_synthetic_dump(path, args.users, args.days, args.logs_per_day, args.seed)
+
+    try:
+        end = start = None
+        if args.report_days:
+            end = datetime.now(timezone.utc).date()
+            start = end - timedelta(days=args.report_days - 1)
+        size_mib = os.path.getsize(path) / 2**20
+        print(f"Analyzing {path} ({size_mib:.0f} MiB{f', {logs:,} logs' if logs else ''}) in {args.tz}")
+
+        print("⏱️  Vectorized (chunked NumPy)...")
+        fast, fast_s, fast_mib = measure(
+            lambda: run_vectorized(iter_copy_dump(path, args.chunk_size), goals, args, start, end))
+        print("⏱️  Naive (pure Python)...")
+        slow, slow_s, slow_mib = measure(lambda: run_naive(read_copy_dump(path), goals, args, start, end))
+
+        print("⏱️  Compute only (logs preloaded)...")
+        chunks = list(iter_copy_dump(path, args.chunk_size))
+        fast_compute_s = timed(lambda: run_vectorized(chunks, goals, args, start, end))
+        del chunks
+        rows = list(read_copy_dump(path))
+        slow_compute_s = timed(lambda: run_naive(rows, goals, args, start, end))
+        del rows
+    finally:
+        if temporary:
+            os.unlink(path)
+
+    matches = same_report(fast, slow)
+    print("\n" + "=" * 60)
+    print("🏁 ANALYTICS BENCHMARK")
+    print("=" * 60)
+    print(f"{'implementation':<22}{'end to end s':>14}{'compute s':>12}{'peak MiB':>12}")
+    print(f"{'vectorized':<22}{fast_s:>14.2f}{fast_compute_s:>12.3f}{fast_mib:>12.1f}")
+    print(f"{'naive':<22}{slow_s:>14.2f}{slow_compute_s:>12.3f}{slow_mib:>12.1f}")
+    print(f"\nVectorized is {slow_s / fast_s:.1f}x faster end to end and "
+          f"{slow_compute_s / fast_compute_s:.1f}x faster in compute over {len(fast)} users "
+          f"(chunks of {args.chunk_size:,} logs)")
+    print(f"{'✅' if matches else '❌'} Reports {'match' if matches else 'differ'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'started_at': datetime.now(timezone.utc).isoformat(),
+                'git_revision': backend_benchmark.git_revision(),
+                'config': {key: value for key, value in vars(args).items() if key != 'output'},
+                'logs': logs,
+                'users': len(fast),
+                'vectorized': {'seconds': fast_s, 'compute_seconds': fast_compute_s, 'peak_mib': fast_mib},
+                'naive': {'seconds': slow_s, 'compute_seconds': slow_compute_s, 'peak_mib': slow_mib},
+                'speedup': slow_s / fast_s,
+                'compute_speedup': slow_compute_s / fast_compute_s,
+                'reports_match': matches,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+    return matches
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
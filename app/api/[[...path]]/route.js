@@ -1,11 +1,42 @@
-import { NextResponse } from 'next/server';
-import { Pool } from 'pg';
-
-// Create a connection pool for Postgres
-const pool = new Pool({
-  connectionString: process.env.DATABASE_URL,
-  ssl: process.env.NODE_ENV === 'production' ? { rejectUnauthorized: false } : false,
-});
+import {
+  DatabasePool,
+  connectionConfig,
+  poolConfigFromEnv,
+  replicaConfigFromEnv,
+  replicaConnectionConfig,
+  statement,
+  unusableAfter,
+} from '@/lib/db';
+import { RequestMetrics, instrument, recordTiming, timed } from '@/lib/metrics';
+import { ResponseCache } from '@/lib/cache';
+import { IntakeEventHub, INTAKE_EVENTS_CHANNEL } from '@/lib/events';
+import {
+  BatchError,
+  MAX_AMOUNT_ML,
+  ingestBatch,
+  loggedAtWindow,
+  parseAmount,
+  parseBatchBody,
+} from '@/lib/batch-ingest';
+import { logWater, validateIdempotencyKey } from '@/lib/log-water';
+import { LEADERBOARD_ORDERS, getLeaderboard, localToday, weekStart } from '@/lib/leaderboard';
+import { ReplicaRouter } from '@/lib/replica';
+import {
+  BOOTSTRAP,
+  DAILY_TOTALS,
+  ENSURE_WATER_LOG_PARTITIONS,
+  GET_USER,
+  LIST_USERS,
+  REBUILD_USER_DAILY_INTAKE,
+  TODAY_INTAKE,
+  UPDATE_USER_GOAL,
+  UPDATE_USER_TIMEZONE,
+  buildWaterLogsQuery,
+} from '@/db/queries.mjs';
+import { seedDefaultUsers } from '@/db/seed.mjs';
+
+// Create a connection pool for Postgres (sized via PG_POOL_* env vars)
+const pool = new DatabasePool({ ...connectionConfig, ...poolConfigFromEnv() });
 // Validate DATABASE_URL is available
 if (!process.env.DATABASE_URL) {
   console.error('DATABASE_URL environment variable is not set');
@@ -16,40 +47,332 @@ async function getConnection() {
   return pool;
 }
 
-// Seed default users
-async function seedUsers(pool) {
-  const users = [
-    { name: 'Nikhil', daily_goal_ml: 3000 },
-    { name: 'Karthik', daily_goal_ml: 3000 },
-    { name: 'Prabhath', daily_goal_ml: 3000 },
-    { name: 'Samson', daily_goal_ml: 3000 },
-    { name: 'Chakri', daily_goal_ml: 3000 },
-    { name: 'Praveen', daily_goal_ml: 3000 }
-  ];
+// Read-only GET branches run on DATABASE_REPLICA_URL when it is set and has
+// replayed the writes they must see; everything else uses the primary
+const replica = replicaConnectionConfig
+  ? new DatabasePool({ ...replicaConnectionConfig, ...poolConfigFromEnv() })
+  : null;
+const readers = new ReplicaRouter(pool, replica, replicaConfigFromEnv());
+
+// Per-route latency histograms, served at /api/internal/metrics
+const requestMetrics = new RequestMetrics();
+
+// JSON response whose serialization time is reported as its own phase
+function json(data, init = {}) {
+  const started = performance.now();
+  const body = JSON.stringify(data);
+  recordTiming('serialize', performance.now() - started);
+  return new Response(body, {
+    ...init,
+    headers: { ...init.headers, 'Content-Type': 'application/json' }
+  });
+}
 
+// Run `fn` with a dedicated client inside BEGIN/COMMIT. The whole
+// transaction counts as database time.
+async function withTransaction(db, fn) {
+  const client = await db.connect();
   try {
-    // Check if users already exist
-    const result = await pool.query('SELECT COUNT(*) as count FROM users');
-    const count = parseInt(result.rows[0].count);
-
-    if (count === 0) {
-      // Insert users
-      for (const user of users) {
-        await pool.query(
-          'INSERT INTO users (name, daily_goal_ml) VALUES ($1, $2)',
-          [user.name, user.daily_goal_ml]
-        );
+    const result = await timed('db', async () => {
+      await client.query('BEGIN');
+      const value = await fn(client);
+      await client.query('COMMIT');
+      return value;
+    });
+    client.release();
+    return result;
+  } catch (error) {
+    // A connection that cannot even roll back is discarded as well
+    const rollbackError = await client.query('ROLLBACK').then(() => null, (e) => e);
+    client.release(rollbackError || unusableAfter(error));
+    throw error;
+  }
+}
+
+// water_logs is partitioned by month. Partitions are created ahead of time
+// by `yarn db:migrate`/`yarn db:partitions`; an insert that still lands in a
+// month without one creates the missing partitions and is retried once.
+// Only timestamps inside the accepted logged-at window count (others are
+// rejected anyway), and a span beyond MAX_PARTITION_MONTHS is refused.
+const MAX_PARTITION_MONTHS = 36;
+const PARTITION_CREATE_ATTEMPTS = 3;
+
+function isMissingPartition(error) {
+  return error.code === '23514' && /no partition/.test(error.message);
+}
+
+// Another request created the same partition first: its table name (42P07)
+// or row type (23505 on pg_type) was taken while ours was being created
+function isConcurrentPartitionCreate(error) {
+  return error.code === '42P07' || error.code === '23505';
+}
+
+async function ensurePartitions(db, first, last) {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await db.query(statement(ENSURE_WATER_LOG_PARTITIONS, [first, last]));
+    } catch (error) {
+      // The partition now exists; run again for any months still missing
+      if (!isConcurrentPartitionCreate(error) || attempt === PARTITION_CREATE_ATTEMPTS) throw error;
+    }
+  }
+}
+
+async function withPartitionRetry(db, timestamps, fn) {
+  try {
+    return await fn();
+  } catch (error) {
+    if (!isMissingPartition(error)) throw error;
+    const { from, to } = loggedAtWindow();
+    const times = [Date.now(), ...timestamps.map(t => Date.parse(t)).filter(t => t >= from && t <= to)];
+    const first = new Date(Math.min(...times));
+    const last = new Date(Math.max(...times));
+    const months = (last.getUTCFullYear() - first.getUTCFullYear()) * 12 +
+      last.getUTCMonth() - first.getUTCMonth() + 1;
+    if (months > MAX_PARTITION_MONTHS) throw error;
+    await ensurePartitions(db, first, last);
+    return fn();
+  }
+}
+
+// Cached responses for users and today-intake. Writes invalidate the keys
+// they affect; the TTL bounds staleness across instances and day rollover.
+const responseCache = new ResponseCache({
+  maxEntries: parseInt(process.env.RESPONSE_CACHE_MAX_ENTRIES) || 500,
+  ttlMs: parseInt(process.env.RESPONSE_CACHE_TTL_MS) || 60000,
+});
+
+// Live intake/goal changes, delivered via LISTEN/NOTIFY once they commit.
+// Every instance also uses them to drop cache entries written elsewhere.
+const intakeEvents = new IntakeEventHub(connectionConfig);
+intakeEvents.subscribe((event) => {
+  readers.recordWrite([event.userId]);
+  if (event.type === 'intake') {
+    responseCache.invalidate('today-intake');
+  } else if (event.type === 'goal' || event.type === 'timezone') {
+    responseCache.invalidate('users', `users/${event.userId}`, 'today-intake');
+  }
+});
+
+// Serve a JSON response from the cache, loading it on a miss. Returns null
+// (and caches nothing) when `load` finds nothing. A matching If-None-Match
+// gets a 304 without touching the database. `Cache-Control: no-cache` on the
+// request forces a reload (used by benchmarks that must measure the DB).
+async function cachedJson(request, key, load) {
+  const bypass = /no-cache/.test(request.headers.get('cache-control') || '');
+  let entry = bypass ? null : responseCache.get(key);
+  let cacheStatus = 'HIT';
+  if (!entry) {
+    const generation = responseCache.generation(key);
+    const data = await load();
+    if (data === null) {
+      return null;
+    }
+    const started = performance.now();
+    const body = JSON.stringify(data);
+    recordTiming('serialize', performance.now() - started);
+    entry = responseCache.set(key, body, generation);
+    cacheStatus = 'MISS';
+  }
+
+  const headers = {
+    ETag: entry.etag,
+    'Cache-Control': 'no-cache',
+    'X-Cache': cacheStatus,
+  };
+  if (request.headers.get('if-none-match') === entry.etag) {
+    responseCache.recordNotModified();
+    return new Response(null, { status: 304, headers });
+  }
+  return new Response(entry.body, {
+    headers: { ...headers, 'Content-Type': 'application/json' },
+  });
+}
+
+// Calendar days in daily_intake are computed in each user's timezone; users
+// without one use this. Changing it requires `yarn db:rebuild-daily-intake`.
+const ROLLUP_TIMEZONE = process.env.ROLLUP_TIMEZONE || 'UTC';
+
+// Single logs from the same user within this window are merged into one row
+// (the slider posts many small deltas in a burst); 0 disables merging
+const COALESCE_WINDOW_MS = Number.isNaN(parseInt(process.env.WATER_LOG_COALESCE_WINDOW_MS))
+  ? 5000
+  : parseInt(process.env.WATER_LOG_COALESCE_WINDOW_MS);
+
+const DATE_PATTERN = /^\d{4}-\d{2}-\d{2}$/;
+const MAX_DAILY_RANGE_DAYS = 366;
+
+const DEFAULT_PAGE_SIZE = 500;
+const MAX_PAGE_SIZE = 1000;
+const EXPORT_FETCH_SIZE = 1000;
+
+const DEFAULT_LEADERBOARD_SIZE = 50;
+const MAX_LEADERBOARD_SIZE = 500;
+
+function formatLog(row) {
+  return {
+    id: row.id,
+    userId: row.user_id,
+    amountMl: row.amount_ml,
+    loggedAt: row.logged_at
+  };
+}
+
+// Keyset cursors are the (logged_at, id) of the last row on a page. The
+// timestamp is kept as Postgres text so no microseconds are lost to JS Dates.
+function encodeCursor(row) {
+  return Buffer.from(JSON.stringify([row.logged_at_key, row.id])).toString('base64url');
+}
+
+// A cursor is client input, so both fields are checked before they reach a
+// query: the timestamp must be a real date and time in Postgres text form
+const CURSOR_TIMESTAMP_PATTERN =
+  /^(\d{4}-\d{2}-\d{2}) ([01]\d|2[0-3]):[0-5]\d:[0-5]\d(\.\d{1,6})?[+-]\d{2}(:\d{2})?$/;
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+function isCursorTimestamp(value) {
+  const match = typeof value === 'string' && CURSOR_TIMESTAMP_PATTERN.exec(value);
+  if (!match) return false;
+  const day = new Date(`${match[1]}T00:00:00Z`);
+  return !Number.isNaN(day.getTime()) && day.toISOString().startsWith(match[1]);
+}
+
+function decodeCursor(value) {
+  try {
+    const [loggedAt, id] = JSON.parse(Buffer.from(value, 'base64url').toString('utf8'));
+    if (!isCursorTimestamp(loggedAt) || typeof id !== 'string' || !UUID_PATTERN.test(id)) {
+      return null;
+    }
+    return { loggedAt, id };
+  } catch {
+    return null;
+  }
+}
+
+// Open a server-side cursor for the query and expose it as an NDJSON stream.
+// Rows are fetched in fixed-size batches as the client reads, so memory use
+// does not depend on how many rows match.
+async function streamWaterLogs(db, query, params) {
+  let client = await db.connect();
+  try {
+    await client.query('BEGIN');
+    await client.query(`DECLARE water_logs_export NO SCROLL CURSOR FOR ${query}`, params);
+  } catch (error) {
+    client.release(error);
+    throw error;
+  }
+
+  const encoder = new TextEncoder();
+  const finish = async (error) => {
+    if (!client) return;
+    const conn = client;
+    client = null;
+    try {
+      await conn.query(error ? 'ROLLBACK' : 'COMMIT');
+      conn.release();
+    } catch (releaseError) {
+      conn.release(releaseError);
+    }
+  };
+
+  return new ReadableStream({
+    async pull(controller) {
+      try {
+        const result = await client.query(`FETCH ${EXPORT_FETCH_SIZE} FROM water_logs_export`);
+        if (result.rows.length > 0) {
+          const lines = result.rows.map(row => JSON.stringify(formatLog(row)) + '\n').join('');
+          controller.enqueue(encoder.encode(lines));
+        }
+        if (result.rows.length < EXPORT_FETCH_SIZE) {
+          await finish();
+          controller.close();
+        }
+      } catch (error) {
+        console.error('Export stream error:', error);
+        await finish(error);
+        controller.error(error);
       }
-      return { message: 'Users seeded successfully', count: users.length };
+    },
+    async cancel() {
+      await finish(new Error('Export cancelled'));
+    }
+  });
+}
+
+// Check that a timezone name is a valid IANA zone before handing it to Postgres
+function isValidTimeZone(tz) {
+  try {
+    new Intl.DateTimeFormat('en-US', { timeZone: tz });
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+// Read and validate the window of a per-day request: `from` and `to`, or the
+// last `days` days up to today, and `tz`. Without `tz` days are the user's
+// own (their timezone, or ROLLUP_TIMEZONE); the database resolves both that
+// and "today". Returns either { from, to, days, tz } or { error } with a
+// message for a 400.
+function parseDayRange(url) {
+  const from = url.searchParams.get('from');
+  const to = url.searchParams.get('to');
+  const daysParam = url.searchParams.get('days');
+  const tz = url.searchParams.get('tz') || null;
+
+  if (tz && !isValidTimeZone(tz)) {
+    return { error: 'Invalid timezone' };
+  }
+  if (daysParam && !from && !to) {
+    const days = parseInt(daysParam);
+    if (!(days > 0 && days <= MAX_DAILY_RANGE_DAYS)) {
+      return { error: `days must be between 1 and ${MAX_DAILY_RANGE_DAYS}` };
     }
+    return { from: null, to: null, days, tz };
+  }
+  if (!DATE_PATTERN.test(from || '') || !DATE_PATTERN.test(to || '')) {
+    return { error: 'from and to (YYYY-MM-DD) or days are required' };
+  }
+  const rangeDays = (Date.parse(to) - Date.parse(from)) / 86400000;
+  if (!(rangeDays >= 0 && rangeDays < MAX_DAILY_RANGE_DAYS)) {
+    return { error: `Date range must be between 1 and ${MAX_DAILY_RANGE_DAYS} days` };
+  }
+  return { from, to, days: null, tz };
+}
+
+// Parameters of DAILY_TOTALS and BOOTSTRAP for a parsed window
+function dayRangeParams(userId, range) {
+  return [userId, range.from, range.to, range.tz, ROLLUP_TIMEZONE, range.days];
+}
+
+function formatUser(row) {
+  return {
+    id: row.id,
+    name: row.name,
+    dailyGoal: row.daily_goal_ml,
+    timezone: row.timezone || ROLLUP_TIMEZONE,
+    createdAt: row.created_at
+  };
+}
 
+// Seed default users. Normally done once at startup by `yarn db:migrate`;
+// kept as an endpoint for existing callers and is idempotent.
+async function seedUsers(pool) {
+  try {
+    const { inserted, count } = await seedDefaultUsers(pool);
+    if (inserted > 0) {
+      readers.recordWrite();
+      responseCache.invalidate('users', 'today-intake');
+      return { message: 'Users seeded successfully', count };
+    }
     return { message: 'Users already exist', count };
   } catch (error) {
     console.error('Seed error:', error);
-  return { message: 'Seed error', error: error.message };  }
+    return { message: 'Seed error', error: error.message };
+  }
 }
 
-export async function GET(request) {
+async function handleGet(request) {
   const db = await getConnection();
   try {
     const url = new URL(request.url);
@@ -58,35 +381,78 @@ export async function GET(request) {
     // Seed users endpoint
     if (path === 'seed') {
       const result = await seedUsers(db);
-      return NextResponse.json(result);
+      return json(result);
     }
 
     // Get all users
     if (path === 'users') {
-      const result = await db.query('SELECT * FROM users ORDER BY created_at DESC');
-      const users = result.rows.map(row => ({
-        id: row.id,
-        name: row.name,
-        dailyGoal: row.daily_goal_ml,
-        createdAt: row.created_at
-      }));
-      return NextResponse.json(users);
+      return cachedJson(request, 'users', async () => {
+        const result = await readers.read({ fresh: true }, (reader) => reader.query(statement(LIST_USERS)));
+        return result.rows.map(formatUser);
+      });
+    }
+
+    // Get per-day intake totals for a user, bucketed by the database
+    if (path.startsWith('users/') && path.endsWith('/daily')) {
+      const userId = path.split('/')[1];
+      const range = parseDayRange(url);
+      if (range.error) {
+        return json({ error: range.error }, { status: 400 });
+      }
+
+      const result = await readers.read({ userId }, (reader) =>
+        reader.query(statement(DAILY_TOTALS, dayRangeParams(userId, range)))
+      );
+      if (result.rows.length === 0) {
+        return json({ error: 'User not found' }, { status: 404 });
+      }
+      return json(result.rows.map(row => ({
+        day: row.day,
+        totalMl: parseInt(row.total_ml) || 0,
+        logCount: parseInt(row.log_count) || 0
+      })));
+    }
+
+    // Everything the user detail page renders (user, today's total and the
+    // chart window) in one response and one query
+    if (path.startsWith('users/') && path.endsWith('/bootstrap')) {
+      const userId = path.split('/')[1];
+      const range = parseDayRange(url);
+      if (range.error) {
+        return json({ error: range.error }, { status: 400 });
+      }
+
+      const result = await readers.read({ userId }, (reader) =>
+        reader.query(statement(BOOTSTRAP, dayRangeParams(userId, range)))
+      );
+      if (result.rows.length === 0) {
+        return json({ error: 'User not found' }, { status: 404 });
+      }
+
+      const row = result.rows[0];
+      return json({
+        user: formatUser(row),
+        timezone: row.day_timezone,
+        todayIntake: parseInt(row.today_intake) || 0,
+        days: row.days.map(day => ({
+          day: day.day,
+          totalMl: parseInt(day.totalMl) || 0,
+          logCount: parseInt(day.logCount) || 0
+        }))
+      });
     }
 
     // Get specific user
     if (path.startsWith('users/')) {
       const userId = path.split('/')[1];
-      const result = await db.query('SELECT * FROM users WHERE id = $1', [userId]);
-      if (result.rows.length === 0) {
-        return NextResponse.json({ error: 'User not found' }, { status: 404 });
-      }
-      const user = result.rows[0];
-      return NextResponse.json({
-        id: user.id,
-        name: user.name,
-        dailyGoal: user.daily_goal_ml,
-        createdAt: user.created_at
+      const response = await cachedJson(request, `users/${userId}`, async () => {
+        const result = await readers.read({ userId }, (reader) => reader.query(statement(GET_USER, [userId])));
+        if (result.rows.length === 0) {
+          return null;
+        }
+        return formatUser(result.rows[0]);
       });
+      return response || json({ error: 'User not found' }, { status: 404 });
     }
 
     // Get water logs
@@ -94,142 +460,324 @@ export async function GET(request) {
       const userId = url.searchParams.get('userId');
       const startDate = url.searchParams.get('startDate');
       const endDate = url.searchParams.get('endDate');
+      const format = url.searchParams.get('format');
+      const cursorParam = url.searchParams.get('cursor');
+      const limitParam = url.searchParams.get('limit');
+
+      let cursor = null;
+      if (cursorParam) {
+        cursor = decodeCursor(cursorParam);
+        if (!cursor) {
+          return json({ error: 'Invalid cursor' }, { status: 400 });
+        }
+      }
 
-      let query = 'SELECT * FROM water_logs WHERE 1=1';
-      const params = [];
+      let limit = DEFAULT_PAGE_SIZE;
+      if (limitParam) {
+        limit = parseInt(limitParam);
+        if (!(limit > 0 && limit <= MAX_PAGE_SIZE)) {
+          return json(
+            { error: `limit must be between 1 and ${MAX_PAGE_SIZE}` },
+            { status: 400 }
+          );
+        }
+      }
 
-      if (userId) {
-        params.push(userId);
-        query += ` AND user_id = $${params.length}`;
+      const filters = {
+        userId,
+        startDate: startDate ? new Date(startDate) : null,
+        endDate: endDate ? new Date(endDate) : null,
+        cursor
+      };
+      // A user's own logs must include what they just wrote; listings across
+      // all users may lag behind the primary a little
+      const scope = userId ? { userId } : {};
+
+      // Full export: stream every matching row as NDJSON through a server-side cursor
+      if (format === 'ndjson') {
+        const { text, params } = buildWaterLogsQuery(filters);
+        const stream = await readers.read(scope, (reader) => streamWaterLogs(reader, text, params));
+        return new Response(stream, {
+          headers: { 'Content-Type': 'application/x-ndjson' }
+        });
       }
 
-      if (startDate) {
-        params.push(new Date(startDate));
-        query += ` AND logged_at >= $${params.length}`;
+      // Fetch one extra row to learn whether another page exists
+      const { text, params } = buildWaterLogsQuery({ ...filters, limit: limit + 1 });
+      const result = await readers.read(scope, (reader) => reader.query(statement(text, params)));
+      const rows = result.rows.slice(0, limit);
+      const headers = {};
+      if (result.rows.length > limit) {
+        headers['X-Next-Cursor'] = encodeCursor(rows[rows.length - 1]);
       }
+      return json(rows.map(formatLog), { headers });
+    }
+
+    // Get today's intake for all users
+    if (path === 'today-intake') {
+      return cachedJson(request, 'today-intake', async () => {
+        const result = await readers.read({ fresh: true }, (reader) =>
+          reader.query(statement(TODAY_INTAKE, [ROLLUP_TIMEZONE]))
+        );
 
-      if (endDate) {
-        params.push(new Date(endDate));
-        query += ` AND logged_at <= $${params.length}`;
+        return result.rows.map(row => ({
+          ...formatUser(row),
+          todayIntake: parseInt(row.today_intake) || 0
+        }));
+      });
+    }
+
+    // Users ranked by this week's total (or current streak), served from
+    // precomputed weekly_intake/user_streaks. `week` is any day of the week
+    // to show; without it each user's current week in their own timezone is
+    // used (entries carry their `week`), and the response's `week` is the
+    // current one in the rollup timezone.
+    if (path === 'leaderboard') {
+      const weekParam = url.searchParams.get('week');
+      const by = url.searchParams.get('by') || 'total';
+      const limitParam = url.searchParams.get('limit');
+
+      if (weekParam && (!DATE_PATTERN.test(weekParam) || Number.isNaN(Date.parse(weekParam)))) {
+        return json({ error: 'week must be a date (YYYY-MM-DD)' }, { status: 400 });
+      }
+      if (!Object.hasOwn(LEADERBOARD_ORDERS, by)) {
+        return json({ error: `by must be one of ${Object.keys(LEADERBOARD_ORDERS).join(', ')}` }, { status: 400 });
       }
+      let limit = DEFAULT_LEADERBOARD_SIZE;
+      if (limitParam) {
+        limit = parseInt(limitParam);
+        if (!(limit > 0 && limit <= MAX_LEADERBOARD_SIZE)) {
+          return json(
+            { error: `limit must be between 1 and ${MAX_LEADERBOARD_SIZE}` },
+            { status: 400 }
+          );
+        }
+      }
+
+      const week = weekParam ? weekStart(weekParam) : null;
+      const users = await readers.read({ fresh: true }, (reader) =>
+        getLeaderboard(reader, { week, by, limit, rollupTimeZone: ROLLUP_TIMEZONE })
+      );
+      return json({ week: week || weekStart(localToday(ROLLUP_TIMEZONE)), by, timezone: ROLLUP_TIMEZONE, users });
+    }
 
-      query += ' ORDER BY logged_at DESC';
+    // Live dashboard updates (Server-Sent Events)
+    if (path === 'events') {
+      return new Response(intakeEvents.stream(request.signal), {
+        headers: {
+          'Content-Type': 'text/event-stream',
+          'Cache-Control': 'no-cache, no-transform',
+          'Connection': 'keep-alive',
+          'X-Accel-Buffering': 'no'
+        }
+      });
+    }
 
-      const result = await db.query(query, params);
-      const logs = result.rows.map(row => ({
-        id: row.id,
-        userId: row.user_id,
-        amountMl: row.amount_ml,
-        loggedAt: row.logged_at
-      }));
-      return NextResponse.json(logs);
+    // Request latency histograms and pool gauges for Prometheus
+    if (path === 'internal/metrics') {
+      const stats = pool.getStats();
+      const gauges = [
+        {
+          name: 'water_tracker_db_pool_connections',
+          help: 'Pooled database connections by state',
+          samples: ['total', 'idle', 'waiting'].map(state => ({ labels: { state }, value: stats[state] }))
+        },
+        {
+          name: 'water_tracker_response_cache_hit_ratio',
+          help: 'Share of response cache lookups served from the cache',
+          samples: [{ value: responseCache.getStats().hitRatio }]
+        }
+      ];
+      const replicaStats = readers.getStats();
+      if (replicaStats) {
+        gauges.push(
+          {
+            name: 'water_tracker_db_replica_pool_connections',
+            help: 'Pooled replica connections by state',
+            samples: ['total', 'idle', 'waiting'].map(state => ({ labels: { state }, value: replicaStats.pool[state] }))
+          },
+          {
+            name: 'water_tracker_db_replica_healthy',
+            help: 'Whether reads may use the replica (1) or all go to the primary (0)',
+            samples: [{ value: replicaStats.healthy ? 1 : 0 }]
+          },
+          {
+            name: 'water_tracker_db_replica_staleness_seconds',
+            help: 'Time since the latest moment whose commits the replica is known to have replayed',
+            samples: [{ value: replicaStats.stalenessMs === null ? NaN : replicaStats.stalenessMs / 1000 }]
+          }
+        );
+      }
+      const body = requestMetrics.toPrometheus(gauges);
+      return new Response(body, {
+        headers: { 'Content-Type': 'text/plain; version=0.0.4' }
+      });
     }
 
-    // Get today's intake for all users
-    if (path === 'today-intake') {
-      const today = new Date();
-      today.setHours(0, 0, 0, 0);
-      const tomorrow = new Date(today);
-      tomorrow.setDate(tomorrow.getDate() + 1);
-
-      const result = await db.query(`
-        SELECT u.*, COALESCE(SUM(w.amount_ml), 0) as today_intake
-        FROM users u
-        LEFT JOIN water_logs w ON u.id = w.user_id 
-          AND w.logged_at >= $1 AND w.logged_at < $2
-        GROUP BY u.id
-        ORDER BY u.created_at DESC
-      `, [today, tomorrow]);
-
-      const intakeData = result.rows.map(row => ({
-        id: row.id,
-        name: row.name,
-        dailyGoal: row.daily_goal_ml,
-        todayIntake: parseInt(row.today_intake) || 0,
-        createdAt: row.created_at
-      }));
-      return NextResponse.json(intakeData);
+    // Internal runtime statistics
+    if (path === 'internal/stats') {
+      return json({
+        cache: responseCache.getStats(),
+        pool: pool.getStats(),
+        replica: readers.getStats()
+      });
     }
 
-    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+    return json({ error: 'Not found' }, { status: 404 });
   } catch (error) {
     console.error('GET Error:', error);
-    return NextResponse.json({ error: error.message }, { status: 500 });
+    return json({ error: error.message }, { status: 500 });
   }
 }
 
-export async function POST(request) {
+async function handlePost(request) {
   const db = await getConnection();
   try {
     const url = new URL(request.url);
     const path = url.pathname.replace('/api/', '');
+
+    // Bulk ingestion of logs with client timestamps (JSON array or NDJSON)
+    if (path === 'water-logs/batch') {
+      let items;
+      try {
+        items = parseBatchBody(await request.text(), request.headers.get('content-type') || '');
+      } catch (error) {
+        if (error instanceof BatchError) {
+          return json({ error: error.message }, { status: error.status });
+        }
+        throw error;
+      }
+
+      const timestamps = items.map(item => item?.loggedAt).filter(Boolean);
+      const result = await withPartitionRetry(db, timestamps, () =>
+        withTransaction(db, (client) => ingestBatch(client, items, {
+          rollupTimeZone: ROLLUP_TIMEZONE,
+          eventsChannel: INTAKE_EVENTS_CHANNEL
+        }))
+      );
+      if (result.created > 0) {
+        readers.recordWrite(result.results
+          .filter(item => item.status === 'created')
+          .map(item => items[item.index].userId));
+        responseCache.invalidate('today-intake');
+      }
+      return json(result);
+    }
+
     const body = await request.json();
 
-    // Log water intake
+    // Log water intake. A retry carrying the same Idempotency-Key header (or
+    // `idempotencyKey` field) returns the original log instead of adding again.
     if (path === 'water-logs') {
-      const { userId, amount } = body;
-      if (!userId || !amount) {
-        return NextResponse.json(
+      const { userId } = body;
+      if (!userId || body.amount === undefined || body.amount === null) {
+        return json(
           { error: 'userId and amount are required' },
           { status: 400 }
         );
       }
+      // Same rules as batch items: a negative amount would otherwise be
+      // merged into the previous log and subtract from the rollups
+      const amount = parseAmount(body.amount);
+      if (amount === null) {
+        return json({ error: `amount must be an integer between 1 and ${MAX_AMOUNT_ML}` }, { status: 400 });
+      }
+      const idempotencyKey = request.headers.get('idempotency-key') ?? body.idempotencyKey;
+      const keyError = validateIdempotencyKey(idempotencyKey);
+      if (keyError) {
+        return json({ error: keyError }, { status: 400 });
+      }
 
-      const result = await db.query(
-        'INSERT INTO water_logs (user_id, amount_ml, logged_at) VALUES ($1, $2, NOW()) RETURNING *',
-        [userId, parseInt(amount)]
+      const { status, row } = await withPartitionRetry(db, [], () =>
+        withTransaction(db, (client) => logWater(client, {
+          userId,
+          amount,
+          idempotencyKey
+        }, {
+          rollupTimeZone: ROLLUP_TIMEZONE,
+          eventsChannel: INTAKE_EVENTS_CHANNEL,
+          coalesceWindowMs: COALESCE_WINDOW_MS
+        }))
       );
+      if (status !== 'duplicate') {
+        readers.recordWrite([userId]);
+        responseCache.invalidate('today-intake');
+      }
 
-      const log = result.rows[0];
-      return NextResponse.json({
-        id: log.id,
-        userId: log.user_id,
-        amountMl: log.amount_ml,
-        loggedAt: log.logged_at
-      });
+      return json({ ...formatLog(row), status });
     }
 
-    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+    return json({ error: 'Not found' }, { status: 404 });
   } catch (error) {
     console.error('POST Error:', error);
-    return NextResponse.json({ error: error.message }, { status: 500 });
+    return json({ error: error.message }, { status: 500 });
   }
 }
 
-export async function PUT(request) {
+async function handlePut(request) {
   const db = await getConnection();
   try {
     const url = new URL(request.url);
     const path = url.pathname.replace('/api/', '');
     const body = await request.json();
 
-    // Update user's daily goal
+    // Update user's daily goal and/or timezone
     if (path.startsWith('users/')) {
       const userId = path.split('/')[1];
-      const { dailyGoal } = body;
+      const { dailyGoal, timezone } = body;
 
-      if (!dailyGoal) {
-        return NextResponse.json(
-          { error: 'dailyGoal is required' },
+      if (!dailyGoal && timezone === undefined) {
+        return json(
+          { error: 'dailyGoal or timezone is required' },
           { status: 400 }
         );
       }
+      // null resets the user to ROLLUP_TIMEZONE
+      if (timezone !== undefined && timezone !== null && !isValidTimeZone(timezone)) {
+        return json({ error: 'Invalid timezone' }, { status: 400 });
+      }
 
-      const result = await db.query(
-        'UPDATE users SET daily_goal_ml = $1 WHERE id = $2 RETURNING *',
-        [parseInt(dailyGoal), userId]
-      );
+      // A new timezone moves the user's day boundaries, so their rollups are
+      // rebuilt in the same transaction; the users row lock keeps concurrent
+      // writes from bucketing a log by the old zone after the rebuild. An
+      // unchanged timezone needs no rebuild.
+      const result = await withTransaction(db, async (client) => {
+        let updated;
+        if (dailyGoal) {
+          updated = await client.query(statement(
+            UPDATE_USER_GOAL,
+            [parseInt(dailyGoal), userId, INTAKE_EVENTS_CHANNEL]
+          ));
+          if (updated.rows.length === 0) return updated;
+        }
+        if (timezone !== undefined) {
+          updated = await client.query(statement(
+            UPDATE_USER_TIMEZONE,
+            [timezone, userId, ROLLUP_TIMEZONE, INTAKE_EVENTS_CHANNEL]
+          ));
+          if (updated.rows.length > 0 && updated.rows[0].timezone_changed) {
+            await client.query(statement(REBUILD_USER_DAILY_INTAKE, [userId, ROLLUP_TIMEZONE]));
+          }
+        }
+        return updated;
+      });
 
       if (result.rows.length === 0) {
-        return NextResponse.json({ error: 'User not found' }, { status: 404 });
+        return json({ error: 'User not found' }, { status: 404 });
       }
 
-      return NextResponse.json({ success: true });
+      readers.recordWrite([userId]);
+      responseCache.invalidate('users', `users/${userId}`, 'today-intake');
+      return json({ success: true });
     }
 
-    return NextResponse.json({ error: 'Not found' }, { status: 404 });
+    return json({ error: 'Not found' }, { status: 404 });
   } catch (error) {
     console.error('PUT Error:', error);
-    return NextResponse.json({ error: error.message }, { status: 500 });
+    return json({ error: error.message }, { status: 500 });
   }
 }
+
+export const GET = instrument(requestMetrics, 'GET', handleGet);
+export const POST = instrument(requestMetrics, 'POST', handlePost);
+export const PUT = instrument(requestMetrics, 'PUT', handlePut);
@@ -1,17 +1,26 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useRouter } from 'next/navigation';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Progress } from '@/components/ui/progress';
-import { Droplets, ArrowLeft, User } from 'lucide-react';
+import { Droplets, ArrowLeft, User, Trophy, Flame } from 'lucide-react';
+
+// While live events keep arriving the leaderboard reloads at most, and at
+// least, once per interval
+const LEADERBOARD_RELOAD_INTERVAL_MS = 1000;
 
 export default function Dashboard() {
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
   const [currentUserId, setCurrentUserId] = useState(null);
   const [currentUserName, setCurrentUserName] = useState('');
+  const [leaderboard, setLeaderboard] = useState(null);
+  const [leaderboardBy, setLeaderboardBy] = useState('total'); // 'total' or 'streak'
+  const [leaderboardVersion, setLeaderboardVersion] = useState(0);
+  const lastLeaderboardLoad = useRef(0);
+  const leaderboardLoadedBy = useRef(null);
   const router = useRouter();
 
   useEffect(() => {
@@ -23,11 +32,84 @@ export default function Dashboard() {
     }
     setCurrentUserId(userId);
     loadDashboardData();
-    // Refresh every 30 seconds
-    const interval = setInterval(loadDashboardData, 30000);
-    return () => clearInterval(interval);
+
+    const refresh = () => {
+      loadDashboardData();
+      setLeaderboardVersion((version) => version + 1);
+    };
+
+    // Polling every 30 seconds is the fallback while live updates are unavailable
+    let interval = null;
+    const startPolling = () => {
+      if (!interval) {
+        interval = setInterval(refresh, 30000);
+      }
+    };
+    const stopPolling = () => {
+      clearInterval(interval);
+      interval = null;
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return stopPolling;
+    }
+
+    const source = new EventSource('/api/events');
+    source.onopen = () => {
+      stopPolling();
+      // Resync in case events were missed while disconnected
+      refresh();
+    };
+    source.onerror = () => startPolling();
+    source.addEventListener('intake', (e) => applyLiveEvent(JSON.parse(e.data)));
+    source.addEventListener('goal', (e) => applyLiveEvent(JSON.parse(e.data)));
+    // A new timezone moves the user's day, so today's totals are reloaded
+    source.addEventListener('timezone', (e) => {
+      applyLiveEvent(JSON.parse(e.data));
+      loadDashboardData();
+    });
+
+    return () => {
+      source.close();
+      stopPolling();
+    };
   }, []);
 
+  // Reload the leaderboard at once when the ranking changes, and after
+  // changes to intake or goals, throttled: a new event moves the pending
+  // reload no later than one interval after the previous load, so a steady
+  // stream of events cannot keep postponing it. One effect handles both so
+  // a ranking toggle loads once, not again from a pending reload.
+  useEffect(() => {
+    if (leaderboardLoadedBy.current !== leaderboardBy) {
+      leaderboardLoadedBy.current = leaderboardBy;
+      loadLeaderboard();
+      return;
+    }
+    if (!leaderboardVersion) return;
+    const delay = Math.max(0, lastLeaderboardLoad.current + LEADERBOARD_RELOAD_INTERVAL_MS - Date.now());
+    const timer = setTimeout(loadLeaderboard, delay);
+    return () => clearTimeout(timer);
+  }, [leaderboardBy, leaderboardVersion]);
+
+  const applyLiveEvent = (event) => {
+    setLeaderboardVersion((version) => version + 1);
+    setUsers((current) => current.map((u) => {
+      if (u.id !== event.userId) return u;
+      if (event.type === 'intake' && event.today) {
+        return { ...u, todayIntake: event.totalMl };
+      }
+      if (event.type === 'goal') {
+        return { ...u, dailyGoal: event.dailyGoal };
+      }
+      if (event.type === 'timezone') {
+        return { ...u, timezone: event.timezone };
+      }
+      return u;
+    }));
+  };
+
   const loadDashboardData = async () => {
     try {
       const response = await fetch('/api/today-intake');
@@ -49,6 +131,16 @@ export default function Dashboard() {
     }
   };
 
+  const loadLeaderboard = async () => {
+    lastLeaderboardLoad.current = Date.now();
+    try {
+      const response = await fetch(`/api/leaderboard?by=${leaderboardBy}`);
+      setLeaderboard(await response.json());
+    } catch (error) {
+      console.error('Error loading leaderboard:', error);
+    }
+  };
+
   const getProgressPercentage = (intake, goal) => {
     return Math.min((intake / goal) * 100, 100);
   };
@@ -130,6 +222,63 @@ export default function Dashboard() {
           </CardContent>
         </Card>
 
+        {/* Weekly leaderboard */}
+        {leaderboard?.users && (
+          <Card className="mb-6 bg-white">
+            <CardHeader className="pb-3">
+              <div className="flex items-center justify-between">
+                <CardTitle className="text-xl flex items-center gap-2">
+                  <Trophy className="w-5 h-5 text-amber-500" />
+                  This Week
+                </CardTitle>
+                <div className="flex gap-2">
+                  <Button
+                    size="sm"
+                    variant={leaderboardBy === 'total' ? 'default' : 'outline'}
+                    onClick={() => setLeaderboardBy('total')}
+                  >
+                    Total
+                  </Button>
+                  <Button
+                    size="sm"
+                    variant={leaderboardBy === 'streak' ? 'default' : 'outline'}
+                    onClick={() => setLeaderboardBy('streak')}
+                  >
+                    Streak
+                  </Button>
+                </div>
+              </div>
+            </CardHeader>
+            <CardContent>
+              <div className="space-y-2">
+                {leaderboard.users.map((entry) => (
+                  <div
+                    key={entry.id}
+                    className={`flex items-center justify-between rounded-md px-3 py-2 ${
+                      entry.id === currentUserId ? 'bg-blue-50' : ''
+                    }`}
+                  >
+                    <div className="flex items-center gap-3">
+                      <span className="w-6 text-right font-semibold text-muted-foreground">{entry.rank}</span>
+                      <span className="font-medium">{entry.name}</span>
+                    </div>
+                    <div className="flex items-center gap-4 text-sm text-muted-foreground">
+                      <span>{entry.weekTotalMl}ml</span>
+                      <span
+                        className="flex items-center gap-1"
+                        title={`Longest streak: ${entry.longestStreak} days`}
+                      >
+                        <Flame className={`w-4 h-4 ${entry.currentStreak > 0 ? 'text-orange-500' : ''}`} />
+                        {entry.currentStreak}
+                      </span>
+                    </div>
+                  </div>
+                ))}
+              </div>
+            </CardContent>
+          </Card>
+        )}
+
         {/* Users Progress */}
         <div className="space-y-4">
           {users.map((user) => {
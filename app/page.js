@@ -25,21 +25,15 @@ export default function Home() {
 
   const loadUsers = async () => {
     try {
-      // First seed users
-// Attempt to seed users (ignore errors if it fails)
-     try {
-       await fetch('/api/seed');
-     } catch (err) {
-       console.warn('Seed endpoint failed:', err);
-     }      
-      // Then fetch users
+      // Default users are seeded once at startup (`yarn db:migrate`)
       const response = await fetch('/api/users');
-if (response.ok) {
-       const data = await response.json();
-       setUsers(Array.isArray(data) ? data : []);
-     } else {
-       setUsers([]);
-     }    } catch (error) {
+      if (response.ok) {
+        const data = await response.json();
+        setUsers(Array.isArray(data) ? data : []);
+      } else {
+        setUsers([]);
+      }
+    } catch (error) {
       console.error('Error loading users:', error);
     } finally {
       setLoading(false);
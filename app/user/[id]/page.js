@@ -9,6 +9,28 @@ import { Slider } from '@/components/ui/slider';
 import { ArrowLeft, Plus, Settings, Droplets, User } from 'lucide-react';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 
+// Network failures retried (with the same Idempotency-Key) when adding water
+const ADD_WATER_ATTEMPTS = 3;
+
+// Day of the month it is now in the given timezone
+const dayOfMonth = (timeZone) =>
+  parseInt(new Intl.DateTimeFormat('en-US', { timeZone, day: 'numeric' }).format(new Date()));
+
+// Query string for the chart window of the given view mode. Days are the
+// user's own: the server counts back from today in the user's timezone.
+const chartWindowParams = (viewMode, timeZone) => {
+  if (viewMode === '7days') {
+    return 'days=7';
+  }
+  return `days=${dayOfMonth(timeZone)}`;
+};
+
+// The server returns one row per day (including empty days)
+const toChartData = (days) => days.map(row => ({
+  date: new Date(`${row.day}T00:00:00`).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
+  intake: row.totalMl
+}));
+
 export default function UserDetail() {
   const params = useParams();
   const router = useRouter();
@@ -21,6 +43,7 @@ export default function UserDetail() {
   const [viewMode, setViewMode] = useState('7days'); // '7days' or 'month'
   const [editingGoal, setEditingGoal] = useState(false);
   const [newGoal, setNewGoal] = useState('');
+  const [newTimezone, setNewTimezone] = useState('');
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -29,32 +52,25 @@ export default function UserDetail() {
     }
   }, [userId]);
 
+  // The initial chart comes with the bootstrap response; only reload it
+  // when the view mode changes afterwards
   useEffect(() => {
     if (user) {
       loadChartData();
     }
-  }, [user, viewMode]);
+  }, [viewMode]);
 
+  // User, today's intake and the chart window in a single request
   const loadUserData = async () => {
     try {
-      const userRes = await fetch(`/api/users/${userId}`);
-      const userData = await userRes.json();
-      setUser(userData);
-      setNewGoal(userData.dailyGoal.toString());
-
-      // Get today's intake
-      const today = new Date();
-      today.setHours(0, 0, 0, 0);
-      const tomorrow = new Date(today);
-      tomorrow.setDate(tomorrow.getDate() + 1);
-
-      const logsRes = await fetch(
-        `/api/water-logs?userId=${userId}&startDate=${today.toISOString()}&endDate=${tomorrow.toISOString()}`
-      );
-      const logs = await logsRes.json();
-      const total = logs.reduce((sum, log) => sum + log.amount, 0);
-      setTodayIntake(total);
-      setSliderValue(total);
+      const res = await fetch(`/api/users/${userId}/bootstrap?${chartWindowParams(viewMode, user?.timezone)}`);
+      const data = await res.json();
+      setUser(data.user);
+      setNewGoal(data.user.dailyGoal.toString());
+      setNewTimezone(data.user.timezone);
+      setTodayIntake(data.todayIntake);
+      setSliderValue(data.todayIntake);
+      setChartData(toChartData(data.days));
     } catch (error) {
       console.error('Error loading user data:', error);
     } finally {
@@ -64,42 +80,9 @@ export default function UserDetail() {
 
   const loadChartData = async () => {
     try {
-      const endDate = new Date();
-      endDate.setHours(23, 59, 59, 999);
-      const startDate = new Date();
-      
-      if (viewMode === '7days') {
-        startDate.setDate(startDate.getDate() - 6);
-      } else {
-        startDate.setDate(1);
-      }
-      startDate.setHours(0, 0, 0, 0);
-
-      const logsRes = await fetch(
-        `/api/water-logs?userId=${userId}&startDate=${startDate.toISOString()}&endDate=${endDate.toISOString()}`
-      );
-      const logs = await logsRes.json();
-
-      // Group by date
-      const dailyData = {};
-      logs.forEach(log => {
-        const date = new Date(log.timestamp).toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
-        dailyData[date] = (dailyData[date] || 0) + log.amount;
-      });
-
-      // Fill in missing dates
-      const chartArray = [];
-      const currentDate = new Date(startDate);
-      while (currentDate <= endDate) {
-        const dateStr = currentDate.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
-        chartArray.push({
-          date: dateStr,
-          intake: dailyData[dateStr] || 0
-        });
-        currentDate.setDate(currentDate.getDate() + 1);
-      }
-
-      setChartData(chartArray);
+      const dailyRes = await fetch(`/api/users/${userId}/daily?${chartWindowParams(viewMode, user.timezone)}`);
+      const days = await dailyRes.json();
+      setChartData(toChartData(days));
     } catch (error) {
       console.error('Error loading chart data:', error);
     }
@@ -117,15 +100,28 @@ export default function UserDetail() {
     const difference = sliderValue - todayIntake;
     if (difference <= 0) return;
 
+    // One key per submission: if the connection drops after the server
+    // recorded it, the retry is recognised instead of logged twice
+    const idempotencyKey = crypto.randomUUID();
     try {
-      await fetch('/api/water-logs', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          userId: userId,
-          amount: difference
-        })
-      });
+      for (let attempt = 1; ; attempt++) {
+        try {
+          await fetch('/api/water-logs', {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+              'Idempotency-Key': idempotencyKey
+            },
+            body: JSON.stringify({
+              userId: userId,
+              amount: difference
+            })
+          });
+          break;
+        } catch (error) {
+          if (attempt === ADD_WATER_ATTEMPTS) throw error;
+        }
+      }
 
       setTodayIntake(sliderValue);
       loadChartData();
@@ -137,11 +133,20 @@ export default function UserDetail() {
   const handleUpdateGoal = async () => {
     try {
       const goalValue = parseInt(newGoal);
-      await fetch(`/api/users/${userId}`, {
+      const update = { dailyGoal: goalValue };
+      // Only send a timezone the user actually edited: a new one makes the
+      // server rebuild all of the user's daily rollups
+      if (newTimezone.trim() !== user.timezone) {
+        update.timezone = newTimezone.trim() || null;
+      }
+      const res = await fetch(`/api/users/${userId}`, {
         method: 'PUT',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ dailyGoal: goalValue })
+        body: JSON.stringify(update)
       });
+      if (!res.ok) {
+        throw new Error((await res.json()).error);
+      }
 
       // Update local state
       setUser({ ...user, dailyGoal: goalValue });
@@ -212,7 +217,8 @@ export default function UserDetail() {
               {new Date().toLocaleDateString('en-US', { 
                 weekday: 'long', 
                 month: 'long', 
-                day: 'numeric' 
+                day: 'numeric',
+                timeZone: user.timezone
               })}
             </p>
           </CardContent>
@@ -242,6 +248,11 @@ export default function UserDetail() {
                   onChange={(e) => setNewGoal(e.target.value)}
                   placeholder="Daily goal (ml)"
                 />
+                <Input
+                  value={newTimezone}
+                  onChange={(e) => setNewTimezone(e.target.value)}
+                  placeholder="Timezone (e.g. Europe/Berlin)"
+                />
                 <Button onClick={handleUpdateGoal}>Save</Button>
                 <Button variant="outline" onClick={() => setEditingGoal(false)}>Cancel</Button>
               </div>
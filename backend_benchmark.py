@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Water Tracker API Load Benchmark
+Replays the API's main endpoint calls concurrently and reports latency
+percentiles, throughput and error rate per endpoint.
+
+Usage:
+    python backend_benchmark.py --concurrency 50 --requests 500
+    python backend_benchmark.py --rate 200 --duration 30 --output before.json
+    python backend_benchmark.py --output after.json --compare before.json
+    python backend_benchmark.py --max-acquire-share 0.25
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from backend_test import API_BASE, BASE_URL
+
+REQUEST_TIMEOUT = 10
+
+# Fail the run when waiting for a pooled DB connection accounts for more than
+# this share of request latency (the pool is too small for the load)
+DEFAULT_MAX_ACQUIRE_SHARE = 0.5
+
+# Extra headers sent with every request (e.g. Cache-Control: no-cache to
+# bypass the server's response cache)
+SESSION_HEADERS = {}
+
+_thread_state = threading.local()
+
+
+def get_session():
+    """Return a keep-alive session owned by the calling worker thread"""
+    session = getattr(_thread_state, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(SESSION_HEADERS)
+        _thread_state.session = session
+    return session
+
+
+# Scenarios mirror the calls the app's pages make. Each one issues exactly
+# one request so its latency can be attributed to one endpoint.
+
+def scenario_seed(session, ctx):
+    return session.get(f"{API_BASE}/seed", timeout=REQUEST_TIMEOUT)
+
+
+def scenario_get_all_users(session, ctx):
+    return session.get(f"{API_BASE}/users", timeout=REQUEST_TIMEOUT)
+
+
+def scenario_get_specific_user(session, ctx):
+    user_id = random.choice(ctx['user_ids'])
+    return session.get(f"{API_BASE}/users/{user_id}", timeout=REQUEST_TIMEOUT)
+
+
+def scenario_log_water_intake(session, ctx):
+    payload = {
+        "userId": random.choice(ctx['user_ids']),
+        "amount": random.choice([150, 200, 250, 300, 500]),
+    }
+    return session.post(f"{API_BASE}/water-logs", json=payload, timeout=REQUEST_TIMEOUT)
+
+
+def scenario_get_water_logs(session, ctx):
+    today = datetime.now().strftime('%Y-%m-%d')
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    params = {
+        "userId": random.choice(ctx['user_ids']),
+        "startDate": today,
+        "endDate": tomorrow,
+    }
+    return session.get(f"{API_BASE}/water-logs", params=params, timeout=REQUEST_TIMEOUT)
+
+
+def scenario_get_water_logs_page(session, ctx):
+    return session.get(f"{API_BASE}/water-logs", params={"limit": 100}, timeout=REQUEST_TIMEOUT)
+
+
+def scenario_get_daily_totals(session, ctx):
+    end = datetime.now(timezone.utc).date()
+    params = {"from": end.replace(day=1).isoformat(), "to": end.isoformat(), "tz": "UTC"}
+    user_id = random.choice(ctx['user_ids'])
+    return session.get(f"{API_BASE}/users/{user_id}/daily", params=params, timeout=REQUEST_TIMEOUT)
+
+
+def scenario_today_intake(session, ctx):
+    return session.get(f"{API_BASE}/today-intake", timeout=REQUEST_TIMEOUT)
+
+
+def scenario_update_daily_goal(session, ctx):
+    user_id = random.choice(ctx['user_ids'])
+    return session.put(
+        f"{API_BASE}/users/{user_id}",
+        json={"dailyGoal": ctx['goals'][user_id]},
+        timeout=REQUEST_TIMEOUT,
+    )
+
+
+def scenario_leaderboard(session, ctx):
+    params = {"by": random.choice(['total', 'streak'])}
+    return session.get(f"{API_BASE}/leaderboard", params=params, timeout=REQUEST_TIMEOUT)
+
+
+def _page_window_params():
+    end = datetime.now(timezone.utc).date()
+    return {"from": (end - timedelta(days=6)).isoformat(), "to": end.isoformat(), "tz": "UTC"}
+
+
+# The two user-page scenarios load everything the user detail page renders;
+# their latency is the page's time-to-data rather than one endpoint's.
+
+def scenario_user_page_waterfall(session, ctx):
+    """The page's former request chain: user, then today's total, then the chart"""
+    user_id = random.choice(ctx['user_ids'])
+    today = datetime.now(timezone.utc).date().isoformat()
+    response = session.get(f"{API_BASE}/users/{user_id}", timeout=REQUEST_TIMEOUT)
+    if response.status_code >= 400:
+        return response
+    response = session.get(
+        f"{API_BASE}/users/{user_id}/daily",
+        params={"from": today, "to": today, "tz": "UTC"}, timeout=REQUEST_TIMEOUT,
+    )
+    if response.status_code >= 400:
+        return response
+    return session.get(f"{API_BASE}/users/{user_id}/daily", params=_page_window_params(), timeout=REQUEST_TIMEOUT)
+
+
+def scenario_user_page_bootstrap(session, ctx):
+    user_id = random.choice(ctx['user_ids'])
+    return session.get(f"{API_BASE}/users/{user_id}/bootstrap", params=_page_window_params(), timeout=REQUEST_TIMEOUT)
+
+
+# Sequential round trips each page scenario makes
+PAGE_ROUND_TRIPS = {
+    'user_page_waterfall': 3,
+    'user_page_bootstrap': 1,
+}
+
+# Scenarios exercising every read-only GET branch of the API
+READ_SCENARIOS = [
+    'seed', 'get_all_users', 'get_specific_user', 'get_daily_totals',
+    'get_water_logs', 'get_water_logs_page', 'today_intake', 'user_page_bootstrap', 'leaderboard',
+]
+
+SCENARIOS = {
+    'seed': scenario_seed,
+    'get_all_users': scenario_get_all_users,
+    'get_specific_user': scenario_get_specific_user,
+    'log_water_intake': scenario_log_water_intake,
+    'get_water_logs': scenario_get_water_logs,
+    'get_water_logs_page': scenario_get_water_logs_page,
+    'get_daily_totals': scenario_get_daily_totals,
+    'today_intake': scenario_today_intake,
+    'update_daily_goal': scenario_update_daily_goal,
+    'user_page_waterfall': scenario_user_page_waterfall,
+    'user_page_bootstrap': scenario_user_page_bootstrap,
+    'leaderboard': scenario_leaderboard,
+}
+
+
+def build_context():
+    """Fetch the users the scenarios operate on"""
+    response = requests.get(f"{API_BASE}/users", headers=SESSION_HEADERS, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    users = response.json()
+    if not users:
+        raise RuntimeError("No users found - run the seed endpoint first")
+    return {
+        'user_ids': [user['id'] for user in users],
+        # Goal updates write back the current value so benchmarks do not
+        # leave users with modified goals
+        'goals': {user['id']: user['dailyGoal'] for user in users},
+    }
+
+
+def fetch_pool_stats():
+    """Return the API's connection-pool stats, or None if unavailable"""
+    try:
+        response = requests.get(f"{API_BASE}/internal/stats", timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json().get('pool')
+    except (requests.RequestException, ValueError):
+        return None
+
+
+METRIC_LINE = re.compile(r'^(\w+)\{(.*)\} (\S+)$')
+METRIC_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def fetch_phase_totals():
+    """Sum the API's request-phase histograms across all non-internal routes.
+
+    Returns ``{'requests': n, 'server_s': s, 'phases': {phase: seconds}}`` or
+    None when the metrics endpoint is unavailable.
+    """
+    try:
+        response = requests.get(f"{API_BASE}/internal/metrics", timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+
+    totals = {'requests': 0, 'server_s': 0.0, 'phases': {}}
+    for line in response.text.splitlines():
+        match = METRIC_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.group(1), dict(METRIC_LABEL.findall(match.group(2))), float(match.group(3))
+        if labels.get('route', '').startswith('internal/'):
+            continue
+        if name == 'water_tracker_http_request_duration_seconds_count':
+            totals['requests'] += value
+        elif name == 'water_tracker_http_request_duration_seconds_sum':
+            totals['server_s'] += value
+        elif name == 'water_tracker_http_request_phase_seconds_sum':
+            totals['phases'][labels['phase']] = totals['phases'].get(labels['phase'], 0.0) + value
+    return totals
+
+
+def attribute_latency(before, after, latencies):
+    """Split the mean latency of a scenario call into DB, app and network time.
+
+    ``db`` covers pool acquire waits and queries; ``network`` is what the
+    client saw beyond the server's own handling time. Scenarios that make
+    several requests per call are attributed per call.
+    """
+    if not before or not after:
+        return None
+    served = after['requests'] - before['requests']
+    calls = len(latencies)
+    if served <= 0 or not calls:
+        return None
+
+    def mean_ms(phase):
+        return (after['phases'].get(phase, 0.0) - before['phases'].get(phase, 0.0)) * 1000 / calls
+
+    server_ms = (after['server_s'] - before['server_s']) * 1000 / calls
+    client_ms = sum(latencies) / calls
+    acquire_ms, query_ms = mean_ms('acquire'), mean_ms('db')
+    return {
+        'server_requests': served,
+        'acquire_ms': acquire_ms,
+        'query_ms': query_ms,
+        'db_ms': acquire_ms + query_ms,
+        'serialize_ms': mean_ms('serialize'),
+        'app_ms': mean_ms('app'),
+        'server_ms': server_ms,
+        'network_ms': max(client_ms - server_ms, 0.0),
+        'db_share': (acquire_ms + query_ms) / server_ms if server_ms else 0.0,
+    }
+
+
+def pool_delta(before, after, latencies):
+    """Summarize pool activity between two stats snapshots.
+
+    ``acquire_share`` is the time spent waiting for connections divided by the
+    total client-observed latency of the scenario's requests.
+    """
+    if not before or not after:
+        return None
+    acquires = after['acquire']['count'] - before['acquire']['count']
+    acquire_ms = after['acquire']['totalMs'] - before['acquire']['totalMs']
+    total_latency_ms = sum(latencies)
+    return {
+        'acquires': acquires,
+        'acquire_ms_total': acquire_ms,
+        'acquire_ms_mean': acquire_ms / acquires if acquires else 0.0,
+        'acquire_ms_max': after['acquire']['maxMs'],
+        'acquire_timeouts': after['acquire']['timeouts'] - before['acquire']['timeouts'],
+        'acquire_share': acquire_ms / total_latency_ms if total_latency_ms else 0.0,
+        'pool_total': after['total'],
+        'pool_idle': after['idle'],
+        'pool_waiting': after['waiting'],
+        'pool_max': after['max'],
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def run_scenario(name, ctx, concurrency, total_requests=None, duration=None, rate=None):
+    """Run one scenario and return its latency/throughput summary.
+
+    With ``rate`` set the load is open-loop: request ``i`` is scheduled at
+    ``start + i / rate`` and its latency is measured from that scheduled time,
+    so queueing delay caused by a slow server is not hidden.
+    """
+    scenario = SCENARIOS[name]
+    latencies = []
+    statuses = {}
+    errors = 0
+    lock = threading.Lock()
+    counter = {'next': 0}
+
+    pool_before = fetch_pool_stats()
+    phases_before = fetch_phase_totals()
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    def next_index():
+        with lock:
+            index = counter['next']
+            if total_requests is not None and index >= total_requests:
+                return None
+            counter['next'] += 1
+            return index
+
+    def worker():
+        nonlocal errors
+        session = get_session()
+        while True:
+            index = next_index()
+            if index is None:
+                return
+            scheduled = start + index / rate if rate else None
+            if scheduled is not None:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+
+            sent = scheduled if scheduled is not None else time.perf_counter()
+            try:
+                response = scenario(session, ctx)
+                status = response.status_code
+                failed = status >= 400
+            except requests.RequestException:
+                status = 'exception'
+                failed = True
+            elapsed_ms = (time.perf_counter() - sent) * 1000
+
+            with lock:
+                latencies.append(elapsed_ms)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if failed:
+                    errors += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+        for future in futures:
+            future.result()
+
+    wall_time = time.perf_counter() - start
+    pool = pool_delta(pool_before, fetch_pool_stats(), latencies)
+    attribution = attribute_latency(phases_before, fetch_phase_totals(), latencies)
+    latencies.sort()
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': errors / count if count else 0.0,
+        'throughput_rps': count / wall_time if wall_time > 0 else 0.0,
+        'wall_time_s': wall_time,
+        'latency_ms': {
+            'min': latencies[0] if latencies else None,
+            'mean': sum(latencies) / count if count else None,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None,
+        },
+        'status_codes': statuses,
+        'pool': pool,
+        'attribution': attribution,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(results):
+    print("\n" + "=" * 78)
+    print("🏁 BENCHMARK SUMMARY")
+    print("=" * 78)
+    print(f"{'endpoint':<20}{'reqs':>7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}")
+    for name, result in results.items():
+        latency = result['latency_ms']
+        print(
+            f"{name:<20}{result['requests']:>7}{result['throughput_rps']:>9.1f}"
+            f"{latency['p50'] or 0:>10.1f}{latency['p95'] or 0:>10.1f}{latency['p99'] or 0:>10.1f}"
+            f"{result['error_rate']:>9.1%}"
+        )
+
+    print(f"\n{'endpoint':<20}{'acquires':>10}{'mean wait':>11}{'max wait':>10}{'share':>8}{'timeouts':>10}")
+    for name, result in results.items():
+        pool = result['pool']
+        if pool is None:
+            continue
+        print(
+            f"{name:<20}{pool['acquires']:>10}{pool['acquire_ms_mean']:>9.1f}ms"
+            f"{pool['acquire_ms_max']:>8.1f}ms{pool['acquire_share']:>8.1%}{pool['acquire_timeouts']:>10}"
+        )
+
+    print(f"\n{'endpoint':<20}{'server':>9}{'acquire':>9}{'query':>9}{'serialize':>11}{'app':>9}{'network':>9}{'db share':>10}")
+    for name, result in results.items():
+        split = result['attribution']
+        if split is None:
+            continue
+        print(
+            f"{name:<20}{split['server_ms']:>9.1f}{split['acquire_ms']:>9.1f}{split['query_ms']:>9.1f}"
+            f"{split['serialize_ms']:>11.1f}{split['app_ms']:>9.1f}{split['network_ms']:>9.1f}{split['db_share']:>10.0%}"
+        )
+
+
+def acquire_bound(results, max_share):
+    """Names of scenarios whose latency is dominated by pool acquire waits"""
+    return [
+        name for name, result in results.items()
+        if result['pool'] and (result['pool']['acquire_share'] > max_share or result['pool']['acquire_timeouts'])
+    ]
+
+
+def print_comparison(results, baseline_path):
+    """Print p50/p95/p99 deltas against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['endpoints']
+
+    print(f"\n📊 Comparison against {baseline_path}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        deltas = []
+        for key in ('p50', 'p95', 'p99'):
+            before = baseline[name]['latency_ms'][key]
+            after = result['latency_ms'][key]
+            if before and after is not None:
+                deltas.append(f"{key} {before:.1f}→{after:.1f}ms ({(after - before) / before:+.0%})")
+        print(f"{name:<20}" + "  ".join(deltas))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                        help='endpoint scenarios to run (default: all)')
+    parser.add_argument('--concurrency', type=int, default=20, help='concurrent workers per scenario')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--duration', type=float, help='seconds per scenario (overrides --requests)')
+    parser.add_argument('--rate', type=float, help='target requests/second per scenario (open-loop)')
+    parser.add_argument('--no-server-cache', action='store_true',
+                        help="bypass the API's response cache to measure database latency")
+    parser.add_argument('--max-acquire-share', type=float, default=DEFAULT_MAX_ACQUIRE_SHARE,
+                        help='fail when pool acquire waits exceed this share of request latency')
+    parser.add_argument('--output', help='write machine-readable results to this JSON file')
+    parser.add_argument('--compare', help='previous results JSON to compare against')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    total_requests = None if args.duration else args.requests
+    if args.no_server_cache:
+        SESSION_HEADERS['Cache-Control'] = 'no-cache'
+
+    print(f"Benchmarking Water Tracker API at: {API_BASE}")
+    ctx = build_context()
+
+    results = {}
+    for name in args.scenarios:
+        print(f"⏱️  Running {name}...")
+        results[name] = run_scenario(
+            name, ctx, args.concurrency,
+            total_requests=total_requests, duration=args.duration, rate=args.rate,
+        )
+
+    print_summary(results)
+
+    if args.output:
+        report = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'base_url': BASE_URL,
+            'git_revision': git_revision(),
+            'config': {
+                'concurrency': args.concurrency,
+                'requests': total_requests,
+                'duration_s': args.duration,
+                'rate_rps': args.rate,
+                'max_acquire_share': args.max_acquire_share,
+            },
+            'endpoints': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+    bound = acquire_bound(results, args.max_acquire_share)
+    if bound:
+        print(f"\n❌ Connection pool acquire waits dominate latency for: {', '.join(bound)}")
+
+    return not bound and all(result['errors'] == 0 for result in results.values())
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,14 @@
+import pg from 'pg';
+
+// Standalone connection for maintenance scripts (the API uses its own pool)
+export async function connect() {
+  if (!process.env.DATABASE_URL) {
+    throw new Error('DATABASE_URL environment variable is not set');
+  }
+  const client = new pg.Client({
+    connectionString: process.env.DATABASE_URL,
+    ssl: process.env.NODE_ENV === 'production' ? { rejectUnauthorized: false } : false,
+  });
+  await client.connect();
+  return client;
+}
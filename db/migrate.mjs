@@ -0,0 +1,43 @@
+import { readdir, readFile } from 'node:fs/promises';
+
+const MIGRATIONS_DIR = new URL('./migrations/', import.meta.url);
+
+// Arbitrary constant shared by every instance so only one applies migrations
+const MIGRATION_LOCK_ID = 72460113;
+
+// Apply every migration in db/migrations that has not run yet, in file name
+// order, each in its own transaction. Safe to call concurrently.
+export async function migrate(client, { log = console.log } = {}) {
+  await client.query('SELECT pg_advisory_lock($1)', [MIGRATION_LOCK_ID]);
+  try {
+    await client.query(`
+      CREATE TABLE IF NOT EXISTS schema_migrations (
+        version text PRIMARY KEY,
+        applied_at timestamptz NOT NULL DEFAULT NOW()
+      )
+    `);
+    const applied = await client.query('SELECT version FROM schema_migrations');
+    const done = new Set(applied.rows.map(row => row.version));
+
+    const files = (await readdir(MIGRATIONS_DIR)).filter(f => f.endsWith('.sql')).sort();
+    const pending = files.filter(f => !done.has(f.replace(/\.sql$/, '')));
+
+    for (const file of pending) {
+      const version = file.replace(/\.sql$/, '');
+      const sql = await readFile(new URL(file, MIGRATIONS_DIR), 'utf8');
+      try {
+        await client.query('BEGIN');
+        await client.query(sql);
+        await client.query('INSERT INTO schema_migrations (version) VALUES ($1)', [version]);
+        await client.query('COMMIT');
+      } catch (error) {
+        await client.query('ROLLBACK');
+        throw new Error(`Migration ${file} failed: ${error.message}`);
+      }
+      log(`Applied ${file}`);
+    }
+    return pending;
+  } finally {
+    await client.query('SELECT pg_advisory_unlock($1)', [MIGRATION_LOCK_ID]);
+  }
+}
@@ -0,0 +1,19 @@
+-- Base tables used by app/api/[[...path]]/route.js. IF NOT EXISTS lets
+-- databases created before migrations existed adopt this history.
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+CREATE TABLE IF NOT EXISTS users (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  name text NOT NULL,
+  daily_goal_ml integer NOT NULL DEFAULT 3000,
+  created_at timestamptz NOT NULL DEFAULT NOW(),
+  CONSTRAINT users_daily_goal_ml_positive CHECK (daily_goal_ml > 0)
+);
+
+CREATE TABLE IF NOT EXISTS water_logs (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id uuid NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  amount_ml integer NOT NULL,
+  logged_at timestamptz NOT NULL DEFAULT NOW(),
+  CONSTRAINT water_logs_amount_ml_positive CHECK (amount_ml > 0)
+);
@@ -0,0 +1,13 @@
+-- Per-user daily totals, maintained by POST /api/water-logs in the same
+-- statement as the insert. `day` is the calendar day in ROLLUP_TIMEZONE.
+-- Rebuild from water_logs with `yarn db:rebuild-daily-intake`.
+CREATE TABLE IF NOT EXISTS daily_intake (
+  user_id uuid NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  day date NOT NULL,
+  total_ml bigint NOT NULL DEFAULT 0,
+  log_count integer NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, day)
+);
+
+-- today-intake looks up every user's row for a single day
+CREATE INDEX IF NOT EXISTS daily_intake_day_idx ON daily_intake (day);
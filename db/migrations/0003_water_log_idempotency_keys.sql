@@ -0,0 +1,10 @@
+-- Idempotency keys for water log ingestion. A key is unique per user and
+-- points at the log it created, so retried uploads report the original log
+-- instead of inserting a duplicate.
+CREATE TABLE IF NOT EXISTS water_log_idempotency_keys (
+  user_id uuid NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  idempotency_key text NOT NULL,
+  log_id uuid NOT NULL,
+  created_at timestamptz NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (user_id, idempotency_key)
+);
@@ -0,0 +1,14 @@
+-- Indexes for the query shapes in db/queries.mjs. Verify plans with
+-- `yarn db:explain-check`.
+
+-- water-logs filtered by user (optionally by date range), newest first, with
+-- keyset pagination on (logged_at, id); also the raw daily aggregate
+CREATE INDEX IF NOT EXISTS water_logs_user_logged_at_idx
+  ON water_logs (user_id, logged_at DESC, id DESC);
+
+-- water-logs without a user filter (date range only, or the full export)
+CREATE INDEX IF NOT EXISTS water_logs_logged_at_idx
+  ON water_logs (logged_at DESC, id DESC);
+
+-- users and today-intake are ordered by creation time
+CREATE INDEX IF NOT EXISTS users_created_at_idx ON users (created_at DESC);
@@ -0,0 +1,34 @@
+-- User names are unique so seeding can be a single idempotent
+-- INSERT ... ON CONFLICT (name) DO NOTHING.
+
+-- The old check-then-insert seed could create a user twice when two first
+-- visits raced. Fold each duplicate into the oldest user of that name.
+CREATE TEMP TABLE duplicate_users ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+  SELECT id, first_value(id) OVER (PARTITION BY name ORDER BY created_at, id) AS keep_id
+  FROM users
+) ranked
+WHERE id <> keep_id;
+
+UPDATE water_logs w SET user_id = d.keep_id
+FROM duplicate_users d
+WHERE w.user_id = d.id;
+
+INSERT INTO daily_intake (user_id, day, total_ml, log_count)
+SELECT d.keep_id, t.day, SUM(t.total_ml), SUM(t.log_count)
+FROM daily_intake t JOIN duplicate_users d ON d.id = t.user_id
+GROUP BY 1, 2
+ON CONFLICT (user_id, day) DO UPDATE
+  SET total_ml = daily_intake.total_ml + EXCLUDED.total_ml,
+      log_count = daily_intake.log_count + EXCLUDED.log_count;
+
+INSERT INTO water_log_idempotency_keys (user_id, idempotency_key, log_id, created_at)
+SELECT d.keep_id, k.idempotency_key, k.log_id, k.created_at
+FROM water_log_idempotency_keys k JOIN duplicate_users d ON d.id = k.user_id
+ON CONFLICT (user_id, idempotency_key) DO NOTHING;
+
+-- Remaining rollup and key rows of the duplicates cascade
+DELETE FROM users WHERE id IN (SELECT id FROM duplicate_users);
+
+CREATE UNIQUE INDEX IF NOT EXISTS users_name_key ON users (name);
@@ -0,0 +1,138 @@
+-- Range-partition water_logs by calendar month (UTC) so reads of today or
+-- the current month only touch one partition, and old months can be moved
+-- out of the live table. Partitions are named water_logs_yYYYYmMM.
+--
+-- Partitions are created ahead of time by ensure_water_logs_partitions()
+-- (run by `yarn db:migrate` and `yarn db:partitions`). Months older than a
+-- cutoff can be folded into water_logs_archive with
+-- archive_water_logs_partition(); archived months are never recreated.
+
+-- Cold history: one row per user and month, the logs stored as parallel
+-- arrays that TOAST compresses
+CREATE TABLE IF NOT EXISTS water_logs_archive (
+  user_id uuid NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  month date NOT NULL,
+  log_count integer NOT NULL,
+  ids uuid[] NOT NULL,
+  amounts integer[] NOT NULL,
+  logged_ats timestamptz[] NOT NULL,
+  PRIMARY KEY (user_id, month)
+);
+
+CREATE INDEX IF NOT EXISTS water_logs_archive_month_idx ON water_logs_archive (month);
+
+-- The first month that can still hold live logs
+CREATE OR REPLACE FUNCTION water_logs_live_from() RETURNS date
+LANGUAGE sql STABLE AS $$
+  SELECT COALESCE((MAX(month) + interval '1 month')::date, '-infinity'::date)
+  FROM water_logs_archive
+$$;
+
+-- Create any missing monthly partitions covering [from_ts, to_ts]. Archived
+-- months are skipped. Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_water_logs_partitions(from_ts timestamptz, to_ts timestamptz)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  cur_month date := date_trunc('month', from_ts AT TIME ZONE 'UTC')::date;
+  last_month date := date_trunc('month', to_ts AT TIME ZONE 'UTC')::date;
+  live_from date := water_logs_live_from();
+  partition_name text;
+  created integer := 0;
+BEGIN
+  WHILE cur_month <= last_month LOOP
+    partition_name := format('water_logs_y%sm%s', to_char(cur_month, 'YYYY'), to_char(cur_month, 'MM'));
+    IF cur_month >= live_from AND to_regclass(partition_name) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF water_logs FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        cur_month::timestamp AT TIME ZONE 'UTC',
+        (cur_month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+      );
+      created := created + 1;
+    END IF;
+    cur_month := (cur_month + interval '1 month')::date;
+  END LOOP;
+  RETURN created;
+END;
+$$;
+
+-- Detach one month's partition, fold its logs into water_logs_archive and
+-- drop it. Returns the number of logs archived.
+CREATE OR REPLACE FUNCTION archive_water_logs_partition(archive_month date)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  target_month date := date_trunc('month', archive_month)::date;
+  partition_name text := format('water_logs_y%sm%s', to_char(target_month, 'YYYY'), to_char(target_month, 'MM'));
+  archived integer;
+BEGIN
+  IF target_month >= date_trunc('month', NOW() AT TIME ZONE 'UTC')::date THEN
+    RAISE EXCEPTION 'Cannot archive % (current or future month)', partition_name;
+  END IF;
+  -- Archived history must be older than every live log
+  IF EXISTS (
+    SELECT 1 FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'water_logs'::regclass
+      AND c.relname ~ '^water_logs_y\d{4}m\d{2}$'
+      AND c.relname < partition_name
+  ) THEN
+    RAISE EXCEPTION 'Archive partitions older than % first', partition_name;
+  END IF;
+  IF to_regclass(partition_name) IS NULL THEN
+    RETURN 0;
+  END IF;
+
+  EXECUTE format('ALTER TABLE water_logs DETACH PARTITION %I', partition_name);
+  EXECUTE format($sql$
+    INSERT INTO water_logs_archive (user_id, month, log_count, ids, amounts, logged_ats)
+    SELECT user_id, %L, COUNT(*),
+           array_agg(id ORDER BY logged_at, id),
+           array_agg(amount_ml ORDER BY logged_at, id),
+           array_agg(logged_at ORDER BY logged_at, id)
+    FROM %I
+    GROUP BY user_id
+  $sql$, target_month, partition_name);
+  EXECUTE format('SELECT COUNT(*) FROM %I', partition_name) INTO archived;
+  EXECUTE format('DROP TABLE %I', partition_name);
+  RETURN archived;
+END;
+$$;
+
+-- Move the existing rows into the partitioned table. The primary key has to
+-- include the partition key; ids are random uuids, so (id, logged_at) is as
+-- unique as id was.
+ALTER TABLE water_logs RENAME TO water_logs_unpartitioned;
+ALTER TABLE water_logs_unpartitioned RENAME CONSTRAINT water_logs_pkey TO water_logs_unpartitioned_pkey;
+DROP INDEX IF EXISTS water_logs_user_logged_at_idx;
+DROP INDEX IF EXISTS water_logs_logged_at_idx;
+
+CREATE TABLE water_logs (
+  id uuid NOT NULL DEFAULT gen_random_uuid(),
+  user_id uuid NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  amount_ml integer NOT NULL,
+  logged_at timestamptz NOT NULL DEFAULT NOW(),
+  CONSTRAINT water_logs_amount_ml_positive CHECK (amount_ml > 0),
+  PRIMARY KEY (id, logged_at)
+) PARTITION BY RANGE (logged_at);
+
+-- Same indexes as 0004, created on every partition
+CREATE INDEX water_logs_user_logged_at_idx ON water_logs (user_id, logged_at DESC, id DESC);
+CREATE INDEX water_logs_logged_at_idx ON water_logs (logged_at DESC, id DESC);
+
+SELECT ensure_water_logs_partitions(COALESCE(MIN(logged_at), NOW()), NOW() + interval '3 months')
+FROM water_logs_unpartitioned;
+
+INSERT INTO water_logs (id, user_id, amount_ml, logged_at)
+SELECT id, user_id, amount_ml, logged_at FROM water_logs_unpartitioned;
+
+DROP TABLE water_logs_unpartitioned;
+
+-- Live and archived logs together, for reads that may reach cold history
+CREATE VIEW water_logs_all AS
+SELECT id, user_id, amount_ml, logged_at FROM water_logs
+UNION ALL
+SELECT l.id, a.user_id, l.amount_ml, l.logged_at
+FROM water_logs_archive a
+CROSS JOIN LATERAL unnest(a.ids, a.amounts, a.logged_ats) AS l(id, amount_ml, logged_at);
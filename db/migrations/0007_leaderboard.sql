@@ -0,0 +1,142 @@
+-- Precomputed state behind GET /api/leaderboard, derived from daily_intake
+-- (so days and weeks are calendar days and weeks in each user's timezone,
+-- see 0008). Kept current by the transactions that log water or change a
+-- goal; rebuild with `yarn db:rebuild-leaderboard`.
+
+-- Per-user totals per week (weeks start on Monday)
+CREATE TABLE IF NOT EXISTS weekly_intake (
+  user_id uuid NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  week date NOT NULL,
+  total_ml bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, week)
+);
+
+CREATE INDEX IF NOT EXISTS weekly_intake_week_idx ON weekly_intake (week, total_ml DESC);
+
+-- Runs of consecutive days whose daily_intake total reached the user's
+-- current daily goal. The latest run is current_start..last_met_day; it is
+-- the current streak while last_met_day is today or yesterday.
+CREATE TABLE IF NOT EXISTS user_streaks (
+  user_id uuid PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+  current_start date,
+  last_met_day date,
+  longest_streak integer NOT NULL DEFAULT 0
+);
+
+-- Recompute one user's streaks from their daily_intake rows against `goal`
+CREATE OR REPLACE FUNCTION refresh_user_streak(target uuid, goal integer)
+RETURNS void
+LANGUAGE sql AS $$
+  WITH runs AS (
+    SELECT MIN(day) AS first_day, MAX(day) AS last_day, COUNT(*) AS days
+    FROM (
+      SELECT day, day - (ROW_NUMBER() OVER (ORDER BY day))::int AS run
+      FROM daily_intake
+      WHERE user_id = target AND total_ml >= goal
+    ) met
+    GROUP BY run
+  )
+  INSERT INTO user_streaks (user_id, current_start, last_met_day, longest_streak)
+  SELECT target,
+         (SELECT first_day FROM runs ORDER BY last_day DESC LIMIT 1),
+         (SELECT MAX(last_day) FROM runs),
+         COALESCE((SELECT MAX(days) FROM runs), 0)
+  ON CONFLICT (user_id) DO UPDATE
+    SET current_start = EXCLUDED.current_start,
+        last_met_day = EXCLUDED.last_met_day,
+        longest_streak = EXCLUDED.longest_streak
+$$;
+
+-- Fold logs that were just added to daily_intake into weekly_intake and
+-- user_streaks. Called in the writing transaction, after the rollup upsert,
+-- with one entry per touched user-day. A day that newly reaches the goal
+-- extends or starts the latest run; one at or before the latest met day
+-- (a backdated log) can join earlier runs, so that user is recomputed.
+CREATE OR REPLACE FUNCTION apply_intake_progress(user_ids uuid[], days date[], added_ml bigint[])
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+  target uuid;
+  goal integer;
+  met_days date[];
+  met_day date;
+  run_start date;
+  run_end date;
+  longest integer;
+BEGIN
+  INSERT INTO weekly_intake (user_id, week, total_ml)
+  SELECT user_id, date_trunc('week', day::timestamp)::date, SUM(added)
+  FROM unnest(user_ids, days, added_ml) AS v(user_id, day, added)
+  GROUP BY 1, 2
+  ORDER BY 1, 2
+  ON CONFLICT (user_id, week) DO UPDATE
+    SET total_ml = weekly_intake.total_ml + EXCLUDED.total_ml;
+
+  FOR target IN SELECT DISTINCT v.user_id FROM unnest(user_ids) AS v(user_id) ORDER BY 1 LOOP
+    -- UPDATE_USER_GOAL recomputes streaks under the user row lock; sharing
+    -- it means a concurrent goal change either sees this write or is seen
+    -- by it
+    SELECT daily_goal_ml INTO goal FROM users WHERE id = target FOR SHARE;
+
+    met_days := ARRAY(
+      SELECT v.day
+      FROM (
+        SELECT day, SUM(added) AS added
+        FROM unnest(user_ids, days, added_ml) AS v(user_id, day, added)
+        WHERE user_id = target
+        GROUP BY day
+      ) v
+      JOIN daily_intake d ON d.user_id = target AND d.day = v.day
+      WHERE d.total_ml >= goal AND d.total_ml - v.added < goal
+      ORDER BY v.day
+    );
+    CONTINUE WHEN cardinality(met_days) = 0;
+
+    INSERT INTO user_streaks (user_id) VALUES (target) ON CONFLICT (user_id) DO NOTHING;
+    SELECT current_start, last_met_day, longest_streak INTO run_start, run_end, longest
+    FROM user_streaks WHERE user_id = target FOR UPDATE;
+
+    IF run_end >= met_days[1] THEN
+      PERFORM refresh_user_streak(target, goal);
+      CONTINUE;
+    END IF;
+
+    FOREACH met_day IN ARRAY met_days LOOP
+      IF run_end IS NULL OR met_day > run_end + 1 THEN
+        run_start := met_day;
+      END IF;
+      run_end := met_day;
+      longest := GREATEST(longest, met_day - run_start + 1);
+    END LOOP;
+
+    UPDATE user_streaks
+    SET current_start = run_start, last_met_day = run_end, longest_streak = longest
+    WHERE user_id = target;
+  END LOOP;
+END;
+$$;
+
+-- Recompute weekly_intake and user_streaks from daily_intake for one user,
+-- or everyone when `target` is NULL. Returns the number of users refreshed.
+CREATE OR REPLACE FUNCTION rebuild_leaderboard(target uuid)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  refreshed integer;
+BEGIN
+  DELETE FROM weekly_intake WHERE target IS NULL OR user_id = target;
+  INSERT INTO weekly_intake (user_id, week, total_ml)
+  SELECT user_id, date_trunc('week', day::timestamp)::date, SUM(total_ml)
+  FROM daily_intake
+  WHERE target IS NULL OR user_id = target
+  GROUP BY 1, 2;
+
+  PERFORM refresh_user_streak(id, daily_goal_ml)
+  FROM users
+  WHERE target IS NULL OR id = target;
+  GET DIAGNOSTICS refreshed = ROW_COUNT;
+  RETURN refreshed;
+END;
+$$;
+
+SELECT rebuild_leaderboard(NULL);
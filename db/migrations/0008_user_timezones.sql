@@ -0,0 +1,30 @@
+-- Every user keeps their own calendar. `timezone` is an IANA name; NULL
+-- means the deployment's ROLLUP_TIMEZONE, so the rollups of existing users
+-- stay valid. From here on a daily_intake day (and the weekly_intake and
+-- user_streaks derived from it) is a calendar day in the user's timezone.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone text;
+
+-- Recompute daily_intake from every log, live and archived, in each user's
+-- timezone (`default_tz` for users without one), then the leaderboard state
+-- derived from it. One user, or everyone when `target` is NULL. Returns the
+-- number of user-days written.
+CREATE OR REPLACE FUNCTION rebuild_daily_intake(target uuid, default_tz text)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  rebuilt integer;
+BEGIN
+  DELETE FROM daily_intake WHERE target IS NULL OR user_id = target;
+  INSERT INTO daily_intake (user_id, day, total_ml, log_count)
+  SELECT l.user_id, (l.logged_at AT TIME ZONE COALESCE(u.timezone, default_tz))::date,
+         SUM(l.amount_ml), COUNT(*)
+  FROM water_logs_all l
+  JOIN users u ON u.id = l.user_id
+  WHERE target IS NULL OR l.user_id = target
+  GROUP BY 1, 2;
+  GET DIAGNOSTICS rebuilt = ROW_COUNT;
+
+  PERFORM rebuild_leaderboard(target);
+  RETURN rebuilt;
+END;
+$$;
@@ -0,0 +1,37 @@
+-- ensure_water_logs_partitions() creates one table per month in the span it
+-- is given. Refuse spans longer than 120 months so that a bad timestamp
+-- (year 9999, the epoch) cannot make a single call create thousands of
+-- partitions; larger backfills can call it once per decade.
+CREATE OR REPLACE FUNCTION ensure_water_logs_partitions(from_ts timestamptz, to_ts timestamptz)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  max_months constant integer := 120;
+  cur_month date := date_trunc('month', from_ts AT TIME ZONE 'UTC')::date;
+  last_month date := date_trunc('month', to_ts AT TIME ZONE 'UTC')::date;
+  live_from date := water_logs_live_from();
+  partition_name text;
+  created integer := 0;
+BEGIN
+  IF last_month >= cur_month + make_interval(months => max_months) THEN
+    RAISE EXCEPTION 'Refusing to create water_logs partitions for more than % months (% to %)',
+      max_months, cur_month, last_month
+      USING ERRCODE = 'program_limit_exceeded';
+  END IF;
+
+  WHILE cur_month <= last_month LOOP
+    partition_name := format('water_logs_y%sm%s', to_char(cur_month, 'YYYY'), to_char(cur_month, 'MM'));
+    IF cur_month >= live_from AND to_regclass(partition_name) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF water_logs FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        cur_month::timestamp AT TIME ZONE 'UTC',
+        (cur_month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+      );
+      created := created + 1;
+    END IF;
+    cur_month := (cur_month + interval '1 month')::date;
+  END LOOP;
+  RETURN created;
+END;
+$$;
@@ -0,0 +1,5 @@
+-- Only logs written by POST /api/water-logs may absorb the single logs that
+-- follow them within the coalescing window. Batch-ingested logs carry a
+-- client timestamp that can fall inside that window too, but keep their
+-- own amount.
+ALTER TABLE water_logs ADD COLUMN IF NOT EXISTS coalescible boolean NOT NULL DEFAULT false;
@@ -0,0 +1,468 @@
+// SQL issued by the API route. Kept in one module so that
+// scripts/explain-check.mjs plans exactly the statements the app runs.
+
+// $1 names, $2 daily goals
+export const SEED_USERS = `
+  INSERT INTO users (name, daily_goal_ml)
+  SELECT * FROM unnest($1::text[], $2::int[])
+  ON CONFLICT (name) DO NOTHING
+  RETURNING id
+`;
+
+export const COUNT_NAMED_USERS = 'SELECT COUNT(*) as count FROM users WHERE name = ANY($1::text[])';
+
+export const LIST_USERS = 'SELECT * FROM users ORDER BY created_at DESC';
+
+export const GET_USER = 'SELECT * FROM users WHERE id = $1';
+
+// Amount and time of one user's logs in [from, to): live partitions plus any
+// archived months the window reaches
+function userLogsBetween(user, from, to) {
+  return `(
+      SELECT amount_ml, logged_at FROM water_logs
+      WHERE user_id = ${user} AND logged_at >= ${from} AND logged_at < ${to}
+      UNION ALL
+      SELECT l.amount_ml, l.logged_at
+      FROM water_logs_archive a
+      CROSS JOIN LATERAL unnest(a.amounts, a.logged_ats) AS l(amount_ml, logged_at)
+      WHERE a.user_id = ${user}
+        AND a.month >= date_trunc('month', ${from} AT TIME ZONE 'UTC')::date
+        AND a.month <= (${to} AT TIME ZONE 'UTC')::date
+        AND l.logged_at >= ${from} AND l.logged_at < ${to}
+    )`;
+}
+
+// The timezone and days a per-day request covers, as CTE `w` (no row means
+// no user). Days are calendar days in the requested timezone, or the user's
+// own (ROLLUP_TIMEZONE when unset); only the user's own matches the days of
+// daily_intake. Without dates the window is the last $6 days up to today.
+// $1 user, $2/$3 first/last day (inclusive) or NULL, $4 timezone or NULL,
+// $5 rollup timezone, $6 days
+const REQUEST_WINDOW = `
+  w AS MATERIALIZED (
+    SELECT tz, rolled_up, today,
+           COALESCE($2::date, today - ($6::int - 1)) AS first_day,
+           COALESCE($3::date, today) AS last_day
+    FROM (
+      SELECT COALESCE($4, u.timezone, $5) AS tz,
+             COALESCE($4, u.timezone, $5) = COALESCE(u.timezone, $5) AS rolled_up,
+             (NOW() AT TIME ZONE COALESCE($4, u.timezone, $5))::date AS today
+      FROM users u
+      WHERE u.id = $1
+    ) zone
+  )`;
+
+// Per-day totals over the window in `w`, one row per day including empty
+// ones. Days in the user's own timezone come straight from daily_intake;
+// any other timezone groups the raw logs between the window's local
+// midnights. Only one of the two branches runs.
+const WINDOW_TOTALS = `
+  WITH totals AS (
+    SELECT day, total_ml, log_count
+    FROM daily_intake
+    WHERE user_id = $1
+      AND day >= (SELECT first_day FROM w) AND day <= (SELECT last_day FROM w)
+      AND (SELECT rolled_up FROM w)
+    UNION ALL
+    SELECT (logged_at AT TIME ZONE (SELECT tz FROM w))::date, SUM(amount_ml), COUNT(*)
+    FROM ${userLogsBetween(
+      '$1',
+      '((SELECT first_day FROM w)::timestamp AT TIME ZONE (SELECT tz FROM w))',
+      '(((SELECT last_day FROM w) + 1)::timestamp AT TIME ZONE (SELECT tz FROM w))'
+    )} logs
+    WHERE NOT (SELECT rolled_up FROM w)
+    GROUP BY 1
+  )
+  SELECT to_char(d.day, 'YYYY-MM-DD') AS day,
+         COALESCE(t.total_ml, 0) AS total_ml,
+         COALESCE(t.log_count, 0) AS log_count
+  FROM w
+  CROSS JOIN generate_series(w.first_day::timestamp, w.last_day::timestamp, interval '1 day') AS d(day)
+  LEFT JOIN totals t ON t.day = d.day::date
+  ORDER BY d.day
+`;
+
+// No rows means no user. Parameters as for REQUEST_WINDOW.
+export const DAILY_TOTALS = `
+  WITH ${REQUEST_WINDOW}
+  SELECT * FROM (${WINDOW_TOTALS}) days
+`;
+
+// Everything the user detail page needs in one round trip: the user row,
+// today's total and the chart window as a JSON array. Today's total reads
+// only the current partition when it has to come from the raw logs. No row
+// means no user. Parameters as for REQUEST_WINDOW.
+export const BOOTSTRAP = `
+  WITH ${REQUEST_WINDOW},
+  days AS (${WINDOW_TOTALS})
+  SELECT u.*,
+         w.tz AS day_timezone,
+         CASE WHEN w.rolled_up THEN (
+           SELECT COALESCE(SUM(total_ml), 0) FROM daily_intake
+           WHERE user_id = $1 AND day = w.today
+         ) ELSE (
+           SELECT COALESCE(SUM(amount_ml), 0) FROM water_logs
+           WHERE user_id = $1
+             AND logged_at >= (w.today::timestamp AT TIME ZONE w.tz)
+             AND logged_at < ((w.today + 1)::timestamp AT TIME ZONE w.tz)
+         ) END AS today_intake,
+         (SELECT COALESCE(json_agg(json_build_object(
+                   'day', days.day,
+                   'totalMl', days.total_ml,
+                   'logCount', days.log_count
+                 ) ORDER BY days.day), '[]')
+          FROM days) AS days
+  FROM users u
+  CROSS JOIN w
+  WHERE u.id = $1
+`;
+
+// Each user's total for today in their own timezone
+// $1 rollup timezone (for users without one)
+export const TODAY_INTAKE = `
+  SELECT u.*, COALESCE(d.total_ml, 0) as today_intake
+  FROM users u
+  LEFT JOIN daily_intake d ON d.user_id = u.id
+    AND d.day = (NOW() AT TIME ZONE COALESCE(u.timezone, $1))::date
+  ORDER BY u.created_at DESC
+`;
+
+// Serializes a user's single-log writes (two-key form, so it cannot collide
+// with the migration lock). $1 user
+export const LOCK_USER_WRITES = 'SELECT pg_advisory_xact_lock(72460114, hashtext($1::text))';
+
+// Log water, merging into the user's most recent log when that was written
+// by this statement within the coalescing window on the same day (batch
+// ingested logs are never merge targets). A merge adds to the
+// existing row and its rollup total without adding a row. Days are in the
+// user's timezone, read under a share lock so that a timezone change (which
+// re-buckets the user's rollups) cannot interleave. Run under
+// LOCK_USER_WRITES.
+// $1 user, $2 amount, $3 rollup timezone (for users without one),
+// $4 events channel, $5 coalescing window in ms (0 disables), $6 id for a new row
+export const LOG_WATER_COALESCED = `
+  WITH zone AS (
+    SELECT COALESCE(timezone, $3) AS tz FROM users WHERE id = $1 FOR SHARE
+  ), target AS (
+    SELECT id, logged_at FROM water_logs
+    WHERE $5::int > 0
+      AND user_id = $1
+      AND coalescible
+      AND logged_at > NOW() - $5::int * interval '1 millisecond'
+      AND logged_at <= NOW()
+      AND (logged_at AT TIME ZONE (SELECT tz FROM zone))::date = (NOW() AT TIME ZONE (SELECT tz FROM zone))::date
+    ORDER BY logged_at DESC, id DESC
+    LIMIT 1
+  ), merged AS (
+    UPDATE water_logs w SET amount_ml = w.amount_ml + $2
+    FROM target
+    WHERE w.id = target.id AND w.logged_at = target.logged_at
+    RETURNING w.*
+  ), inserted AS (
+    INSERT INTO water_logs (id, user_id, amount_ml, logged_at, coalescible)
+    SELECT $6, $1, $2, NOW(), true
+    WHERE NOT EXISTS (SELECT 1 FROM target)
+    RETURNING *
+  ), log AS (
+    SELECT *, true AS coalesced FROM merged
+    UNION ALL
+    SELECT *, false AS coalesced FROM inserted
+  ), rollup AS (
+    INSERT INTO daily_intake (user_id, day, total_ml, log_count)
+    SELECT user_id, (logged_at AT TIME ZONE (SELECT tz FROM zone))::date, $2, CASE WHEN coalesced THEN 0 ELSE 1 END
+    FROM log
+    ON CONFLICT (user_id, day) DO UPDATE
+      SET total_ml = daily_intake.total_ml + EXCLUDED.total_ml,
+          log_count = daily_intake.log_count + EXCLUDED.log_count
+    RETURNING user_id, day, total_ml
+  )
+  SELECT log.*, to_char(rollup.day, 'YYYY-MM-DD') AS rollup_day, pg_notify($4, json_build_object(
+    'type', 'intake',
+    'userId', log.user_id,
+    'logId', log.id,
+    'amountMl', $2::int,
+    'day', rollup.day,
+    'today', rollup.day = (NOW() AT TIME ZONE (SELECT tz FROM zone))::date,
+    'totalMl', rollup.total_ml
+  )::text)
+  FROM log JOIN rollup ON rollup.user_id = log.user_id
+`;
+
+// $1 user, $2 key
+export const FIND_IDEMPOTENCY_KEY = `
+  SELECT k.log_id, w.user_id, w.amount_ml, w.logged_at
+  FROM water_log_idempotency_keys k
+  LEFT JOIN water_logs w ON w.id = k.log_id AND w.user_id = k.user_id
+  WHERE k.user_id = $1 AND k.idempotency_key = $2
+`;
+
+// Claims nothing (no row returned) when the key is already taken, including
+// by a batch that committed it concurrently. $1 user, $2 key, $3 log
+export const CLAIM_IDEMPOTENCY_KEY = `
+  INSERT INTO water_log_idempotency_keys (user_id, idempotency_key, log_id)
+  VALUES ($1, $2, $3)
+  ON CONFLICT (user_id, idempotency_key) DO NOTHING
+  RETURNING log_id
+`;
+
+// Point a claimed key at the log its write was merged into. $1 user, $2 key, $3 log
+export const REPOINT_IDEMPOTENCY_KEY = `
+  UPDATE water_log_idempotency_keys SET log_id = $3
+  WHERE user_id = $1 AND idempotency_key = $2
+`;
+
+// Streaks are measured against the current goal, so they are recomputed
+// while the user row is still locked by the update.
+// $1 goal, $2 user, $3 events channel
+export const UPDATE_USER_GOAL = `
+  WITH updated AS (
+    UPDATE users SET daily_goal_ml = $1 WHERE id = $2 RETURNING *
+  )
+  SELECT updated.*, pg_notify($3, json_build_object(
+    'type', 'goal',
+    'userId', updated.id,
+    'dailyGoal', updated.daily_goal_ml
+  )::text), refresh_user_streak(updated.id, updated.daily_goal_ml)
+  FROM updated
+`;
+
+// A user's days move with their timezone, so REBUILD_USER_DAILY_INTAKE
+// follows in the same transaction when timezone_changed, once the update has
+// locked the user row against concurrent writes. Setting the timezone the user
+// already has writes nothing and sends no event: the row comes back (locked)
+// with timezone_changed = false, so the caller can skip the rebuild.
+// $1 timezone (NULL: rollup timezone), $2 user, $3 rollup timezone, $4 events channel
+export const UPDATE_USER_TIMEZONE = `
+  WITH target AS (
+    SELECT id, timezone FROM users WHERE id = $2 FOR UPDATE
+  ),
+  updated AS (
+    UPDATE users SET timezone = $1
+    FROM target
+    WHERE users.id = target.id AND target.timezone IS DISTINCT FROM $1
+    RETURNING users.id, pg_notify($4, json_build_object(
+      'type', 'timezone',
+      'userId', users.id,
+      'timezone', COALESCE(users.timezone, $3)
+    )::text)
+  )
+  SELECT target.id, updated.id IS NOT NULL AS timezone_changed
+  FROM target LEFT JOIN updated USING (id)
+`;
+
+// $1 user, $2 rollup timezone (for users without one)
+export const REBUILD_USER_DAILY_INTAKE = 'SELECT rebuild_daily_intake($1, $2)';
+
+// Fold rollup changes into weekly_intake and user_streaks; run in the
+// writing transaction after the daily_intake upsert.
+// $1 users, $2 rollup days, $3 ml added to each
+export const APPLY_INTAKE_PROGRESS = 'SELECT apply_intake_progress($1::uuid[], $2::date[], $3::bigint[])';
+
+// Every user ranked for one week. Without a week each user is ranked by
+// their own current week: weekly_intake is keyed by weeks of the user's
+// timezone, so near a week boundary users elsewhere are already (or still)
+// in a different one. The current streak only counts while its last day is
+// today or yesterday in the user's timezone.
+// $1 week (Monday), or NULL for each user's current week,
+// $2 rollup timezone (for users without one), $3 limit
+function leaderboardQuery(order) {
+  return `
+  WITH board AS (
+    SELECT u.id, u.name, u.daily_goal_ml, to_char(local.week, 'YYYY-MM-DD') AS week,
+           COALESCE(w.total_ml, 0) AS week_total_ml,
+           CASE WHEN s.last_met_day >= local.today - 1
+                THEN s.last_met_day - s.current_start + 1
+                ELSE 0 END AS current_streak,
+           COALESCE(s.longest_streak, 0) AS longest_streak
+    FROM users u
+    CROSS JOIN LATERAL (
+      SELECT now_local::date AS today, COALESCE($1::date, date_trunc('week', now_local)::date) AS week
+      FROM (SELECT NOW() AT TIME ZONE COALESCE(u.timezone, $2) AS now_local) AS clock
+    ) AS local
+    -- Every user's current week is within a week of the UTC one, which keeps
+    -- this a range scan of weekly_intake_week_idx
+    LEFT JOIN weekly_intake w ON w.user_id = u.id AND w.week = local.week
+      AND w.week BETWEEN COALESCE($1::date, date_trunc('week', NOW() AT TIME ZONE 'UTC')::date - 7)
+                     AND COALESCE($1::date, date_trunc('week', NOW() AT TIME ZONE 'UTC')::date + 7)
+    LEFT JOIN user_streaks s ON s.user_id = u.id
+  )
+  SELECT *, RANK() OVER (ORDER BY ${order}) AS rank
+  FROM board
+  ORDER BY rank, name
+  LIMIT $3
+`;
+}
+
+export const LEADERBOARD_BY_TOTAL = leaderboardQuery('week_total_ml DESC');
+
+export const LEADERBOARD_BY_STREAK = leaderboardQuery('current_streak DESC, longest_streak DESC');
+
+export const FIND_USERS = 'SELECT id FROM users WHERE id = ANY($1::uuid[])';
+
+export const CLAIM_IDEMPOTENCY_KEYS = `
+  INSERT INTO water_log_idempotency_keys (user_id, idempotency_key, log_id)
+  SELECT * FROM unnest($1::uuid[], $2::text[], $3::uuid[])
+  ON CONFLICT (user_id, idempotency_key) DO NOTHING
+  RETURNING log_id
+`;
+
+export const FIND_IDEMPOTENCY_KEYS = `
+  SELECT k.user_id, k.idempotency_key, k.log_id
+  FROM water_log_idempotency_keys k
+  JOIN unnest($1::uuid[], $2::text[]) AS v(user_id, idempotency_key)
+    ON k.user_id = v.user_id AND k.idempotency_key = v.idempotency_key
+`;
+
+// One multi-row insert for the logs, one upsert per touched user-day and one
+// live event per user-day. Days are in each user's timezone, read under a
+// share lock as in LOG_WATER_COALESCED. Returns each touched user-day and
+// the ml added.
+// $1 ids, $2 users, $3 amounts, $4 timestamps (null = now),
+// $5 rollup timezone (for users without one), $6 events channel
+export const INSERT_WATER_LOG_BATCH = `
+  WITH zone AS (
+    SELECT id AS user_id, COALESCE(timezone, $5) AS tz
+    FROM users
+    WHERE id = ANY($2::uuid[])
+    FOR SHARE
+  ), log AS (
+    INSERT INTO water_logs (id, user_id, amount_ml, logged_at)
+    SELECT id, user_id, amount_ml, COALESCE(logged_at, NOW())
+    FROM unnest($1::uuid[], $2::uuid[], $3::int[], $4::timestamptz[])
+      AS v(id, user_id, amount_ml, logged_at)
+    RETURNING user_id, amount_ml, logged_at
+  ), added AS (
+    SELECT user_id, (logged_at AT TIME ZONE zone.tz)::date AS day, zone.tz,
+           SUM(amount_ml) AS total_ml, COUNT(*) AS log_count
+    FROM log JOIN zone USING (user_id)
+    GROUP BY 1, 2, 3
+  ), rollup AS (
+    -- Rows are upserted in key order, as apply_intake_progress does, so
+    -- concurrent batches touching the same days cannot deadlock
+    INSERT INTO daily_intake (user_id, day, total_ml, log_count)
+    SELECT user_id, day, total_ml, log_count FROM added
+    ORDER BY user_id, day
+    ON CONFLICT (user_id, day) DO UPDATE
+      SET total_ml = daily_intake.total_ml + EXCLUDED.total_ml,
+          log_count = daily_intake.log_count + EXCLUDED.log_count
+    RETURNING user_id, day, total_ml
+  )
+  SELECT rollup.user_id, to_char(rollup.day, 'YYYY-MM-DD') AS day, added.total_ml AS added_ml,
+         pg_notify($6, json_build_object(
+           'type', 'intake',
+           'userId', rollup.user_id,
+           'amountMl', added.total_ml,
+           'day', rollup.day,
+           'today', rollup.day = (NOW() AT TIME ZONE added.tz)::date,
+           'totalMl', rollup.total_ml
+         )::text)
+  FROM rollup JOIN added USING (user_id, day)
+`;
+
+// $1 first, $2 last timestamp to cover
+export const ENSURE_WATER_LOG_PARTITIONS = 'SELECT ensure_water_logs_partitions($1, $2) AS created';
+
+// Positions (1-based) of the timestamps in $1 that fall in archived months
+export const FIND_ARCHIVED_TIMESTAMPS = `
+  SELECT v.position
+  FROM unnest($1::timestamptz[]) WITH ORDINALITY AS v(logged_at, position)
+  WHERE v.logged_at < (water_logs_live_from()::timestamp AT TIME ZONE 'UTC')
+`;
+
+// Replica routing (lib/replica.js): how far the primary has inserted WAL,
+// which covers asynchronously committed transactions not yet written, and
+// how far a standby has replayed it (NULL on a server that is not a standby)
+export const CURRENT_WAL_LSN = `
+  SELECT pg_current_wal_insert_lsn()::text AS lsn,
+         current_setting('wal_block_size')::int AS block_size,
+         pg_size_bytes(current_setting('wal_segment_size')) AS segment_size
+`;
+
+export const REPLAYED_WAL_LSN = 'SELECT pg_last_wal_replay_lsn()::text AS lsn';
+
+// Water log listing, newest first. Every optional filter adds a predicate;
+// `cursor` continues after the last row of the previous page and `limit`
+// is omitted for streaming exports.
+//
+// Archived months are all older than the live partitions, so a page only
+// reads water_logs_archive once the live rows run out before `limit`.
+export function buildWaterLogsQuery({ userId, startDate, endDate, cursor, limit } = {}) {
+  const params = [];
+  const live = [];
+  const archived = [];
+  const param = (value) => {
+    params.push(value);
+    return `$${params.length}`;
+  };
+
+  if (userId) {
+    const user = param(userId);
+    live.push(`user_id = ${user}`);
+    archived.push(`a.user_id = ${user}`);
+  }
+
+  if (startDate) {
+    const start = param(startDate);
+    live.push(`logged_at >= ${start}`);
+    archived.push(
+      `a.month >= date_trunc('month', ${start}::timestamptz AT TIME ZONE 'UTC')::date`,
+      `l.logged_at >= ${start}`
+    );
+  }
+
+  if (endDate) {
+    const end = param(endDate);
+    live.push(`logged_at <= ${end}`);
+    archived.push(
+      `a.month <= (${end}::timestamptz AT TIME ZONE 'UTC')::date`,
+      `l.logged_at <= ${end}`
+    );
+  }
+
+  if (cursor) {
+    const at = param(cursor.loggedAt);
+    const id = param(cursor.id);
+    live.push(`(logged_at, id) < (${at}::timestamptz, ${id})`);
+    archived.push(
+      `a.month <= (${at}::timestamptz AT TIME ZONE 'UTC')::date`,
+      `(l.logged_at, l.id) < (${at}::timestamptz, ${id})`
+    );
+  }
+
+  const where = (conditions) => conditions.length > 0 ? ` WHERE ${conditions.join(' AND ')}` : '';
+  const liveQuery = `SELECT id, user_id, amount_ml, logged_at FROM water_logs${where(live)}`;
+  const archiveQuery = (conditions) => `
+    SELECT l.id, a.user_id, l.amount_ml, l.logged_at
+    FROM water_logs_archive a
+    CROSS JOIN LATERAL unnest(a.ids, a.amounts, a.logged_ats) AS l(id, amount_ml, logged_at)${where(conditions)}`;
+  const order = 'ORDER BY logged_at DESC, id DESC';
+
+  if (!limit) {
+    const text = `
+      SELECT *, logged_at::text AS logged_at_key FROM (
+        ${liveQuery}
+        UNION ALL
+        ${archiveQuery(archived)}
+      ) logs
+      ${order}`;
+    return { text, params };
+  }
+
+  const max = param(limit);
+  const text = `
+    WITH live AS (
+      ${liveQuery}
+      ${order}
+      LIMIT ${max}
+    )
+    SELECT *, logged_at::text AS logged_at_key FROM (
+      SELECT * FROM live
+      UNION ALL
+      (${archiveQuery([...archived, `(SELECT COUNT(*) FROM live) < ${max}`])}
+       ORDER BY l.logged_at DESC, l.id DESC
+       LIMIT ${max})
+    ) logs
+    ${order}
+    LIMIT ${max}`;
+  return { text, params };
+}
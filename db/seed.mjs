@@ -0,0 +1,22 @@
+import { COUNT_NAMED_USERS, SEED_USERS } from './queries.mjs';
+
+export const DEFAULT_USERS = [
+  { name: 'Nikhil', dailyGoal: 3000 },
+  { name: 'Karthik', dailyGoal: 3000 },
+  { name: 'Prabhath', dailyGoal: 3000 },
+  { name: 'Samson', dailyGoal: 3000 },
+  { name: 'Chakri', dailyGoal: 3000 },
+  { name: 'Praveen', dailyGoal: 3000 },
+];
+
+// Create any missing default users in one statement. The unique index on
+// users.name makes this safe to run concurrently and on every startup.
+// Returns how many users were inserted and how many defaults now exist.
+export async function seedDefaultUsers(db) {
+  const names = DEFAULT_USERS.map(user => user.name);
+  const inserted = await db.query(SEED_USERS, [names, DEFAULT_USERS.map(user => user.dailyGoal)]);
+  // Counted separately: rows committed by a concurrent seed are not
+  // visible within the INSERT's own snapshot
+  const existing = await db.query(COUNT_NAMED_USERS, [names]);
+  return { inserted: inserted.rowCount, count: parseInt(existing.rows[0].count) };
+}
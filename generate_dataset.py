@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Synthetic Water Tracker Dataset Generator
+Creates users with years of realistic intake logs and bulk-loads them into
+Postgres with COPY. Generated users are named "synthetic-<n>" so they can be
+removed again with --reset without touching real data.
+
+Usage:
+    python generate_dataset.py --users 500 --years 2
+    python generate_dataset.py --reset
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import psycopg
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SYNTHETIC_PREFIX = 'synthetic-'
+ROLLUP_TIMEZONE = os.getenv('ROLLUP_TIMEZONE', 'UTC')
+COPY_CHUNK_BYTES = 1 << 20
+
+# Relative likelihood of drinking in each hour of the day (meals and
+# mid-morning/afternoon peaks, nothing overnight)
+HOURLY_WEIGHTS = [
+    0, 0, 0, 0, 0, 0.2, 0.6, 1.4, 1.8, 1.2, 1.0, 1.1,
+    1.7, 1.3, 1.0, 1.1, 1.2, 1.0, 1.5, 1.3, 0.9, 0.6, 0.4, 0.1,
+]
+
+
+def generate_users(count, rng):
+    """Yield (id, name, daily_goal_ml, created_at) tuples"""
+    now = datetime.now(timezone.utc)
+    for n in range(count):
+        goal = rng.choice([2000, 2500, 3000, 3000, 3500, 4000])
+        yield str(uuid.UUID(int=rng.getrandbits(128), version=4)), f"{SYNTHETIC_PREFIX}{n}", goal, now - timedelta(minutes=n)
+
+
+def generate_logs(users, start_day, end_day, rng):
+    """Yield (user_id, amount_ml, logged_at) for every user and day.
+
+    Each user has a personal adherence level; daily totals scatter around it,
+    are lower at weekends, and some days are skipped entirely. A day's total
+    is split into 50ml-rounded sips spread over waking hours.
+    """
+    hours = range(24)
+    for user_id, _, goal, _ in users:
+        adherence = rng.uniform(0.6, 1.15)
+        sip_rate = rng.uniform(4, 10)
+        day = start_day
+        while day <= end_day:
+            if rng.random() < 0.05:
+                day += timedelta(days=1)
+                continue
+            weekend_factor = 0.85 if day.weekday() >= 5 else 1.0
+            total = max(rng.gauss(goal * adherence * weekend_factor, goal * 0.2), 100)
+            sips = max(1, int(rng.expovariate(1 / sip_rate)) + 1)
+            remaining = total
+            midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+            for i in range(sips):
+                if i == sips - 1:
+                    amount = remaining
+                else:
+                    amount = remaining * rng.uniform(0.5, 1.5) / (sips - i)
+                amount = max(50, int(round(amount / 50.0)) * 50)
+                remaining = max(remaining - amount, 0)
+                hour = rng.choices(hours, weights=HOURLY_WEIGHTS)[0]
+                logged_at = midnight + timedelta(hours=hour, seconds=rng.randrange(3600))
+                yield user_id, amount, logged_at
+                if remaining <= 0:
+                    break
+            day += timedelta(days=1)
+
+
+def copy_rows(cursor, table, columns, rows):
+    """COPY rows (tuples) into table as CSV; returns the number of rows.
+    Rows are streamed in chunks of about COPY_CHUNK_BYTES, so the whole
+    dataset is never materialized"""
+    count = 0
+    chunk = []
+    size = 0
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)") as copy:
+        for row in rows:
+            count += 1
+            line = ','.join(value.isoformat() if isinstance(value, datetime) else str(value) for value in row) + '\n'
+            chunk.append(line)
+            size += len(line)
+            if size >= COPY_CHUNK_BYTES:
+                copy.write(''.join(chunk))
+                chunk.clear()
+                size = 0
+        if chunk:
+            copy.write(''.join(chunk))
+    return count
+
+
+def reset(conn):
+    """Delete every synthetic user (logs and rollups cascade)"""
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM users WHERE name LIKE %s", (f"{SYNTHETIC_PREFIX}%",))
+        deleted = cursor.rowcount
+    conn.commit()
+    return deleted
+
+
+def generate(conn, users, years, seed=None):
+    """Load `users` synthetic users with `years` of history; returns counts"""
+    rng = random.Random(seed)
+    end_day = date.today()
+    start_day = end_day - timedelta(days=math.ceil(365 * years) - 1)
+
+    user_rows = list(generate_users(users, rng))
+    with conn.cursor() as cursor:
+        # water_logs is partitioned by month; COPY needs every month to exist
+        cursor.execute(
+            "SELECT ensure_water_logs_partitions(%s, %s)",
+            (datetime(start_day.year, start_day.month, 1, tzinfo=timezone.utc),
+             datetime(end_day.year, end_day.month, end_day.day, 23, 59, 59, tzinfo=timezone.utc)),
+        )
+        copy_rows(cursor, 'users', ['id', 'name', 'daily_goal_ml', 'created_at'], user_rows)
+        log_count = copy_rows(
+            cursor, 'water_logs', ['user_id', 'amount_ml', 'logged_at'],
+            generate_logs(user_rows, start_day, end_day, rng),
+        )
+        # COPY bypasses the API, so build the rollup for the new users here,
+        # then the leaderboard state (weekly_intake, user_streaks) derived from it
+        user_ids = [row[0] for row in user_rows]
+        cursor.execute("""
+            INSERT INTO daily_intake (user_id, day, total_ml, log_count)
+            SELECT w.user_id, (w.logged_at AT TIME ZONE %s)::date, SUM(w.amount_ml), COUNT(*)
+            FROM water_logs w
+            WHERE w.user_id = ANY(%s::uuid[])
+            GROUP BY 1, 2
+        """, (ROLLUP_TIMEZONE, user_ids))
+        cursor.execute("SELECT rebuild_leaderboard(id) FROM unnest(%s::uuid[]) AS id", (user_ids,))
+    conn.commit()
+
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("ANALYZE users, water_logs, daily_intake, weekly_intake, user_streaks")
+    conn.autocommit = False
+
+    return {'users': users, 'logs': log_count, 'days': (end_day - start_day).days + 1}
+
+
+def connect(database_url=None):
+    return psycopg.connect(database_url or os.environ['DATABASE_URL'])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, help='number of synthetic users (default 100, or none with --reset)')
+    parser.add_argument('--years', type=float, default=1.0, help='years of history per user')
+    parser.add_argument('--seed', type=int, help='random seed for a reproducible dataset')
+    parser.add_argument('--reset', action='store_true', help='delete existing synthetic users first')
+    parser.add_argument('--database-url', help='defaults to $DATABASE_URL')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = connect(args.database_url)
+    try:
+        if args.reset:
+            print(f"🧹 Removed {reset(conn)} synthetic users")
+            if args.users is None:
+                return
+        started = time.perf_counter()
+        counts = generate(conn, 100 if args.users is None else args.users, args.years, seed=args.seed)
+        elapsed = time.perf_counter() - started
+        print(f"✅ Loaded {counts['users']} users and {counts['logs']} logs "
+              f"over {counts['days']} days in {elapsed:.1f}s ({counts['logs'] / elapsed:,.0f} logs/s)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
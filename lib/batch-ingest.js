@@ -0,0 +1,222 @@
+import { randomUUID } from 'crypto';
+import { statement } from '@/lib/db';
+import { recordIntakeProgress } from '@/lib/leaderboard';
+import {
+  CLAIM_IDEMPOTENCY_KEYS,
+  FIND_ARCHIVED_TIMESTAMPS,
+  FIND_IDEMPOTENCY_KEYS,
+  FIND_USERS,
+  INSERT_WATER_LOG_BATCH,
+} from '@/db/queries.mjs';
+
+export const MAX_BATCH_SIZE = 5000;
+export const MAX_IDEMPOTENCY_KEY_LENGTH = 200;
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+// water_logs.amount_ml is an int4
+export const MAX_AMOUNT_ML = 2147483647;
+// Client timestamps are accepted this far back and ahead of now. The window
+// also bounds the partitions a request can make the database create.
+export const MAX_LOG_AGE_DAYS = 730;
+const MAX_LOG_LEAD_MS = 86400000;
+// Date, time and UTC offset are required; seconds and fractions are optional
+const ISO_TIMESTAMP_PATTERN =
+  /^(\d{4}-\d{2}-\d{2})T([01]\d|2[0-3]):[0-5]\d(:[0-5]\d(\.\d{1,6})?)?(Z|[+-]([01]\d|2[0-3]):[0-5]\d)$/;
+
+export class BatchError extends Error {
+  constructor(message, status = 400) {
+    super(message);
+    this.status = status;
+  }
+}
+
+// Accepts a JSON array, a `{ "logs": [...] }` object or an NDJSON body
+export function parseBatchBody(text, contentType = '') {
+  let items;
+  try {
+    if (contentType.includes('ndjson')) {
+      items = text.split('\n').filter(line => line.trim()).map(line => JSON.parse(line));
+    } else {
+      const parsed = JSON.parse(text);
+      items = Array.isArray(parsed) ? parsed : parsed?.logs;
+    }
+  } catch {
+    throw new BatchError('Body must be a JSON array or NDJSON');
+  }
+
+  if (!Array.isArray(items) || items.length === 0) {
+    throw new BatchError('At least one log is required');
+  }
+  if (items.length > MAX_BATCH_SIZE) {
+    throw new BatchError(`A batch may contain at most ${MAX_BATCH_SIZE} logs`, 413);
+  }
+  return items;
+}
+
+// A JSON number or string of digits as a positive int4 amount in ml; null
+// when it is anything else
+export function parseAmount(value) {
+  const amount = typeof value === 'string' && /^\d+$/.test(value) ? Number(value) : value;
+  return Number.isInteger(amount) && amount > 0 && amount <= MAX_AMOUNT_ML ? amount : null;
+}
+
+// An ISO 8601 timestamp with a UTC offset on a real calendar date, which
+// Postgres reads exactly as JavaScript does; null when it is anything else
+export function parseTimestamp(value) {
+  const match = typeof value === 'string' && ISO_TIMESTAMP_PATTERN.exec(value);
+  if (!match) return null;
+  const day = new Date(`${match[1]}T00:00:00Z`);
+  // Postgres has no year 0
+  if (match[1] < '0001' || Number.isNaN(day.getTime()) || !day.toISOString().startsWith(match[1])) {
+    return null;
+  }
+  return value;
+}
+
+// [from, to] in ms of the logged-at times a client may send
+export function loggedAtWindow(now = Date.now()) {
+  return { from: now - MAX_LOG_AGE_DAYS * 86400000, to: now + MAX_LOG_LEAD_MS };
+}
+
+// Check an item and normalize it into the values that are inserted:
+// returns { log } or { error }
+function normalizeItem(item) {
+  if (!item || typeof item !== 'object') return { error: 'Log must be an object' };
+  const { userId, idempotencyKey } = item;
+  if (typeof userId !== 'string' || !UUID_PATTERN.test(userId)) return { error: 'userId is required' };
+  const amount = parseAmount(item.amount);
+  if (amount === null) return { error: `amount must be an integer between 1 and ${MAX_AMOUNT_ML}` };
+  let loggedAt = null;
+  if (item.loggedAt !== undefined && item.loggedAt !== null) {
+    loggedAt = parseTimestamp(item.loggedAt);
+    if (loggedAt === null) return { error: 'loggedAt must be an ISO 8601 timestamp with a UTC offset' };
+    const { from, to } = loggedAtWindow();
+    const time = Date.parse(loggedAt);
+    if (time < from || time > to) {
+      return { error: `loggedAt must be within the last ${MAX_LOG_AGE_DAYS} days and at most a day ahead` };
+    }
+  }
+  if (idempotencyKey !== undefined && idempotencyKey !== null &&
+      (typeof idempotencyKey !== 'string' || idempotencyKey.length === 0 ||
+       idempotencyKey.length > MAX_IDEMPOTENCY_KEY_LENGTH)) {
+    return { error: `idempotencyKey must be a string of at most ${MAX_IDEMPOTENCY_KEY_LENGTH} characters` };
+  }
+  return { log: { userId, amount, loggedAt, idempotencyKey: idempotencyKey || null } };
+}
+
+// Insert a batch of logs inside the caller's transaction. Every item gets a
+// result in input order: `created` (with the new id), `duplicate` (with the
+// id of the log that already owns its idempotency key) or `rejected`.
+export async function ingestBatch(client, rawItems, { rollupTimeZone, eventsChannel }) {
+  const normalized = rawItems.map(normalizeItem);
+  const items = normalized.map(({ log }) => log);
+  const results = normalized.map(({ error }, index) =>
+    error ? { index, status: 'rejected', error } : { index, status: 'pending' }
+  );
+
+  // Unknown users are rejected per item instead of failing the whole batch
+  const userIds = [...new Set(items.filter((_, i) => results[i].status === 'pending').map(item => item.userId))];
+  const known = await client.query(statement(FIND_USERS, [userIds]));
+  const knownUsers = new Set(known.rows.map(row => row.id));
+
+  // Archived months are read-only; logs backdated into them are rejected
+  const dated = items
+    .map((item, i) => ({ item, result: results[i] }))
+    .filter(({ item, result }) => result.status === 'pending' && item.loggedAt);
+  if (dated.length > 0) {
+    const archived = await client.query(statement(FIND_ARCHIVED_TIMESTAMPS, [
+      dated.map(({ item }) => item.loggedAt),
+    ]));
+    for (const row of archived.rows) {
+      Object.assign(dated[parseInt(row.position) - 1].result, {
+        status: 'rejected',
+        error: 'loggedAt falls in an archived month',
+      });
+    }
+  }
+
+  const keyOwners = new Map();
+  const repeats = [];
+  const accepted = [];
+  items.forEach((item, i) => {
+    const result = results[i];
+    if (result.status !== 'pending') return;
+    if (!knownUsers.has(item.userId.toLowerCase())) {
+      Object.assign(result, { status: 'rejected', error: 'User not found' });
+      return;
+    }
+    // Ids are assigned up front so results can be matched without relying
+    // on RETURNING order
+    result.id = randomUUID();
+    if (item.idempotencyKey) {
+      const ownerKey = `${item.userId.toLowerCase()}\u0000${item.idempotencyKey}`;
+      if (keyOwners.has(ownerKey)) {
+        repeats.push({ result, owner: keyOwners.get(ownerKey) });
+        return;
+      }
+      keyOwners.set(ownerKey, result);
+    }
+    accepted.push({ item, result });
+  });
+
+  // Claim idempotency keys; keys that already exist mark their item as a
+  // duplicate of the log recorded for them
+  const keyed = accepted.filter(({ item }) => item.idempotencyKey);
+  if (keyed.length > 0) {
+    const claimed = await client.query(statement(CLAIM_IDEMPOTENCY_KEYS, [
+      keyed.map(({ item }) => item.userId),
+      keyed.map(({ item }) => item.idempotencyKey),
+      keyed.map(({ result }) => result.id),
+    ]));
+    const claimedIds = new Set(claimed.rows.map(row => row.log_id));
+    const conflicts = keyed.filter(({ result }) => !claimedIds.has(result.id));
+
+    if (conflicts.length > 0) {
+      const existing = await client.query(statement(FIND_IDEMPOTENCY_KEYS, [
+        conflicts.map(({ item }) => item.userId),
+        conflicts.map(({ item }) => item.idempotencyKey),
+      ]));
+      const existingIds = new Map(
+        existing.rows.map(row => [`${row.user_id}\u0000${row.idempotency_key}`, row.log_id])
+      );
+      for (const { item, result } of conflicts) {
+        Object.assign(result, {
+          status: 'duplicate',
+          id: existingIds.get(`${item.userId.toLowerCase()}\u0000${item.idempotencyKey}`),
+        });
+      }
+    }
+  }
+
+  // Items repeating a key earlier in the batch take their owner's final id:
+  // the owner's own log, or the existing one if the key was already claimed
+  for (const { result, owner } of repeats) {
+    Object.assign(result, { status: 'duplicate', id: owner.id });
+  }
+
+  const inserts = accepted.filter(({ result }) => result.status === 'pending');
+  if (inserts.length > 0) {
+    const touched = await client.query(statement(INSERT_WATER_LOG_BATCH, [
+      inserts.map(({ result }) => result.id),
+      inserts.map(({ item }) => item.userId),
+      inserts.map(({ item }) => item.amount),
+      inserts.map(({ item }) => item.loggedAt),
+      rollupTimeZone,
+      eventsChannel,
+    ]));
+    await recordIntakeProgress(client, touched.rows.map(row => ({
+      userId: row.user_id,
+      day: row.day,
+      addedMl: row.added_ml,
+    })));
+    for (const { result } of inserts) {
+      result.status = 'created';
+    }
+  }
+
+  const summary = { created: 0, duplicate: 0, rejected: 0 };
+  for (const result of results) {
+    summary[result.status]++;
+  }
+  return { ...summary, results };
+}
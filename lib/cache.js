@@ -0,0 +1,89 @@
+import { createHash } from 'crypto';
+
+// Bounded in-process cache for serialized JSON responses. Entries expire
+// after `ttlMs` and the least recently used entry is evicted once the cache
+// holds `maxEntries`. Each entry carries a strong ETag derived from its body.
+// Every key has a generation that `invalidate` bumps: a load captures it
+// before reading and its result is only stored if no invalidation ran in
+// the meantime, so a body read before a write commits cannot outlive the
+// write's invalidation.
+export class ResponseCache {
+  constructor({ maxEntries = 500, ttlMs = 60000 } = {}) {
+    this.maxEntries = maxEntries;
+    this.ttlMs = ttlMs;
+    this.entries = new Map();
+    this.generations = new Map();
+    this.counters = {
+      hits: 0,
+      misses: 0,
+      notModified: 0,
+      evictions: 0,
+      invalidations: 0,
+      staleLoads: 0,
+    };
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry || entry.expiresAt <= Date.now()) {
+      if (entry) this.entries.delete(key);
+      this.counters.misses++;
+      return null;
+    }
+    // Re-insert so Map iteration order tracks recency
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    this.counters.hits++;
+    return entry;
+  }
+
+  // Current generation of `key`; pass it to `set` with the loaded body
+  generation(key) {
+    return this.generations.get(key) ?? 0;
+  }
+
+  // Store `body` unless `key` was invalidated since `generation` was read.
+  // Returns the entry either way so the caller can still serve it.
+  set(key, body, generation = this.generation(key)) {
+    const entry = {
+      body,
+      etag: `"${createHash('sha1').update(body).digest('base64url')}"`,
+      expiresAt: Date.now() + this.ttlMs,
+    };
+    if (generation !== this.generation(key)) {
+      this.counters.staleLoads++;
+      return entry;
+    }
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.counters.evictions++;
+    }
+    return entry;
+  }
+
+  invalidate(...keys) {
+    for (const key of keys) {
+      this.generations.set(key, this.generation(key) + 1);
+      if (this.entries.delete(key)) {
+        this.counters.invalidations++;
+      }
+    }
+  }
+
+  recordNotModified() {
+    this.counters.notModified++;
+  }
+
+  getStats() {
+    const lookups = this.counters.hits + this.counters.misses;
+    return {
+      ...this.counters,
+      size: this.entries.size,
+      maxEntries: this.maxEntries,
+      ttlMs: this.ttlMs,
+      hitRatio: lookups > 0 ? this.counters.hits / lookups : 0,
+    };
+  }
+}
@@ -0,0 +1,147 @@
+import { createHash } from 'crypto';
+import { Pool } from 'pg';
+import { recordTiming, timed } from '@/lib/metrics';
+
+// Number of recent acquire waits kept for percentiles
+const ACQUIRE_SAMPLE_SIZE = 1024;
+
+// "cached plan must not change result type"
+const STALE_PLAN_ERROR = '0A000';
+
+export const connectionConfig = {
+  connectionString: process.env.DATABASE_URL,
+  ssl: process.env.NODE_ENV === 'production' ? { rejectUnauthorized: false } : false,
+};
+
+function intFromEnv(name, fallback) {
+  const value = parseInt(process.env[name]);
+  return Number.isNaN(value) ? fallback : value;
+}
+
+// Pool sizing and timeouts. PG_POOL_ACQUIRE_TIMEOUT_MS bounds how long a
+// request waits for a free connection before failing; 0 waits forever.
+export function poolConfigFromEnv() {
+  return {
+    max: intFromEnv('PG_POOL_MAX', 10),
+    idleTimeoutMillis: intFromEnv('PG_POOL_IDLE_TIMEOUT_MS', 10000),
+    connectionTimeoutMillis: intFromEnv('PG_POOL_ACQUIRE_TIMEOUT_MS', 5000),
+  };
+}
+
+// Optional streaming replica for read-only queries, routed by lib/replica.js
+export const replicaConnectionConfig = process.env.DATABASE_REPLICA_URL
+  ? { ...connectionConfig, connectionString: process.env.DATABASE_REPLICA_URL }
+  : null;
+
+// How often the replica's replay position is checked, and how far it may
+// fall behind the primary before reads stop using it
+export function replicaConfigFromEnv() {
+  return {
+    healthIntervalMs: intFromEnv('REPLICA_HEALTH_INTERVAL_MS', 200),
+    maxLagMs: intFromEnv('REPLICA_MAX_LAG_MS', 5000),
+    probeTimeoutMs: intFromEnv('REPLICA_PROBE_TIMEOUT_MS', 1000),
+  };
+}
+
+const statementNames = new Map();
+
+// Turn SQL text into a named query so each pooled connection parses and
+// plans it once and then reuses the prepared statement. Names derive from
+// the text, so each distinct query shape gets its own statement.
+export function statement(text, values) {
+  let name = statementNames.get(text);
+  if (!name) {
+    name = `wt_${createHash('sha1').update(text).digest('hex').slice(0, 16)}`;
+    statementNames.set(text, name);
+  }
+  return { name, text, values };
+}
+
+function percentile(sorted, pct) {
+  if (sorted.length === 0) return null;
+  const rank = Math.max(Math.ceil((pct / 100) * sorted.length) - 1, 0);
+  return sorted[Math.min(rank, sorted.length - 1)];
+}
+
+// What to pass to client.release() after `error`. Errors reported by the
+// server leave the connection (and its prepared statements) usable; anything
+// else, or a prepared plan invalidated by a schema change, is returned so the
+// pool discards the connection.
+export function unusableAfter(error) {
+  return !error.code || error.code === STALE_PLAN_ERROR ? error : undefined;
+}
+
+// pg.Pool that records how long callers wait to acquire a connection.
+// `query` and `connect` behave like their pg.Pool counterparts.
+export class DatabasePool {
+  constructor(config) {
+    this.config = config;
+    this.pool = new Pool(config);
+    // An idle client losing its connection must not crash the process
+    this.pool.on('error', (error) => {
+      console.error('Idle database client error:', error);
+    });
+    this.acquire = { count: 0, totalMs: 0, maxMs: 0, timeouts: 0, errors: 0 };
+    this.samples = [];
+  }
+
+  recordAcquire(ms) {
+    this.acquire.count++;
+    this.acquire.totalMs += ms;
+    this.acquire.maxMs = Math.max(this.acquire.maxMs, ms);
+    if (this.samples.length === ACQUIRE_SAMPLE_SIZE) {
+      this.samples.shift();
+    }
+    this.samples.push(ms);
+  }
+
+  async connect() {
+    const started = performance.now();
+    try {
+      const client = await this.pool.connect();
+      const waited = performance.now() - started;
+      this.recordAcquire(waited);
+      recordTiming('acquire', waited);
+      return client;
+    } catch (error) {
+      if (/timeout/i.test(error.message)) {
+        this.acquire.timeouts++;
+      } else {
+        this.acquire.errors++;
+      }
+      throw error;
+    }
+  }
+
+  async query(text, values) {
+    const client = await this.connect();
+    try {
+      const result = await timed('db', () => client.query(text, values));
+      client.release();
+      return result;
+    } catch (error) {
+      client.release(unusableAfter(error));
+      throw error;
+    }
+  }
+
+  getStats() {
+    const sorted = [...this.samples].sort((a, b) => a - b);
+    return {
+      total: this.pool.totalCount,
+      idle: this.pool.idleCount,
+      waiting: this.pool.waitingCount,
+      max: this.config.max,
+      idleTimeoutMs: this.config.idleTimeoutMillis,
+      acquireTimeoutMs: this.config.connectionTimeoutMillis,
+      acquire: {
+        ...this.acquire,
+        meanMs: this.acquire.count > 0 ? this.acquire.totalMs / this.acquire.count : 0,
+        p50Ms: percentile(sorted, 50),
+        p95Ms: percentile(sorted, 95),
+        p99Ms: percentile(sorted, 99),
+      },
+      preparedStatements: statementNames.size,
+    };
+  }
+}
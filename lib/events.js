@@ -0,0 +1,112 @@
+import { Client } from 'pg';
+
+export const INTAKE_EVENTS_CHANNEL = 'intake_events';
+
+const RECONNECT_DELAY_MS = 5000;
+const HEARTBEAT_INTERVAL_MS = 15000;
+
+// Fans Postgres NOTIFY payloads out to in-process subscribers. Each server
+// instance holds one dedicated LISTEN connection, so an event committed by
+// any instance reaches the SSE clients and caches of every instance.
+export class IntakeEventHub {
+  constructor(clientConfig) {
+    this.clientConfig = clientConfig;
+    this.subscribers = new Set();
+    this.client = null;
+    this.connecting = null;
+  }
+
+  start() {
+    if (!this.client && !this.connecting) {
+      this.connecting = this.listen().finally(() => {
+        this.connecting = null;
+      });
+    }
+    return this.connecting;
+  }
+
+  async listen() {
+    const client = new Client(this.clientConfig);
+    client.on('notification', (message) => {
+      if (message.channel !== INTAKE_EVENTS_CHANNEL) return;
+      let event;
+      try {
+        event = JSON.parse(message.payload);
+      } catch (error) {
+        console.error('Invalid intake event payload:', message.payload);
+        return;
+      }
+      for (const subscriber of this.subscribers) {
+        subscriber(event);
+      }
+    });
+    client.on('error', (error) => {
+      console.error('Intake event listener error:', error);
+      this.reconnect(client);
+    });
+    client.on('end', () => this.reconnect(client));
+
+    try {
+      await client.connect();
+      await client.query(`LISTEN ${INTAKE_EVENTS_CHANNEL}`);
+      this.client = client;
+    } catch (error) {
+      console.error('Intake event listener failed to connect:', error);
+      this.reconnect(client);
+    }
+  }
+
+  reconnect(client) {
+    if (client.reconnecting) return;
+    client.reconnecting = true;
+    if (this.client === client) this.client = null;
+    client.end().catch(() => {});
+    setTimeout(() => this.start(), RECONNECT_DELAY_MS).unref?.();
+  }
+
+  subscribe(subscriber) {
+    this.subscribers.add(subscriber);
+    this.start();
+    return () => this.subscribers.delete(subscriber);
+  }
+
+  // Server-Sent Events stream of every event until the client disconnects
+  stream(signal) {
+    const encoder = new TextEncoder();
+    let cleanup = () => {};
+
+    return new ReadableStream({
+      start: async (controller) => {
+        const send = (chunk) => {
+          try {
+            controller.enqueue(encoder.encode(chunk));
+          } catch {
+            cleanup();
+          }
+        };
+        const unsubscribe = this.subscribe((event) => {
+          send(`event: ${event.type}\ndata: ${JSON.stringify(event)}\n\n`);
+        });
+        const heartbeat = setInterval(() => send(': ping\n\n'), HEARTBEAT_INTERVAL_MS);
+
+        cleanup = () => {
+          unsubscribe();
+          clearInterval(heartbeat);
+        };
+        signal?.addEventListener('abort', () => {
+          cleanup();
+          try {
+            controller.close();
+          } catch {
+            // Already closed
+          }
+        });
+
+        // Only acknowledge once LISTEN is active so no commit can be missed
+        await this.start();
+        send(`retry: ${RECONNECT_DELAY_MS}\n\n`);
+      },
+      cancel: () => cleanup(),
+    });
+  }
+}
@@ -0,0 +1,52 @@
+import { statement } from '@/lib/db';
+import {
+  APPLY_INTAKE_PROGRESS,
+  LEADERBOARD_BY_STREAK,
+  LEADERBOARD_BY_TOTAL,
+} from '@/db/queries.mjs';
+
+export const LEADERBOARD_ORDERS = {
+  total: LEADERBOARD_BY_TOTAL,
+  streak: LEADERBOARD_BY_STREAK,
+};
+
+// Fold freshly written rollup changes ({ userId, day, addedMl }, one per
+// user-day) into the weekly totals and streaks, inside the caller's
+// transaction
+export async function recordIntakeProgress(client, changes) {
+  if (changes.length === 0) return;
+  await client.query(statement(APPLY_INTAKE_PROGRESS, [
+    changes.map(change => change.userId),
+    changes.map(change => change.day),
+    changes.map(change => change.addedMl),
+  ]));
+}
+
+// Today's date (YYYY-MM-DD) in `timeZone`
+export function localToday(timeZone) {
+  return new Intl.DateTimeFormat('en-CA', { timeZone }).format(new Date());
+}
+
+// The Monday (YYYY-MM-DD) of the week containing `day`
+export function weekStart(day) {
+  const date = new Date(`${day}T00:00:00Z`);
+  date.setUTCDate(date.getUTCDate() - (date.getUTCDay() + 6) % 7);
+  return date.toISOString().slice(0, 10);
+}
+
+// Ranked users for the week starting `week` (null: each user's current week
+// in their timezone), read from the precomputed weekly_intake and
+// user_streaks tables
+export async function getLeaderboard(db, { week, by, limit, rollupTimeZone }) {
+  const result = await db.query(statement(LEADERBOARD_ORDERS[by], [week, rollupTimeZone, limit]));
+  return result.rows.map(row => ({
+    rank: parseInt(row.rank),
+    id: row.id,
+    name: row.name,
+    dailyGoal: row.daily_goal_ml,
+    week: row.week,
+    weekTotalMl: parseInt(row.week_total_ml) || 0,
+    currentStreak: row.current_streak,
+    longestStreak: row.longest_streak,
+  }));
+}
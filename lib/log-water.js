@@ -0,0 +1,53 @@
+import { randomUUID } from 'crypto';
+import { statement } from '@/lib/db';
+import { MAX_IDEMPOTENCY_KEY_LENGTH } from '@/lib/batch-ingest';
+import { recordIntakeProgress } from '@/lib/leaderboard';
+import {
+  CLAIM_IDEMPOTENCY_KEY,
+  FIND_IDEMPOTENCY_KEY,
+  LOCK_USER_WRITES,
+  LOG_WATER_COALESCED,
+  REPOINT_IDEMPOTENCY_KEY,
+} from '@/db/queries.mjs';
+
+// Returns an error message for an invalid Idempotency-Key, or null
+export function validateIdempotencyKey(key) {
+  if (key === undefined || key === null) return null;
+  if (typeof key !== 'string' || key.length === 0 || key.length > MAX_IDEMPOTENCY_KEY_LENGTH) {
+    return `Idempotency-Key must be a string of at most ${MAX_IDEMPOTENCY_KEY_LENGTH} characters`;
+  }
+  return null;
+}
+
+// Log one amount (a positive int4, see parseAmount) for a user inside the
+// caller's transaction. Writes for the same user are serialized, so a burst
+// merges into one row. The idempotency key is claimed before writing: when
+// it is already taken, by an earlier attempt or a concurrent batch, nothing
+// is added. Returns the log as it now stands and `created`, `coalesced`
+// (added to a log written less than `coalesceWindowMs` ago) or `duplicate`
+// (key already used).
+export async function logWater(client, { userId, amount, idempotencyKey },
+  { rollupTimeZone, eventsChannel, coalesceWindowMs }) {
+  await client.query(statement(LOCK_USER_WRITES, [userId]));
+
+  const id = randomUUID();
+  if (idempotencyKey) {
+    const claimed = await client.query(statement(CLAIM_IDEMPOTENCY_KEY, [userId, idempotencyKey, id]));
+    if (claimed.rows.length === 0) {
+      const existing = await client.query(statement(FIND_IDEMPOTENCY_KEY, [userId, idempotencyKey]));
+      const row = existing.rows[0];
+      return { status: 'duplicate', row: { ...row, id: row.log_id, user_id: userId } };
+    }
+  }
+
+  const result = await client.query(statement(LOG_WATER_COALESCED, [
+    userId, amount, rollupTimeZone, eventsChannel, coalesceWindowMs, id
+  ]));
+  const row = result.rows[0];
+  await recordIntakeProgress(client, [{ userId: row.user_id, day: row.rollup_day, addedMl: amount }]);
+
+  if (idempotencyKey && row.id !== id) {
+    await client.query(statement(REPOINT_IDEMPOTENCY_KEY, [userId, idempotencyKey, row.id]));
+  }
+  return { status: row.coalesced ? 'coalesced' : 'created', row };
+}
@@ -0,0 +1,154 @@
+import { AsyncLocalStorage } from 'async_hooks';
+
+// Histogram bucket upper bounds in seconds
+const BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+// Phases measured explicitly; `app` is whatever remains of the request
+const PHASES = ['acquire', 'db', 'serialize'];
+
+const requestContext = new AsyncLocalStorage();
+
+class Histogram {
+  constructor() {
+    this.counts = new Array(BUCKETS.length).fill(0);
+    this.count = 0;
+    this.sum = 0;
+  }
+
+  observe(seconds) {
+    this.count++;
+    this.sum += seconds;
+    const index = BUCKETS.findIndex(bound => seconds <= bound);
+    if (index !== -1) this.counts[index]++;
+  }
+}
+
+const ROUTES = new Set([
+  'seed', 'users', 'users/:id', 'users/:id/daily', 'users/:id/bootstrap',
+  'water-logs', 'water-logs/batch', 'today-intake', 'leaderboard', 'events',
+  'internal/stats', 'internal/metrics',
+]);
+
+// Collapse a request path to a route label with bounded cardinality
+export function routeLabel(path) {
+  const parts = path.split('/');
+  if (parts[0] === 'users' && parts.length > 1) {
+    parts[1] = ':id';
+  }
+  const route = parts.join('/');
+  return ROUTES.has(route) ? route : 'unknown';
+}
+
+// In-process latency histograms per route/method/status, plus per-phase
+// histograms for attributing time to the database versus the app
+export class RequestMetrics {
+  constructor() {
+    this.requests = new Map();
+    this.phases = new Map();
+  }
+
+  histogram(map, labels) {
+    const key = JSON.stringify(labels);
+    let entry = map.get(key);
+    if (!entry) {
+      entry = { labels, histogram: new Histogram() };
+      map.set(key, entry);
+    }
+    return entry.histogram;
+  }
+
+  record({ route, method, status, totalMs, timings }) {
+    this.histogram(this.requests, { route, method, status: String(status) }).observe(totalMs / 1000);
+    let measuredMs = 0;
+    for (const phase of PHASES) {
+      const ms = timings[phase] || 0;
+      measuredMs += ms;
+      this.histogram(this.phases, { route, method, phase }).observe(ms / 1000);
+    }
+    this.histogram(this.phases, { route, method, phase: 'app' })
+      .observe(Math.max(totalMs - measuredMs, 0) / 1000);
+  }
+
+  // Prometheus text exposition format (version 0.0.4)
+  toPrometheus(gauges = []) {
+    const lines = [];
+    const formatLabels = (labels) =>
+      Object.entries(labels).map(([key, value]) => `${key}="${String(value).replace(/["\\\n]/g, '\\$&')}"`).join(',');
+    const writeHistogram = (name, help, map) => {
+      lines.push(`# HELP ${name} ${help}`, `# TYPE ${name} histogram`);
+      for (const { labels, histogram } of map.values()) {
+        const base = formatLabels(labels);
+        let cumulative = 0;
+        BUCKETS.forEach((bound, i) => {
+          cumulative += histogram.counts[i];
+          lines.push(`${name}_bucket{${base},le="${bound}"} ${cumulative}`);
+        });
+        lines.push(`${name}_bucket{${base},le="+Inf"} ${histogram.count}`);
+        lines.push(`${name}_sum{${base}} ${histogram.sum}`);
+        lines.push(`${name}_count{${base}} ${histogram.count}`);
+      }
+    };
+
+    writeHistogram('water_tracker_http_request_duration_seconds',
+      'Time from handler entry to response headers', this.requests);
+    writeHistogram('water_tracker_http_request_phase_seconds',
+      'Time per request spent waiting for a pool connection (acquire), in queries (db), ' +
+      'serializing JSON (serialize) and elsewhere (app)', this.phases);
+
+    for (const { name, help, samples } of gauges) {
+      lines.push(`# HELP ${name} ${help}`, `# TYPE ${name} gauge`);
+      for (const { labels, value } of samples) {
+        lines.push(`${name}${labels ? `{${formatLabels(labels)}}` : ''} ${value}`);
+      }
+    }
+    return lines.join('\n') + '\n';
+  }
+}
+
+// Add `ms` to a phase of the current request, if there is one
+export function recordTiming(phase, ms) {
+  const timings = requestContext.getStore();
+  if (timings) {
+    timings[phase] = (timings[phase] || 0) + ms;
+  }
+}
+
+// Run `fn` and count its duration towards `phase` of the current request
+export async function timed(phase, fn) {
+  const started = performance.now();
+  try {
+    return await fn();
+  } finally {
+    recordTiming(phase, performance.now() - started);
+  }
+}
+
+// Wrap a route handler so every request is recorded in `metrics` and its
+// response carries a Server-Timing header with the phase breakdown
+export function instrument(metrics, method, handler) {
+  return async (request, context) => {
+    const started = performance.now();
+    const timings = {};
+    let status = 500;
+    try {
+      const response = await requestContext.run(timings, () => handler(request, context));
+      status = response.status;
+      const totalMs = performance.now() - started;
+      const measured = PHASES.reduce((sum, phase) => sum + (timings[phase] || 0), 0);
+      const entries = PHASES.filter(phase => timings[phase] !== undefined)
+        .map(phase => `${phase};dur=${timings[phase].toFixed(1)}`);
+      entries.push(`app;dur=${Math.max(totalMs - measured, 0).toFixed(1)}`, `total;dur=${totalMs.toFixed(1)}`);
+      response.headers.set('Server-Timing', entries.join(', '));
+      return response;
+    } finally {
+      const path = new URL(request.url).pathname.replace('/api/', '');
+      metrics.record({
+        route: routeLabel(path),
+        method,
+        status,
+        totalMs: performance.now() - started,
+        timings,
+      });
+    }
+  };
+}
@@ -0,0 +1,180 @@
+import { statement } from '@/lib/db';
+import { CURRENT_WAL_LSN, REPLAYED_WAL_LSN } from '@/db/queries.mjs';
+
+// Primary WAL positions remembered while the replica catches up to them
+const MAX_PENDING_POSITIONS = 64;
+
+// SQLSTATE of a standby query cancelled by a conflict with WAL replay
+const RECOVERY_CONFLICT = '40001';
+
+// '16/B374D848' -> 0x16B374D848n
+function parseLsn(lsn) {
+  const [high, low] = lsn.split('/');
+  return (BigInt(`0x${high}`) << 32n) | BigInt(`0x${low}`);
+}
+
+// WAL page header sizes: the first page of a segment has the long header
+const SHORT_PAGE_HEADER = 24n;
+const LONG_PAGE_HEADER = 40n;
+
+// End of the primary's last WAL record. When a record ends exactly on a page
+// boundary the insert position already points past the next page's header,
+// while a standby that replayed the record reports the boundary itself.
+function lastRecordEnd({ lsn, block_size, segment_size }) {
+  const position = parseLsn(lsn);
+  if (position % BigInt(segment_size) === LONG_PAGE_HEADER) {
+    return position - LONG_PAGE_HEADER;
+  }
+  if (position % BigInt(block_size) === SHORT_PAGE_HEADER) {
+    return position - SHORT_PAGE_HEADER;
+  }
+  return position;
+}
+
+// Errors not reported by the server (connection failures, pool acquire
+// timeouts) and server shutdowns mean the replica cannot serve reads
+function isUnavailable(error) {
+  const code = error.code || '';
+  return !error.severity || code.startsWith('08') || code.startsWith('57P');
+}
+
+function withTimeout(promise, ms) {
+  let timer;
+  const timeout = new Promise((_, reject) => {
+    timer = setTimeout(() => reject(new Error(`Replica health check timed out after ${ms}ms`)), ms);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+// Sends read-only queries to a streaming replica when it can answer them as
+// the primary would. A periodic probe records the primary's WAL position
+// and how far the replica has replayed; `caughtUpTo` is the latest time
+// before which every commit on the primary is visible on the replica.
+// Writes are recorded (locally and from other instances' intake events) so
+// a read scope picks the replica only when nothing it depends on is newer:
+//   { userId }      that user's writes (read-your-writes)
+//   { fresh: true } every write (results that are cached or global)
+//   {}              none; the replica may lag by up to maxLagMs
+// Everything goes to the primary when no replica is configured, when the
+// probe fails or the replica falls further behind than maxLagMs.
+export class ReplicaRouter {
+  constructor(primary, replica, { healthIntervalMs, maxLagMs, probeTimeoutMs }) {
+    this.primary = primary;
+    this.replica = replica;
+    this.maxLagMs = maxLagMs;
+    this.probeTimeoutMs = probeTimeoutMs;
+    this.healthy = false;
+    this.lastError = null;
+    this.caughtUpTo = 0;
+    this.lastWriteAt = 0;
+    this.userWrites = new Map();
+    this.pending = [];
+    this.probing = false;
+    this.counts = { replicaReads: 0, primaryReads: 0, fallbacks: 0, probeErrors: 0 };
+
+    if (replica) {
+      setInterval(() => this.probe(), healthIntervalMs).unref?.();
+      this.probe();
+    }
+  }
+
+  // Note committed writes so that later reads see them
+  recordWrite(userIds = []) {
+    const now = Date.now();
+    this.lastWriteAt = now;
+    for (const userId of userIds) {
+      this.userWrites.set(userId.toLowerCase(), now);
+    }
+  }
+
+  async probe() {
+    if (this.probing) return;
+    this.probing = true;
+    const at = Date.now();
+    try {
+      const primary = await this.primary.query(statement(CURRENT_WAL_LSN));
+      this.pending.push({ at, lsn: lastRecordEnd(primary.rows[0]) });
+      if (this.pending.length > MAX_PENDING_POSITIONS) {
+        this.pending.shift();
+      }
+
+      const replica = await withTimeout(this.replica.query(statement(REPLAYED_WAL_LSN)), this.probeTimeoutMs);
+      if (replica.rows[0].lsn === null) {
+        throw new Error('DATABASE_REPLICA_URL does not point to a standby');
+      }
+      const replayed = parseLsn(replica.rows[0].lsn);
+      while (this.pending.length > 0 && this.pending[0].lsn <= replayed) {
+        this.caughtUpTo = this.pending.shift().at;
+      }
+      for (const [userId, writtenAt] of this.userWrites) {
+        if (writtenAt < this.caughtUpTo) this.userWrites.delete(userId);
+      }
+
+      if (!this.healthy) {
+        console.log('Replica is available for reads');
+      }
+      this.healthy = true;
+      this.lastError = null;
+    } catch (error) {
+      this.counts.probeErrors++;
+      if (this.healthy) {
+        console.error('Replica health check failed, reading from the primary:', error.message);
+      }
+      this.healthy = false;
+      this.lastError = error.message;
+    } finally {
+      this.probing = false;
+    }
+  }
+
+  pick({ userId, fresh = false } = {}) {
+    if (!this.replica || !this.healthy || Date.now() - this.caughtUpTo > this.maxLagMs) {
+      return this.primary;
+    }
+    if (fresh && this.lastWriteAt >= this.caughtUpTo) {
+      return this.primary;
+    }
+    if (userId && (this.userWrites.get(userId.toLowerCase()) ?? 0) >= this.caughtUpTo) {
+      return this.primary;
+    }
+    return this.replica;
+  }
+
+  // Run `fn(db)` with the pool chosen for `scope`. A read the replica cannot
+  // answer (unreachable, or cancelled by WAL replay) is retried on the primary.
+  async read(scope, fn) {
+    const db = this.pick(scope);
+    if (db === this.primary) {
+      this.counts.primaryReads++;
+      return fn(db);
+    }
+
+    this.counts.replicaReads++;
+    try {
+      return await fn(db);
+    } catch (error) {
+      const unavailable = isUnavailable(error);
+      if (!unavailable && error.code !== RECOVERY_CONFLICT) {
+        throw error;
+      }
+      if (unavailable) {
+        this.healthy = false;
+        this.lastError = error.message;
+      }
+      this.counts.fallbacks++;
+      return fn(this.primary);
+    }
+  }
+
+  getStats() {
+    if (!this.replica) return null;
+    return {
+      healthy: this.healthy,
+      lastError: this.lastError,
+      stalenessMs: this.caughtUpTo ? Date.now() - this.caughtUpTo : null,
+      maxLagMs: this.maxLagMs,
+      ...this.counts,
+      pool: this.replica.getStats(),
+    };
+  }
+}
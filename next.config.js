@@ -32,6 +32,8 @@ const nextConfig = {
           { key: "Access-Control-Allow-Origin", value: process.env.CORS_ORIGINS || "*" },
           { key: "Access-Control-Allow-Methods", value: "GET, POST, PUT, DELETE, OPTIONS" },
           { key: "Access-Control-Allow-Headers", value: "*" },
+          { key: "Access-Control-Expose-Headers", value: "X-Next-Cursor, ETag, X-Cache, Server-Timing" },
+          { key: "Timing-Allow-Origin", value: process.env.CORS_ORIGINS || "*" },
         ],
       },
     ];
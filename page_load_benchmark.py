@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Water Tracker User Page Load Benchmark
+Compares time-to-data of the user detail page between the former request
+waterfall (user -> today's total -> chart window, three sequential requests)
+and the single /api/users/:id/bootstrap request.
+
+Latency is measured against the API directly. Because every extra sequential
+request costs a full network round trip, the report also projects
+time-to-data for the given round-trip times (e.g. a mobile link):
+measured + round trips x RTT.
+
+Usage:
+    python page_load_benchmark.py
+    python page_load_benchmark.py --rtt-ms 50 150 300 --requests 500 --output page.json
+"""
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+import backend_benchmark
+from backend_test import API_BASE, BASE_URL
+
+PAGE_SCENARIOS = list(backend_benchmark.PAGE_ROUND_TRIPS)
+
+
+def project(result, round_trips, rtt_ms):
+    """Projected p50/p95 time-to-data with `rtt_ms` of network latency per request"""
+    latency = result['latency_ms']
+    return {
+        'p50': latency['p50'] + round_trips * rtt_ms,
+        'p95': latency['p95'] + round_trips * rtt_ms,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=10, help='concurrent page loads')
+    parser.add_argument('--requests', type=int, default=200, help='page loads per variant')
+    parser.add_argument('--rtt-ms', type=float, nargs='+', default=[50, 150, 300],
+                        help='round-trip times to project time-to-data for')
+    parser.add_argument('--output', help='write machine-readable results to this JSON file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"Benchmarking user page loads at: {API_BASE}")
+    ctx = backend_benchmark.build_context()
+
+    results = {}
+    for name in PAGE_SCENARIOS:
+        print(f"⏱️  Running {name}...")
+        results[name] = backend_benchmark.run_scenario(name, ctx, args.concurrency, total_requests=args.requests)
+
+    print("\n" + "=" * 78)
+    print("🏁 USER PAGE TIME-TO-DATA")
+    print("=" * 78)
+    header = f"{'variant':<22}{'trips':>6}{'p50 ms':>9}{'p95 ms':>9}"
+    for rtt in args.rtt_ms:
+        header += f"{f'p50 @{rtt:g}ms':>14}"
+    print(header)
+
+    projections = {}
+    for name, result in results.items():
+        trips = backend_benchmark.PAGE_ROUND_TRIPS[name]
+        latency = result['latency_ms']
+        projections[name] = {str(rtt): project(result, trips, rtt) for rtt in args.rtt_ms}
+        line = f"{name:<22}{trips:>6}{latency['p50']:>9.1f}{latency['p95']:>9.1f}"
+        for rtt in args.rtt_ms:
+            line += f"{projections[name][str(rtt)]['p50']:>14.1f}"
+        print(line)
+
+    waterfall = results['user_page_waterfall']['latency_ms']['p50']
+    bootstrap = results['user_page_bootstrap']['latency_ms']['p50']
+    if waterfall:
+        print(f"\nBootstrap p50 is {(bootstrap - waterfall) / waterfall:+.0%} vs the waterfall before network latency")
+
+    if args.output:
+        report = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'base_url': BASE_URL,
+            'git_revision': backend_benchmark.git_revision(),
+            'config': {
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'rtt_ms': args.rtt_ms,
+            },
+            'variants': results,
+            'projected_ms': projections,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    return all(result['errors'] == 0 for result in results.values())
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Water Tracker Read/Write Split Benchmark
+Measures water-log write latency on its own and again while reader threads
+run heavy read-only queries (month-long scans across all users, other users'
+daily totals and user pages, today's intake). Run it against the API with
+and without DATABASE_REPLICA_URL to see how much moving reads to the replica
+shields writes on the primary; the replica's read routing counts are
+reported from /api/internal/stats.
+
+Writers log intake for half of the users and readers only read the other
+half, so routed reads are not forced onto the primary by read-your-writes.
+
+Usage:
+    python replica_benchmark.py --writers 4 --readers 32 --duration 20
+    python replica_benchmark.py --output primary-only.json
+    python replica_benchmark.py --output with-replica.json --compare primary-only.json
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from backend_benchmark import REQUEST_TIMEOUT, build_context, get_session, git_revision, percentile
+from backend_test import API_BASE, BASE_URL
+
+NO_CACHE = {'Cache-Control': 'no-cache'}
+
+
+def _month_range():
+    today = datetime.now(timezone.utc).date()
+    return today.replace(day=1), today
+
+
+def read_month_of_logs(session, ctx):
+    start, end = _month_range()
+    params = {
+        'startDate': start.isoformat(),
+        'endDate': (end + timedelta(days=1)).isoformat(),
+        'limit': 500,
+    }
+    return session.get(f"{API_BASE}/water-logs", params=params, timeout=REQUEST_TIMEOUT)
+
+
+def read_daily_totals(session, ctx):
+    start, end = _month_range()
+    user_id = random.choice(ctx['reader_ids'])
+    params = {'from': start.isoformat(), 'to': end.isoformat(), 'tz': 'UTC'}
+    return session.get(f"{API_BASE}/users/{user_id}/daily", params=params, timeout=REQUEST_TIMEOUT)
+
+
+def read_user_page(session, ctx):
+    end = datetime.now(timezone.utc).date()
+    user_id = random.choice(ctx['reader_ids'])
+    params = {'from': (end - timedelta(days=6)).isoformat(), 'to': end.isoformat(), 'tz': 'UTC'}
+    return session.get(f"{API_BASE}/users/{user_id}/bootstrap", params=params, timeout=REQUEST_TIMEOUT)
+
+
+def read_today_intake(session, ctx):
+    return session.get(f"{API_BASE}/today-intake", headers=NO_CACHE, timeout=REQUEST_TIMEOUT)
+
+
+READ_SCENARIOS = [read_month_of_logs, read_daily_totals, read_user_page, read_today_intake]
+
+
+def write_log(session, ctx):
+    payload = {
+        'userId': random.choice(ctx['writer_ids']),
+        'amount': random.choice([150, 200, 250, 300, 500]),
+    }
+    return session.post(f"{API_BASE}/water-logs", json=payload, timeout=REQUEST_TIMEOUT)
+
+
+def fetch_replica_stats():
+    """The API's replica routing stats; None without a replica or stats endpoint"""
+    try:
+        response = requests.get(f"{API_BASE}/internal/stats", timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json().get('replica')
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def routing_delta(before, after, max_staleness_ms):
+    if not before or not after:
+        return None
+    reads = {
+        key: after[key] - before[key]
+        for key in ('replicaReads', 'primaryReads', 'fallbacks', 'probeErrors')
+    }
+    routed = reads['replicaReads'] + reads['primaryReads']
+    return {
+        **reads,
+        'replica_share': reads['replicaReads'] / routed if routed else 0.0,
+        'max_staleness_ms': max_staleness_ms,
+        'healthy_at_end': after['healthy'],
+    }
+
+
+def summarize(latencies, errors, wall_time):
+    latencies.sort()
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': count / wall_time if wall_time > 0 else 0.0,
+        'latency_ms': {
+            'mean': sum(latencies) / count if count else None,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None,
+        },
+    }
+
+
+def run_phase(ctx, writers, readers, duration):
+    """Run writers (and readers) for `duration` seconds; returns per-role summaries"""
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = {'write': [], 'read': []}
+    errors = {'write': 0, 'read': 0}
+
+    def worker(role):
+        session = get_session()
+        while not stop.is_set():
+            scenario = write_log if role == 'write' else random.choice(READ_SCENARIOS)
+            sent = time.perf_counter()
+            try:
+                failed = scenario(session, ctx).status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed_ms = (time.perf_counter() - sent) * 1000
+            with lock:
+                latencies[role].append(elapsed_ms)
+                errors[role] += failed
+
+    stats_before = fetch_replica_stats()
+    max_staleness_ms = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers + readers) as pool:
+        futures = [pool.submit(worker, 'write') for _ in range(writers)]
+        futures += [pool.submit(worker, 'read') for _ in range(readers)]
+        # Sample how far behind the replica runs while the load is on
+        while time.perf_counter() - start < duration:
+            time.sleep(0.5)
+            stats = fetch_replica_stats()
+            if stats and stats['stalenessMs'] is not None:
+                max_staleness_ms = max(max_staleness_ms, stats['stalenessMs'])
+        stop.set()
+        for future in futures:
+            future.result()
+    wall_time = time.perf_counter() - start
+
+    result = {'writes': summarize(latencies['write'], errors['write'], wall_time)}
+    if readers:
+        result['reads'] = summarize(latencies['read'], errors['read'], wall_time)
+    result['replica'] = routing_delta(stats_before, fetch_replica_stats(), max_staleness_ms)
+    return result
+
+
+def print_summary(results):
+    print("\n" + "=" * 78)
+    print("🏁 READ/WRITE SPLIT SUMMARY")
+    print("=" * 78)
+    print(f"{'phase':<18}{'role':<8}{'reqs':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for phase, result in results.items():
+        for role in ('writes', 'reads'):
+            if role not in result:
+                continue
+            summary = result[role]
+            latency = summary['latency_ms']
+            print(
+                f"{phase:<18}{role:<8}{summary['requests']:>8}{summary['throughput_rps']:>9.1f}"
+                f"{latency['p50'] or 0:>10.1f}{latency['p95'] or 0:>10.1f}{latency['p99'] or 0:>10.1f}"
+                f"{summary['errors']:>8}"
+            )
+
+    print(f"\n{'phase':<18}{'replica':>9}{'primary':>9}{'share':>8}{'fallbacks':>11}{'max lag':>10}")
+    for phase, result in results.items():
+        routing = result['replica']
+        if routing is None:
+            print(f"{phase:<18}{'(no replica configured)':>30}")
+            continue
+        print(
+            f"{phase:<18}{routing['replicaReads']:>9}{routing['primaryReads']:>9}{routing['replica_share']:>8.0%}"
+            f"{routing['fallbacks']:>11}{routing['max_staleness_ms']:>8}ms"
+        )
+
+
+def print_comparison(results, baseline_path):
+    """Print write latency deltas against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['phases']
+
+    print(f"\n📊 Write latency compared against {baseline_path}")
+    for phase, result in results.items():
+        if phase not in baseline:
+            continue
+        deltas = []
+        for key in ('p50', 'p95', 'p99'):
+            before = baseline[phase]['writes']['latency_ms'][key]
+            after = result['writes']['latency_ms'][key]
+            if before and after is not None:
+                deltas.append(f"{key} {before:.1f}→{after:.1f}ms ({(after - before) / before:+.0%})")
+        print(f"{phase:<18}" + "  ".join(deltas))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4, help='threads logging water intake')
+    parser.add_argument('--readers', type=int, default=32, help='threads running read-only queries')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per phase')
+    parser.add_argument('--output', help='write machine-readable results to this JSON file')
+    parser.add_argument('--compare', help='previous results JSON to compare against')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"Benchmarking Water Tracker API at: {API_BASE}")
+    ctx = build_context()
+    if len(ctx['user_ids']) < 2:
+        raise RuntimeError("Need at least two users - run the seed endpoint first")
+    user_ids = sorted(ctx['user_ids'])
+    half = len(user_ids) // 2
+    ctx.update(writer_ids=user_ids[:half], reader_ids=user_ids[half:])
+
+    results = {}
+    print("⏱️  Writes only...")
+    results['writes_only'] = run_phase(ctx, args.writers, 0, args.duration)
+    print(f"⏱️  Writes with {args.readers} readers...")
+    results['with_readers'] = run_phase(ctx, args.writers, args.readers, args.duration)
+
+    print_summary(results)
+    stats = fetch_replica_stats()
+
+    if args.output:
+        report = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'base_url': BASE_URL,
+            'git_revision': git_revision(),
+            'config': {
+                'writers': args.writers,
+                'readers': args.readers,
+                'duration_s': args.duration,
+                'replica': stats is not None,
+                'max_lag_ms': stats['maxLagMs'] if stats else None,
+            },
+            'phases': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+    return all(
+        summary['errors'] == 0
+        for result in results.values() for summary in (result['writes'], result.get('reads'))
+        if summary
+    )
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
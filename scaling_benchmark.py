@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Water Tracker Scaling Benchmark
+Sweeps synthetic dataset size and measures the latency of every read-only
+GET branch of the API at each size, producing a scaling curve.
+
+The API under test must be connected to the same DATABASE_URL. Synthetic
+users are loaded with generate_dataset.py and removed again at the end.
+At every size it also runs `scripts/explain-check.mjs --pruning-only` to
+check that the API's reads of today are pruned, at run time, to the
+water_logs partitions of today.
+
+Usage:
+    python scaling_benchmark.py --users 10 100 1000 --years 1
+    python scaling_benchmark.py --users 100 1000 --output curve.json --csv curve.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import backend_benchmark
+import generate_dataset
+
+
+EXPLAIN_CHECK = Path(__file__).resolve().parent / 'scripts' / 'explain-check.mjs'
+
+
+def check_partition_pruning(database_url):
+    """EXPLAIN ANALYZE the exported statements behind today's reads; returns
+    {name: {'partitions': [...], 'max_partitions': n, 'ok': bool}}"""
+    env = dict(os.environ)
+    if database_url:
+        env['DATABASE_URL'] = database_url
+    # Exits non-zero when a check fails; the report is printed either way
+    completed = subprocess.run(
+        ['node', str(EXPLAIN_CHECK), '--pruning-only', '--json'],
+        env=env, capture_output=True, text=True,
+    )
+    try:
+        results = json.loads(completed.stdout)
+    except ValueError:
+        raise RuntimeError(f"explain-check failed: {completed.stderr.strip()}") from None
+    return {
+        result['name']: {
+            'partitions': result['partitions'],
+            'max_partitions': result['maxPartitions'],
+            'ok': result['ok'],
+        }
+        for result in results
+    }
+
+
+def run_sweep(conn, database_url, user_counts, years, scenarios, concurrency, requests_per_scenario, seed):
+    """Load each dataset size in turn and benchmark the read scenarios"""
+    points = []
+    for users in user_counts:
+        generate_dataset.reset(conn)
+        started = time.perf_counter()
+        counts = generate_dataset.generate(conn, users, years, seed=seed)
+        load_s = time.perf_counter() - started
+        print(f"\n📦 {counts['users']} users / {counts['logs']:,} logs loaded in {load_s:.1f}s")
+
+        pruning = check_partition_pruning(database_url)
+        for name, check in pruning.items():
+            status = '✅' if check['ok'] else '❌'
+            print(f"   {status} {name} scans {len(check['partitions'])} water_logs partition(s) {check['partitions']}")
+
+        ctx = backend_benchmark.build_context()
+        endpoints = {}
+        for name in scenarios:
+            endpoints[name] = backend_benchmark.run_scenario(
+                name, ctx, concurrency, total_requests=requests_per_scenario
+            )
+            latency = endpoints[name]['latency_ms']
+            print(f"   {name:<22} p50 {latency['p50']:.1f}ms  p95 {latency['p95']:.1f}ms  p99 {latency['p99']:.1f}ms")
+
+        points.append({
+            'synthetic_users': counts['users'],
+            'logs': counts['logs'],
+            'days': counts['days'],
+            'load_s': load_s,
+            'partitions_scanned_today': pruning,
+            'endpoints': endpoints,
+        })
+    return points
+
+
+def write_csv(points, path):
+    """One row per (dataset size, endpoint) for plotting"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['synthetic_users', 'logs', 'endpoint', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'error_rate'])
+        for point in points:
+            for name, result in point['endpoints'].items():
+                latency = result['latency_ms']
+                writer.writerow([
+                    point['synthetic_users'], point['logs'], name,
+                    f"{latency['p50']:.2f}", f"{latency['p95']:.2f}", f"{latency['p99']:.2f}",
+                    f"{result['throughput_rps']:.2f}", f"{result['error_rate']:.4f}",
+                ])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[10, 100, 1000],
+                        help='synthetic user counts to sweep')
+    parser.add_argument('--years', type=float, default=1.0, help='years of history per user')
+    parser.add_argument('--scenarios', nargs='+', choices=backend_benchmark.READ_SCENARIOS,
+                        default=backend_benchmark.READ_SCENARIOS)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario per size')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='leave the largest dataset loaded')
+    parser.add_argument('--database-url', help='defaults to $DATABASE_URL')
+    parser.add_argument('--output', help='write the curve as JSON')
+    parser.add_argument('--csv', help='write the curve as CSV')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # COPY bypasses the API's cache invalidation, and the curve should
+    # reflect database cost, so always skip the response cache
+    backend_benchmark.SESSION_HEADERS['Cache-Control'] = 'no-cache'
+    conn = generate_dataset.connect(args.database_url)
+    try:
+        points = run_sweep(
+            conn, args.database_url, sorted(args.users), args.years, args.scenarios,
+            args.concurrency, args.requests, args.seed,
+        )
+    finally:
+        if not args.keep:
+            generate_dataset.reset(conn)
+        conn.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'started_at': datetime.now(timezone.utc).isoformat(),
+                'base_url': backend_benchmark.BASE_URL,
+                'git_revision': backend_benchmark.git_revision(),
+                'years': args.years,
+                'points': points,
+            }, f, indent=2)
+        print(f"\nCurve written to {args.output}")
+    if args.csv:
+        write_csv(points, args.csv)
+        print(f"Curve written to {args.csv}")
+
+    unpruned = sorted({
+        name for point in points
+        for name, check in point['partitions_scanned_today'].items() if not check['ok']
+    })
+    if unpruned:
+        print(f"\n❌ Reads of today are not pruned to today's partitions: {', '.join(unpruned)}")
+    return not unpruned
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
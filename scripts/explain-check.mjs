@@ -0,0 +1,287 @@
+// Plan every statement the API issues (db/queries.mjs) and fail if any of
+// them reads a large table with a sequential scan. Reads of today are also
+// run with EXPLAIN ANALYZE and fail if they are not pruned, at run time, to
+// the water_logs partitions of today: their bounds come from NOW() and
+// parameters, which plan-time pruning cannot use.
+//
+// Usage:
+//   node scripts/explain-check.mjs                 check against existing data
+//   node scripts/explain-check.mjs --seed          first load a large synthetic
+//     [--users 2000] [--days 365]                  dataset (scratch databases only)
+//   node scripts/explain-check.mjs --pruning-only  only the run-time pruning checks
+//   node scripts/explain-check.mjs --json          print the results as JSON
+import { randomUUID } from 'node:crypto';
+import { connect } from '../db/client.mjs';
+import * as queries from '../db/queries.mjs';
+
+// A sequential scan on any of these fails the check unless the case allows
+// it: the user list, today-intake and the leaderboard read every user by
+// design. water_logs_archive is not guarded: listings only read it once a
+// page runs past the live partitions.
+const GUARDED_TABLES = [
+  'users', 'water_logs', 'daily_intake', 'water_log_idempotency_keys', 'weekly_intake', 'user_streaks',
+];
+
+// Monthly partitions are checked as their parent table
+const WATER_LOGS_PARTITION = /^water_logs_y\d{4}m\d{2}$/;
+
+const TIMEZONE = 'UTC';
+const CHANNEL = 'explain_check';
+
+function parseArgs(argv) {
+  const args = { seed: false, users: 2000, days: 365, pruningOnly: false, json: false };
+  for (let i = 0; i < argv.length; i++) {
+    if (argv[i] === '--seed') args.seed = true;
+    else if (argv[i] === '--pruning-only') args.pruningOnly = true;
+    else if (argv[i] === '--json') args.json = true;
+    else if (argv[i] === '--users') args.users = parseInt(argv[++i]);
+    else if (argv[i] === '--days') args.days = parseInt(argv[++i]);
+  }
+  return args;
+}
+
+// Synthetic users with three logs per day over `days` days
+async function seed(client, { users, days }) {
+  console.log(`Seeding ${users} users x ${days} days of logs...`);
+  await client.query(queries.ENSURE_WATER_LOG_PARTITIONS, [new Date(Date.now() - (days + 1) * 86400000), new Date()]);
+  await client.query('BEGIN');
+  await client.query(`
+    INSERT INTO users (name, daily_goal_ml, created_at)
+    SELECT 'explain-check-' || n, 3000, NOW() - (n || ' minutes')::interval
+    FROM generate_series(1, $1) AS n
+  `, [users]);
+  await client.query(`
+    INSERT INTO water_logs (user_id, amount_ml, logged_at)
+    SELECT u.id, 50 * (1 + floor(random() * 10))::int,
+           d.day + (random() * interval '16 hours') + interval '6 hours'
+    FROM users u
+    CROSS JOIN generate_series(NOW()::date - $1::int, NOW()::date, interval '1 day') AS d(day)
+    CROSS JOIN generate_series(1, 3) AS k
+    WHERE u.name LIKE 'explain-check-%'
+  `, [days]);
+  await client.query(`
+    INSERT INTO daily_intake (user_id, day, total_ml, log_count)
+    SELECT w.user_id, (w.logged_at AT TIME ZONE $1)::date, SUM(w.amount_ml), COUNT(*)
+    FROM water_logs w JOIN users u ON u.id = w.user_id
+    WHERE u.name LIKE 'explain-check-%'
+    GROUP BY 1, 2
+    ON CONFLICT (user_id, day) DO UPDATE
+      SET total_ml = EXCLUDED.total_ml, log_count = EXCLUDED.log_count
+  `, [TIMEZONE]);
+  await client.query(`
+    SELECT rebuild_leaderboard(id) FROM users WHERE name LIKE 'explain-check-%'
+  `);
+  await client.query('COMMIT');
+  await client.query(
+    'ANALYZE users, water_logs, daily_intake, water_log_idempotency_keys, weekly_intake, user_streaks'
+  );
+}
+
+function buildCases(sample) {
+  const { userId, from, to, loggedAt, logId } = sample;
+  const listCase = (name, filters) => {
+    const { text, params } = queries.buildWaterLogsQuery(filters);
+    return { name, text, params };
+  };
+
+  return [
+    { name: 'SEED_USERS', text: queries.SEED_USERS, params: [['explain-check-seed'], [3000]] },
+    { name: 'COUNT_NAMED_USERS', text: queries.COUNT_NAMED_USERS, params: [['Nikhil', 'Karthik']] },
+    { name: 'LIST_USERS', text: queries.LIST_USERS, params: [], allowSeqScan: ['users'] },
+    { name: 'GET_USER', text: queries.GET_USER, params: [userId] },
+    { name: 'DAILY_TOTALS', text: queries.DAILY_TOTALS, params: [userId, from, to, null, TIMEZONE, null] },
+    {
+      name: 'DAILY_TOTALS_OTHER_TIMEZONE',
+      text: queries.DAILY_TOTALS,
+      params: [userId, from, to, 'America/New_York', TIMEZONE, null],
+    },
+    { name: 'BOOTSTRAP', text: queries.BOOTSTRAP, params: [userId, null, null, null, TIMEZONE, 7] },
+    {
+      name: 'BOOTSTRAP_OTHER_TIMEZONE',
+      text: queries.BOOTSTRAP,
+      params: [userId, null, null, 'America/New_York', TIMEZONE, 7],
+    },
+    { name: 'TODAY_INTAKE', text: queries.TODAY_INTAKE, params: [TIMEZONE], allowSeqScan: ['users'] },
+    {
+      name: 'LOG_WATER_COALESCED',
+      text: queries.LOG_WATER_COALESCED,
+      params: [userId, 250, TIMEZONE, CHANNEL, 5000, randomUUID()],
+    },
+    { name: 'FIND_IDEMPOTENCY_KEY', text: queries.FIND_IDEMPOTENCY_KEY, params: [userId, 'key'] },
+    { name: 'CLAIM_IDEMPOTENCY_KEY', text: queries.CLAIM_IDEMPOTENCY_KEY, params: [userId, 'key', randomUUID()] },
+    { name: 'REPOINT_IDEMPOTENCY_KEY', text: queries.REPOINT_IDEMPOTENCY_KEY, params: [userId, 'key', logId] },
+    { name: 'UPDATE_USER_GOAL', text: queries.UPDATE_USER_GOAL, params: [3000, userId, CHANNEL] },
+    { name: 'UPDATE_USER_TIMEZONE', text: queries.UPDATE_USER_TIMEZONE, params: [null, userId, TIMEZONE, CHANNEL] },
+    { name: 'APPLY_INTAKE_PROGRESS', text: queries.APPLY_INTAKE_PROGRESS, params: [[userId], [to], [250]] },
+    {
+      name: 'LEADERBOARD_BY_TOTAL',
+      text: queries.LEADERBOARD_BY_TOTAL,
+      params: [to, TIMEZONE, 50],
+      allowSeqScan: ['users', 'user_streaks'],
+    },
+    {
+      name: 'LEADERBOARD_BY_STREAK',
+      text: queries.LEADERBOARD_BY_STREAK,
+      // No week: each user's current one, as the dashboard asks for it
+      params: [null, TIMEZONE, 50],
+      allowSeqScan: ['users', 'user_streaks'],
+    },
+    { name: 'ENSURE_WATER_LOG_PARTITIONS', text: queries.ENSURE_WATER_LOG_PARTITIONS, params: [from, to] },
+    { name: 'FIND_ARCHIVED_TIMESTAMPS', text: queries.FIND_ARCHIVED_TIMESTAMPS, params: [[loggedAt]] },
+    { name: 'FIND_USERS', text: queries.FIND_USERS, params: [[userId]] },
+    { name: 'CLAIM_IDEMPOTENCY_KEYS', text: queries.CLAIM_IDEMPOTENCY_KEYS, params: [[userId], ['key'], [randomUUID()]] },
+    { name: 'FIND_IDEMPOTENCY_KEYS', text: queries.FIND_IDEMPOTENCY_KEYS, params: [[userId], ['key']] },
+    {
+      name: 'INSERT_WATER_LOG_BATCH',
+      text: queries.INSERT_WATER_LOG_BATCH,
+      params: [[randomUUID()], [userId], [250], [null], TIMEZONE, CHANNEL],
+    },
+    listCase('water-logs', { limit: 501 }),
+    listCase('water-logs?userId', { userId, limit: 501 }),
+    listCase('water-logs?userId&range', { userId, startDate: from, endDate: to, limit: 501 }),
+    listCase('water-logs?range', { startDate: from, endDate: to, limit: 501 }),
+    listCase('water-logs?userId&cursor', { userId, cursor: { loggedAt, id: logId }, limit: 501 }),
+    listCase('water-logs?userId&format=ndjson', { userId }),
+  ];
+}
+
+// UTC months (one water_logs partition each) touched by [from, to]
+function monthsTouched(from, to) {
+  return (to.getUTCFullYear() - from.getUTCFullYear()) * 12 + to.getUTCMonth() - from.getUTCMonth() + 1;
+}
+
+// Today's reads as the API issues them. A local day in any timezone lies
+// within 26 hours of now, which bounds the partitions it may need.
+function buildPruningCases(sample) {
+  const { userId } = sample;
+  const now = new Date();
+  const dayStart = new Date(now.toISOString().slice(0, 10));
+  const { text, params } = queries.buildWaterLogsQuery({
+    startDate: dayStart.toISOString(),
+    endDate: new Date(dayStart.getTime() + 86400000 - 1).toISOString(),
+    limit: 501,
+  });
+  const anyDay = monthsTouched(new Date(now.getTime() - 26 * 3600000), new Date(now.getTime() + 26 * 3600000));
+
+  return [
+    { name: 'water-logs?startDate=today', text, params, maxPartitions: monthsTouched(dayStart, dayStart) },
+    {
+      name: 'BOOTSTRAP today (raw logs)',
+      text: queries.BOOTSTRAP,
+      params: [userId, null, null, 'America/New_York', TIMEZONE, 1],
+      maxPartitions: anyDay,
+    },
+    {
+      name: 'DAILY_TOTALS today (raw logs)',
+      text: queries.DAILY_TOTALS,
+      params: [userId, null, null, 'America/New_York', TIMEZONE, 1],
+      maxPartitions: anyDay,
+    },
+  ];
+}
+
+function collectScans(plan, scans = []) {
+  if (plan['Relation Name']) {
+    scans.push({ nodeType: plan['Node Type'], relation: plan['Relation Name'], loops: plan['Actual Loops'] });
+  }
+  for (const child of plan.Plans || []) {
+    collectScans(child, scans);
+  }
+  return scans;
+}
+
+function guardedTable(relation) {
+  const table = WATER_LOGS_PARTITION.test(relation) ? 'water_logs' : relation;
+  return GUARDED_TABLES.find(guarded => table === guarded);
+}
+
+async function main() {
+  const args = parseArgs(process.argv.slice(2));
+  const client = await connect();
+  const results = [];
+
+  try {
+    if (args.seed) {
+      await seed(client, args);
+    }
+
+    const sampleResult = await client.query(`
+      SELECT id AS log_id, user_id, logged_at::text AS logged_at
+      FROM water_logs ORDER BY logged_at DESC LIMIT 1
+    `);
+    if (sampleResult.rows.length === 0) {
+      throw new Error('water_logs is empty; run with --seed on a scratch database');
+    }
+    const row = sampleResult.rows[0];
+    const sample = {
+      userId: row.user_id,
+      logId: row.log_id,
+      loggedAt: row.logged_at,
+      from: new Date(Date.now() - 30 * 86400000).toISOString().slice(0, 10),
+      to: new Date().toISOString().slice(0, 10),
+    };
+
+    if (!args.pruningOnly) {
+      for (const { name, text, params, allowSeqScan = [] } of buildCases(sample)) {
+        const result = await client.query(`EXPLAIN (FORMAT JSON) ${text}`, params);
+        const scans = collectScans(result.rows[0]['QUERY PLAN'][0].Plan);
+        const offending = scans.filter(scan =>
+          scan.nodeType === 'Seq Scan' &&
+          guardedTable(scan.relation) &&
+          !allowSeqScan.includes(guardedTable(scan.relation))
+        );
+
+        const summary = scans.map(scan => `${scan.nodeType} on ${scan.relation}`).join(', ') || 'no table scans';
+        results.push({ check: 'seq-scan', name, ok: offending.length === 0, summary });
+      }
+    }
+
+    // Partitions pruned at run time are either removed from the plan or
+    // never executed; count the ones that ran
+    for (const { name, text, params, maxPartitions } of buildPruningCases(sample)) {
+      await client.query('BEGIN');
+      let result;
+      try {
+        result = await client.query(`EXPLAIN (ANALYZE, FORMAT JSON) ${text}`, params);
+      } finally {
+        await client.query('ROLLBACK');
+      }
+      const partitions = [...new Set(
+        collectScans(result.rows[0]['QUERY PLAN'][0].Plan)
+          .filter(scan => WATER_LOGS_PARTITION.test(scan.relation) && scan.loops > 0)
+          .map(scan => scan.relation)
+      )].sort();
+      const summary = `scanned ${partitions.length} water_logs partition(s), at most ${maxPartitions} allowed` +
+        (partitions.length ? ` [${partitions.join(', ')}]` : '');
+      results.push({ check: 'pruning', name, ok: partitions.length <= maxPartitions, summary, partitions, maxPartitions });
+    }
+  } finally {
+    await client.end();
+  }
+
+  if (args.json) {
+    console.log(JSON.stringify(results, null, 2));
+  } else {
+    for (const { name, ok, summary } of results) {
+      console.log(`${ok ? 'ok  ' : 'FAIL'}  ${name}: ${summary}`);
+    }
+  }
+
+  const failures = results.filter(result => !result.ok);
+  if (failures.length > 0) {
+    const seqScans = failures.filter(result => result.check === 'seq-scan').length;
+    const unpruned = failures.length - seqScans;
+    if (seqScans > 0) {
+      console.error(`\n${seqScans} quer${seqScans === 1 ? 'y falls' : 'ies fall'} back to a sequential scan`);
+    }
+    if (unpruned > 0) {
+      console.error(`\n${unpruned} read${unpruned === 1 ? '' : 's'} of today not pruned to today's partitions`);
+    }
+    process.exit(1);
+  }
+}
+
+main().catch((error) => {
+  console.error('Explain check failed:', error);
+  process.exit(1);
+});
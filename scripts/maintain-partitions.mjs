@@ -0,0 +1,65 @@
+// Create upcoming water_logs partitions and optionally archive old months.
+// Meant to run from cron (e.g. daily); every step is idempotent.
+//
+// Usage:
+//   node scripts/maintain-partitions.mjs                       create the next 3 months
+//   node scripts/maintain-partitions.mjs --ahead 6
+//   node scripts/maintain-partitions.mjs --archive-after 12    also archive months older
+//                                                              than 12 months
+import { connect } from '../db/client.mjs';
+import { ENSURE_WATER_LOG_PARTITIONS } from '../db/queries.mjs';
+
+function parseArgs(argv) {
+  const args = { ahead: 3, archiveAfter: null };
+  for (let i = 0; i < argv.length; i++) {
+    if (argv[i] === '--ahead') args.ahead = parseInt(argv[++i]);
+    else if (argv[i] === '--archive-after') args.archiveAfter = parseInt(argv[++i]);
+  }
+  return args;
+}
+
+// First days (YYYY-MM-DD) of the live partitions' months, oldest first
+async function liveMonths(client) {
+  const result = await client.query(`
+    SELECT substring(c.relname from 'y(\\d{4})m') || '-' ||
+           substring(c.relname from 'm(\\d{2})$') || '-01' AS month
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'water_logs'::regclass
+      AND c.relname ~ '^water_logs_y\\d{4}m\\d{2}$'
+    ORDER BY c.relname
+  `);
+  return result.rows.map(row => row.month);
+}
+
+async function main() {
+  const args = parseArgs(process.argv.slice(2));
+  const client = await connect();
+
+  try {
+    const ahead = new Date();
+    ahead.setUTCMonth(ahead.getUTCMonth() + args.ahead);
+    const ensured = await client.query(ENSURE_WATER_LOG_PARTITIONS, [new Date(), ahead]);
+    console.log(`Created ${ensured.rows[0].created} partitions (through ${ahead.toISOString().slice(0, 7)})`);
+
+    if (args.archiveAfter !== null) {
+      const cutoffDate = new Date();
+      cutoffDate.setUTCDate(1);
+      cutoffDate.setUTCMonth(cutoffDate.getUTCMonth() - args.archiveAfter);
+      const cutoff = cutoffDate.toISOString().slice(0, 10);
+      for (const month of await liveMonths(client)) {
+        if (month >= cutoff) break;
+        // One transaction per month keeps the lock on water_logs short
+        const archived = await client.query('SELECT archive_water_logs_partition($1) AS logs', [month]);
+        console.log(`Archived ${month.slice(0, 7)}: ${archived.rows[0].logs} logs`);
+      }
+    }
+  } finally {
+    await client.end();
+  }
+}
+
+main().catch((error) => {
+  console.error('Partition maintenance failed:', error);
+  process.exit(1);
+});
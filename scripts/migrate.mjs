@@ -0,0 +1,36 @@
+// Apply pending schema migrations from db/migrations, create the water_logs
+// partitions for the next few months and any missing default users. Runs
+// before `yarn start`.
+//
+// Usage:
+//   node scripts/migrate.mjs
+import { connect } from '../db/client.mjs';
+import { migrate } from '../db/migrate.mjs';
+import { ENSURE_WATER_LOG_PARTITIONS } from '../db/queries.mjs';
+import { seedDefaultUsers } from '../db/seed.mjs';
+
+const PARTITION_MONTHS_AHEAD = 3;
+
+async function main() {
+  const client = await connect();
+  try {
+    const applied = await migrate(client);
+    if (applied.length === 0) {
+      console.log('Schema is up to date');
+    }
+    const ahead = new Date();
+    ahead.setUTCMonth(ahead.getUTCMonth() + PARTITION_MONTHS_AHEAD);
+    await client.query(ENSURE_WATER_LOG_PARTITIONS, [new Date(), ahead]);
+    const { inserted } = await seedDefaultUsers(client);
+    if (inserted > 0) {
+      console.log(`Seeded ${inserted} default users`);
+    }
+  } finally {
+    await client.end();
+  }
+}
+
+main().catch((error) => {
+  console.error('Migration failed:', error);
+  process.exit(1);
+});
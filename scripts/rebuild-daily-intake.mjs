@@ -0,0 +1,39 @@
+// Rebuild the daily_intake rollup from water_logs, including archived months,
+// in each user's timezone, and the leaderboard state derived from it.
+//
+// Usage:
+//   node scripts/rebuild-daily-intake.mjs            rebuild every user
+//   node scripts/rebuild-daily-intake.mjs <userId>   rebuild one user
+//
+// Inserts into water_logs and goal changes are blocked while the rebuild runs
+// so neither can land between the recompute and the commit.
+import { connect } from '../db/client.mjs';
+
+const ROLLUP_TIMEZONE = process.env.ROLLUP_TIMEZONE || 'UTC';
+
+async function main() {
+  const userId = process.argv[2] || null;
+  const client = await connect();
+
+  try {
+    await client.query('BEGIN');
+    await client.query('LOCK TABLE water_logs, water_logs_archive, users IN SHARE MODE');
+    const result = await client.query(
+      'SELECT rebuild_daily_intake($1, $2) AS days',
+      [userId, ROLLUP_TIMEZONE]
+    );
+    await client.query('COMMIT');
+
+    console.log(`Rebuilt daily_intake and leaderboard: ${result.rows[0].days} user-days (each user's timezone, default ${ROLLUP_TIMEZONE})`);
+  } catch (error) {
+    await client.query('ROLLBACK').catch(() => {});
+    throw error;
+  } finally {
+    await client.end();
+  }
+}
+
+main().catch((error) => {
+  console.error('Rebuild failed:', error);
+  process.exit(1);
+});
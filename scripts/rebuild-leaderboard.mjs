@@ -0,0 +1,34 @@
+// Rebuild the leaderboard state (weekly_intake and user_streaks) from
+// daily_intake. Streaks are measured against each user's current goal.
+//
+// Usage:
+//   node scripts/rebuild-leaderboard.mjs            rebuild every user
+//   node scripts/rebuild-leaderboard.mjs <userId>   rebuild one user
+//
+// Rollup writes and goal changes are blocked while the rebuild runs so none
+// can land between the recompute and the commit.
+import { connect } from '../db/client.mjs';
+
+async function main() {
+  const userId = process.argv[2] || null;
+  const client = await connect();
+
+  try {
+    await client.query('BEGIN');
+    await client.query('LOCK TABLE daily_intake, users IN SHARE MODE');
+    const result = await client.query('SELECT rebuild_leaderboard($1) AS users', [userId]);
+    await client.query('COMMIT');
+
+    console.log(`Rebuilt leaderboard: ${result.rows[0].users} users`);
+  } catch (error) {
+    await client.query('ROLLBACK').catch(() => {});
+    throw error;
+  } finally {
+    await client.end();
+  }
+}
+
+main().catch((error) => {
+  console.error('Rebuild failed:', error);
+  process.exit(1);
+});
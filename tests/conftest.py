@@ -0,0 +1,328 @@
+"""
+Fixtures for the API test suite.
+
+The suite starts a throwaway Postgres cluster and a `next dev` server on free
+local ports, once per run, and shares them between pytest-xdist workers. It
+needs no network access and never touches a real database:
+
+    pip install -r requirements.txt
+    python -m pytest tests -n auto
+
+Postgres binaries are taken from $PG_BIN, PATH or `pg_config --bindir`, and
+the API needs `yarn install` to have run; without them the API tests are
+skipped. A streaming replica of the cluster serves the API's read-only
+queries (set TEST_REPLICA=0 to test without one). To test services that are
+already running instead, set TEST_API_URL (e.g. http://localhost:3000/api),
+TEST_DATABASE_URL and, if the API reads from a replica,
+TEST_REPLICA_DATABASE_URL.
+
+Tests never share users: each creates its own with `make_user` (deleted
+again afterwards), so they can run in any order and in parallel.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+import uuid
+from contextlib import suppress
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from tests.support import REPLICA_MAX_LAG_MS, ROLLUP_TIMEZONE
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Directory holding the shared services' state, inherited by xdist workers
+STATE_DIR_ENV = 'WATER_TRACKER_TEST_DIR'
+DATABASE_NAME = 'water_tracker_test'
+BOOT_TIMEOUT_S = 180
+
+# Set in the process that created the state directory and stops the services
+_owned_state_dir = None
+_exit_status = 0
+
+
+class ApiSession(requests.Session):
+    """Keep-alive session that resolves relative paths against the API base URL"""
+
+    def __init__(self, base_url, pool_size=32, timeout=30):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        # Large enough that tests posting from a thread pool reuse connections
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        if not url.startswith(('http://', 'https://')):
+            url = f"{self.base_url}/{url.lstrip('/')}"
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def pg_bindir():
+    """Directory with initdb, pg_ctl and createdb, or None"""
+    if os.environ.get('PG_BIN'):
+        return Path(os.environ['PG_BIN'])
+    initdb = shutil.which('initdb')
+    if initdb:
+        return Path(initdb).parent
+    pg_config = shutil.which('pg_config')
+    if pg_config:
+        bindir = Path(subprocess.run([pg_config, '--bindir'], capture_output=True, text=True).stdout.strip())
+        if (bindir / 'initdb').exists():
+            return bindir
+    return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run(args, **kwargs):
+    result = subprocess.run([str(arg) for arg in args], capture_output=True, text=True, **kwargs)
+    if result.returncode != 0:
+        raise RuntimeError(f"{Path(str(args[0])).name} failed:\n{result.stdout}{result.stderr}")
+    return result
+
+
+def wait_until_ready(api_url, process, log_path):
+    """Poll the API until it answers; the first request also compiles the route"""
+    deadline = time.monotonic() + BOOT_TIMEOUT_S
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"next dev exited with {process.returncode}:\n{log_path.read_text()[-2000:]}")
+        with suppress(requests.ConnectionError):
+            if requests.get(f"{api_url}/users", timeout=BOOT_TIMEOUT_S).status_code == 200:
+                return
+        time.sleep(0.25)
+    raise RuntimeError(f"API not ready after {BOOT_TIMEOUT_S}s:\n{log_path.read_text()[-2000:]}")
+
+
+def boot_services(state_dir):
+    """Start Postgres and the API under `state_dir`; returns the state shared with other workers"""
+    bindir = pg_bindir()
+    if bindir is None:
+        return {'skip': 'Postgres binaries not found; install Postgres or set PG_BIN'}
+    next_bin = ROOT / 'node_modules' / '.bin' / 'next'
+    if not next_bin.exists() or not shutil.which('node'):
+        return {'skip': 'Node.js or node_modules missing; run `yarn install`'}
+
+    state = {}
+    try:
+        pgdata = state_dir / 'pgdata'
+        run([bindir / 'initdb', '-D', pgdata, '-U', 'postgres', '-A', 'trust', '-E', 'UTF8', '--no-sync'])
+        pg_port = free_port()
+        # Durability is irrelevant for a throwaway cluster
+        run([bindir / 'pg_ctl', '-D', pgdata, '-l', state_dir / 'postgres.log', '-w', '-o',
+             f"-p {pg_port} -k {state_dir} -c listen_addresses=127.0.0.1 "
+             "-c fsync=off -c synchronous_commit=off -c full_page_writes=off "
+             # Asynchronous commits reach the replica when the WAL writer wakes
+             "-c wal_writer_delay=10ms", 'start'])
+        state.update(pg_ctl=str(bindir / 'pg_ctl'), pgdata=str(pgdata))
+        run([bindir / 'createdb', '-h', '127.0.0.1', '-p', pg_port, '-U', 'postgres', DATABASE_NAME])
+        state['database_url'] = f"postgresql://postgres@127.0.0.1:{pg_port}/{DATABASE_NAME}"
+
+        if os.environ.get('TEST_REPLICA', '1') != '0':
+            replica = state_dir / 'replica'
+            run([bindir / 'pg_basebackup', '-h', '127.0.0.1', '-p', pg_port, '-U', 'postgres',
+                 '-D', replica, '-R', '-X', 'stream', '--no-sync'])
+            replica_port = free_port()
+            run([bindir / 'pg_ctl', '-D', replica, '-l', state_dir / 'replica.log', '-w', '-o',
+                 f"-p {replica_port} -k {state_dir} -c listen_addresses=127.0.0.1 "
+                 "-c fsync=off -c full_page_writes=off -c hot_standby_feedback=on", 'start'])
+            state['replica_pgdata'] = str(replica)
+            state['replica_database_url'] = f"postgresql://postgres@127.0.0.1:{replica_port}/{DATABASE_NAME}"
+
+        env = {
+            **os.environ,
+            'DATABASE_URL': state['database_url'],
+            'ROLLUP_TIMEZONE': ROLLUP_TIMEZONE,
+            'NEXT_TELEMETRY_DISABLED': '1',
+            # Parallel workers hold connections while waiting on per-user locks
+            'PG_POOL_MAX': '20',
+            'PG_POOL_ACQUIRE_TIMEOUT_MS': '30000',
+            'REPLICA_HEALTH_INTERVAL_MS': '50',
+            'REPLICA_MAX_LAG_MS': str(REPLICA_MAX_LAG_MS),
+        }
+        if 'replica_database_url' in state:
+            env['DATABASE_REPLICA_URL'] = state['replica_database_url']
+        env.pop('NODE_ENV', None)
+        run(['node', 'scripts/migrate.mjs'], cwd=ROOT, env=env)
+
+        api_port = free_port()
+        log_path = state_dir / 'next.log'
+        with open(log_path, 'wb') as log:
+            process = subprocess.Popen(
+                [str(next_bin), 'dev', '--hostname', '127.0.0.1', '--port', str(api_port)],
+                cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+            )
+        state['next_pid'] = process.pid
+        state['api_url'] = f"http://127.0.0.1:{api_port}/api"
+        wait_until_ready(state['api_url'], process, log_path)
+        return state
+    except Exception:
+        stop_services(state)
+        raise
+
+
+def stop_services(state):
+    if 'next_pid' in state:
+        with suppress(ProcessLookupError):
+            os.killpg(state['next_pid'], signal.SIGTERM)
+    if 'pg_ctl' in state:
+        for pgdata in (state.get('replica_pgdata'), state['pgdata']):
+            if pgdata:
+                subprocess.run([state['pg_ctl'], '-D', pgdata, '-m', 'immediate', 'stop'], capture_output=True)
+
+
+def read_state(state_dir):
+    path = state_dir / 'services.json'
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def pytest_configure(config):
+    global _owned_state_dir
+    # The controller (or the only process, without xdist) creates the state
+    # directory before any worker starts; workers find it in the environment
+    if STATE_DIR_ENV not in os.environ:
+        _owned_state_dir = Path(tempfile.mkdtemp(prefix='water-tracker-tests-'))
+        os.environ[STATE_DIR_ENV] = str(_owned_state_dir)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus):
+    global _exit_status
+    _exit_status = exitstatus
+    if exitstatus != 0 and _owned_state_dir and read_state(_owned_state_dir):
+        terminalreporter.write_line(f"Test service logs: {_owned_state_dir}")
+
+
+def pytest_unconfigure(config):
+    if _owned_state_dir is None:
+        return
+    state = read_state(_owned_state_dir)
+    if state:
+        stop_services(state)
+    if _exit_status == 0 or not state:
+        shutil.rmtree(_owned_state_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def services():
+    """API base URL and database URL, booting the local services on first use"""
+    if os.environ.get('TEST_API_URL'):
+        if not os.environ.get('TEST_DATABASE_URL'):
+            pytest.skip('TEST_API_URL needs TEST_DATABASE_URL too')
+        state = {'api_url': os.environ['TEST_API_URL'], 'database_url': os.environ['TEST_DATABASE_URL']}
+        if os.environ.get('TEST_REPLICA_DATABASE_URL'):
+            state['replica_database_url'] = os.environ['TEST_REPLICA_DATABASE_URL']
+        return state
+
+    # The first worker to get here boots; the others wait and reuse its state
+    state_dir = Path(os.environ[STATE_DIR_ENV])
+    with open(state_dir / 'boot.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        state = read_state(state_dir)
+        if state is None:
+            try:
+                state = boot_services(state_dir)
+            except Exception as error:
+                state = {'error': str(error)}
+            (state_dir / 'services.json').write_text(json.dumps(state))
+
+    if 'skip' in state:
+        pytest.skip(state['skip'])
+    if 'error' in state:
+        pytest.fail(f"Could not start the test services: {state['error']}", pytrace=False)
+    return state
+
+
+@pytest.fixture(scope='session')
+def api(services):
+    with ApiSession(services['api_url']) as session:
+        yield session
+
+
+@pytest.fixture(scope='session')
+def db(services):
+    psycopg = pytest.importorskip('psycopg')
+    with psycopg.connect(services['database_url'], autocommit=True) as connection:
+        yield connection
+
+
+@pytest.fixture(scope='session')
+def replica_db(services):
+    """Connection to the API's streaming replica, or None without one"""
+    if 'replica_database_url' not in services:
+        yield None
+        return
+    psycopg = pytest.importorskip('psycopg')
+    with psycopg.connect(services['replica_database_url'], autocommit=True) as connection:
+        yield connection
+
+
+def wait_for_replica(db, replica_db):
+    """
+    Wait until the replica has replayed everything written to `db` so far.
+    The API does not know about writes made behind its back, so it could
+    read from a replica that has not seen them yet. Once the replica is
+    further behind than REPLICA_MAX_LAG_MS (replay paused by a test) the API
+    reads from the primary, so waiting longer than that is never needed.
+    """
+    if replica_db is None:
+        return
+    written = db.execute('SELECT pg_current_wal_insert_lsn()').fetchone()[0]
+    deadline = time.monotonic() + REPLICA_MAX_LAG_MS / 1000 + 0.5
+    while time.monotonic() < deadline:
+        if replica_db.execute('SELECT pg_last_wal_replay_lsn() >= %s', [written]).fetchone()[0]:
+            return
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def make_user(db, replica_db):
+    """Create users that only this test sees: make_user(daily_goal=2000, timezone=None)"""
+    created = []
+
+    def make(daily_goal=2000, timezone=None):
+        name = f"test-{uuid.uuid4().hex[:12]}"
+        user_id = db.execute(
+            'INSERT INTO users (name, daily_goal_ml, timezone) VALUES (%s, %s, %s) RETURNING id::text',
+            [name, daily_goal, timezone],
+        ).fetchone()[0]
+        created.append(user_id)
+        wait_for_replica(db, replica_db)
+        return {'id': user_id, 'name': name, 'dailyGoal': daily_goal, 'timezone': timezone or ROLLUP_TIMEZONE}
+
+    yield make
+    # Logs, rollups and leaderboard rows cascade
+    if created:
+        db.execute('DELETE FROM users WHERE id = ANY(%s::uuid[])', [created])
+
+
+@pytest.fixture
+def add_logs(api):
+    """Insert backdated logs through the batch endpoint: add_logs(user_id, [(amount, logged_at), ...])"""
+    def add(user_id, logs):
+        response = api.post('water-logs/batch', json=[
+            {'userId': user_id, 'amount': amount, 'loggedAt': logged_at.isoformat()}
+            for amount, logged_at in logs
+        ])
+        response.raise_for_status()
+        result = response.json()
+        assert result['created'] == len(logs), result
+        return [item['id'] for item in result['results']]
+
+    return add
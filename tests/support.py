@@ -0,0 +1,60 @@
+"""
+Helpers shared by the test modules: the server's rollup timezone and day
+arithmetic in it, and walking every page of GET /api/water-logs.
+"""
+
+import json
+import os
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+# Must match the server's ROLLUP_TIMEZONE; conftest starts `next dev` with it
+ROLLUP_TIMEZONE = os.getenv('ROLLUP_TIMEZONE', 'UTC')
+
+# Skip the server's response cache so reads see writes made directly in the DB
+NO_CACHE = {'Cache-Control': 'no-cache'}
+
+# How far conftest lets the API's replica fall behind before reads go to the primary
+REPLICA_MAX_LAG_MS = 1000
+
+
+def local_today(tz=ROLLUP_TIMEZONE):
+    return datetime.now(ZoneInfo(tz)).date()
+
+
+def logged_on(day, hour=12, minute=0, tz=ROLLUP_TIMEZONE):
+    """Aware datetime at a local time of `day`"""
+    return datetime.combine(day, time(hour, minute), ZoneInfo(tz))
+
+
+def day_bounds(day, tz=ROLLUP_TIMEZONE):
+    """[start, end) of a local calendar day as aware datetimes"""
+    start = datetime.combine(day, time.min, ZoneInfo(tz))
+    return start, datetime.combine(day + timedelta(days=1), time.min, ZoneInfo(tz))
+
+
+def parse_logged_at(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def fetch_all_water_logs(api, params, page_size=500):
+    """Walk every page of GET /api/water-logs and return the combined logs"""
+    logs = []
+    cursor = None
+    while True:
+        page_params = dict(params, limit=page_size)
+        if cursor:
+            page_params['cursor'] = cursor
+        response = api.get('water-logs', params=page_params)
+        response.raise_for_status()
+        logs.extend(response.json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return logs
+
+
+def export_water_logs(api, params):
+    """Every log matching `params` from the NDJSON export"""
+    with api.get('water-logs', params={**params, 'format': 'ndjson'}, stream=True) as response:
+        response.raise_for_status()
+        return [json.loads(line) for line in response.iter_lines() if line]
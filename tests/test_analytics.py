@@ -0,0 +1,89 @@
+"""
+The offline analytics package: vectorized parsing and reports checked against
+the pure-Python baseline, and the NDJSON export against the daily endpoint.
+Only the last test needs the API.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from analytics import build_report, daily_totals, iter_api_export, iter_copy_dump
+from analytics.baseline import naive_report, read_copy_dump
+from analytics.sources import parse_timestamps
+from analytics_benchmark import same_report, write_synthetic_dump
+from tests.support import ROLLUP_TIMEZONE, local_today, logged_on
+
+TIMESTAMPS = [
+    '2024-03-10T07:15:00Z',
+    '2024-03-10 07:15:00+00',
+    '2024-03-10T07:15:00.5-0800',
+    '2024-03-10T07:15:00.123456+05:30',
+    '2024-03-10 07:15:00.12+05:45:30',
+    '2024-12-31T23:59:59.999999-01',
+    '2000-02-29T00:00:00+14:00',
+]
+
+
+def to_utc_micros(value):
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00') + (':00' if value[-3] in '+-' else ''))
+    return int((parsed - datetime(1970, 1, 1, tzinfo=timezone.utc)) / timedelta(microseconds=1))
+
+
+def test_parse_timestamps():
+    parsed = parse_timestamps(TIMESTAMPS).astype(np.int64).tolist()
+    assert parsed == [to_utc_micros(value) for value in TIMESTAMPS]
+
+
+def test_parse_timestamps_rejects_missing_offset():
+    with pytest.raises(ValueError):
+        parse_timestamps(['2024-03-10T07:15:00'])
+
+
+@pytest.mark.parametrize('tz', ['UTC', 'Europe/Berlin', 'America/New_York'])
+def test_vectorized_report_matches_baseline(tmp_path, tz):
+    path = tmp_path / 'logs.csv'
+    goals, _ = write_synthetic_dump(path, users=25, days=60, logs_per_day=5, seed=7)
+
+    daily = daily_totals(iter_copy_dump(path, chunk_size=500), tz)
+    expected = naive_report(read_copy_dump(path), goals, tz)
+    assert same_report(build_report(daily, goals), expected)
+
+
+def test_copy_dump_reads_columns_by_name(tmp_path):
+    # A full-table dump, as `COPY (SELECT * FROM water_logs)` writes it
+    path = tmp_path / 'logs.tsv'
+    user_id = str(uuid.uuid4())
+    path.write_text(f"{uuid.uuid4()}\t{user_id}\t250\t2024-03-10 07:15:00+00\tt\n")
+    columns = ('id', 'user_id', 'amount_ml', 'logged_at', 'coalescible')
+
+    chunk, = iter_copy_dump(path, columns=columns)
+    assert (chunk.user_ids.tolist(), chunk.amounts.tolist()) == ([user_id.encode()], [250])
+    assert chunk.logged_at.astype(np.int64).tolist() == [to_utc_micros('2024-03-10 07:15:00+00')]
+    assert [row[:2] for row in read_copy_dump(path, columns)] == [(user_id, 250)]
+
+    # Reading it as the three-column dump fails instead of picking the wrong fields
+    with pytest.raises(ValueError):
+        next(iter_copy_dump(path))
+
+
+def test_export_matches_daily_endpoint(api, make_user, add_logs, days=7):
+    user = make_user(daily_goal=800)
+    end = local_today() - timedelta(days=1)
+    start = end - timedelta(days=days - 1)
+    add_logs(user['id'], [(100 * (i % 5 + 1), logged_on(start + timedelta(days=i // 3), hour=8 + i % 12))
+                          for i in range(3 * days)])
+
+    # Small chunks so the streaming path is exercised more than once
+    chunks = iter_api_export(api.base_url, {'userId': user['id']}, chunk_size=4, session=api)
+    daily = daily_totals(chunks, ROLLUP_TIMEZONE, start, end)
+    expected = api.get(f"users/{user['id']}/daily",
+                       params={'from': start.isoformat(), 'to': end.isoformat(), 'tz': ROLLUP_TIMEZONE}).json()
+
+    assert daily.users == [user['id']]
+    assert daily.totals[0].tolist() == [row['totalMl'] for row in expected]
+    assert daily.counts[0].tolist() == [row['logCount'] for row in expected]
+    report = build_report(daily, {user['id']: user['dailyGoal']})[0]
+    assert report['daysMetGoal'] == sum(1 for row in expected if row['totalMl'] >= user['dailyGoal'])
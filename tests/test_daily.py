@@ -0,0 +1,162 @@
+"""Per-day totals, the user page bootstrap and today's intake"""
+
+import uuid
+from datetime import timedelta, timezone
+
+from tests.support import NO_CACHE, ROLLUP_TIMEZONE, day_bounds, local_today, logged_on
+
+
+def test_daily_totals(api, make_user, add_logs):
+    user = make_user()
+    end = local_today() - timedelta(days=1)
+    start = end - timedelta(days=6)
+    add_logs(user['id'], [
+        (300, logged_on(start, hour=9)),
+        (200, logged_on(start, hour=18)),
+        (750, logged_on(start + timedelta(days=3))),
+        (125, logged_on(end, hour=23, minute=59)),
+        # Outside the window on either side
+        (999, logged_on(start - timedelta(days=1))),
+        (999, logged_on(end + timedelta(days=1), hour=0)),
+    ])
+
+    response = api.get(f"users/{user['id']}/daily",
+                       params={'from': start.isoformat(), 'to': end.isoformat(), 'tz': ROLLUP_TIMEZONE})
+    assert response.status_code == 200
+    expected = {start: (500, 2), start + timedelta(days=3): (750, 1), end: (125, 1)}
+    assert response.json() == [
+        {'day': day.isoformat(), 'totalMl': expected.get(day, (0, 0))[0], 'logCount': expected.get(day, (0, 0))[1]}
+        for day in (start + timedelta(days=i) for i in range(7))
+    ]
+
+
+def test_daily_totals_in_another_timezone(api, make_user, add_logs):
+    """Days outside the rollup timezone are grouped from the raw logs"""
+    user = make_user()
+    day = local_today() - timedelta(days=3)
+    # 23:30 in New York is the next calendar day in UTC
+    add_logs(user['id'], [(400, logged_on(day, hour=23, minute=30, tz='America/New_York'))])
+
+    params = {'from': day.isoformat(), 'to': (day + timedelta(days=1)).isoformat()}
+    new_york = api.get(f"users/{user['id']}/daily", params={**params, 'tz': 'America/New_York'}).json()
+    assert [row['totalMl'] for row in new_york] == [400, 0]
+    tokyo = api.get(f"users/{user['id']}/daily", params={**params, 'tz': 'Asia/Tokyo'}).json()
+    assert [row['totalMl'] for row in tokyo] == [0, 400]
+
+
+def test_daily_totals_validation(api, make_user):
+    user = make_user()
+    day = local_today().isoformat()
+
+    assert api.get(f"users/{user['id']}/daily", params={'from': day, 'to': day, 'tz': 'Not/AZone'}).status_code == 400
+    assert api.get(f"users/{user['id']}/daily", params={'from': 'yesterday', 'to': day}).status_code == 400
+
+
+def test_bootstrap_matches_user_and_daily_endpoints(api, make_user, add_logs):
+    user = make_user()
+    today = local_today()
+    add_logs(user['id'], [(600, logged_on(today - timedelta(days=2)))])
+    api.post('water-logs', json={'userId': user['id'], 'amount': 350}).raise_for_status()
+
+    params = {'from': (today - timedelta(days=6)).isoformat(), 'to': today.isoformat(), 'tz': ROLLUP_TIMEZONE}
+    response = api.get(f"users/{user['id']}/bootstrap", params=params)
+    assert response.status_code == 200
+    bootstrap = response.json()
+    days = api.get(f"users/{user['id']}/daily", params=params).json()
+    assert bootstrap['user'] == api.get(f"users/{user['id']}").json()
+    assert bootstrap['days'] == days
+    assert bootstrap['todayIntake'] == days[-1]['totalMl'] == 350
+
+    assert api.get(f"users/{uuid.uuid4()}/bootstrap", params=params).status_code == 404
+    assert api.get(f"users/{user['id']}/bootstrap", params={**params, 'tz': 'Not/AZone'}).status_code == 400
+
+
+def test_today_intake_follows_writes(api, make_user):
+    user = make_user()
+    first = api.get('today-intake', headers=NO_CACHE)
+    assert next(u for u in first.json() if u['id'] == user['id'])['todayIntake'] == 0
+
+    for amount in (200, 300, 150):
+        api.post('water-logs', json={'userId': user['id'], 'amount': amount}).raise_for_status()
+
+    # Logging water invalidates the cached response
+    after = api.get('today-intake', headers={'If-None-Match': first.headers['ETag']})
+    assert after.status_code == 200
+    assert next(u for u in after.json() if u['id'] == user['id'])['todayIntake'] == 650
+
+
+def last_dst_changes(tz):
+    """The most recent (spring-forward, fall-back) days in `tz` before today"""
+    found = {}
+    day = local_today(tz) - timedelta(days=2)
+    while len(found) < 2:
+        start, end = (bound.astimezone(timezone.utc) for bound in day_bounds(day, tz))
+        hours = (end - start).total_seconds() / 3600
+        if hours != 24:
+            found.setdefault(hours, day)
+        day -= timedelta(days=1)
+    return found[23], found[25]
+
+
+def test_days_follow_the_users_timezone_across_dst(api, make_user, add_logs):
+    """Spring-forward days are 23 hours long and fall-back days 25"""
+    user = make_user(timezone='America/New_York')
+    spring, fall = last_dst_changes('America/New_York')
+    add_logs(user['id'], [
+        (100, logged_on(spring, hour=0, minute=30, tz='America/New_York')),
+        (200, logged_on(spring, hour=23, minute=30, tz='America/New_York')),
+        (300, logged_on(fall, hour=0, minute=30, tz='America/New_York')),
+        (400, logged_on(fall, hour=23, minute=30, tz='America/New_York')),
+    ])
+
+    for day, expected in ((spring, 300), (fall, 700)):
+        params = {'from': (day - timedelta(days=1)).isoformat(), 'to': (day + timedelta(days=1)).isoformat()}
+        totals = api.get(f"users/{user['id']}/daily", params=params).json()
+        assert [row['totalMl'] for row in totals] == [0, expected, 0]
+        # The same days read from the raw logs agree with the rollup
+        raw = api.get(f"users/{user['id']}/daily", params={**params, 'tz': 'America/New_York'}).json()
+        assert raw == totals
+
+
+def test_timezone_change_rebuckets_days(api, make_user, add_logs):
+    user = make_user(timezone='America/New_York')
+    day = local_today('America/New_York') - timedelta(days=3)
+    # 22:00 in New York is the next morning in Tokyo
+    add_logs(user['id'], [(500, logged_on(day, hour=22, tz='America/New_York'))])
+    params = {'from': day.isoformat(), 'to': (day + timedelta(days=1)).isoformat()}
+    assert [row['totalMl'] for row in api.get(f"users/{user['id']}/daily", params=params).json()] == [500, 0]
+
+    api.put(f"users/{user['id']}", json={'timezone': 'Asia/Tokyo'}).raise_for_status()
+    assert [row['totalMl'] for row in api.get(f"users/{user['id']}/daily", params=params).json()] == [0, 500]
+
+
+def test_today_intake_in_each_users_timezone(api, make_user, add_logs):
+    """Kiritimati (UTC+14) and Pago Pago (UTC-11) are never on the same day at the same hour"""
+    for tz in ('Pacific/Kiritimati', 'Pacific/Pago_Pago'):
+        user = make_user(timezone=tz)
+        today = local_today(tz)
+        add_logs(user['id'], [
+            (250, logged_on(today, hour=0, tz=tz)),
+            (999, logged_on(today - timedelta(days=1), hour=23, minute=59, tz=tz)),
+        ])
+
+        listed = next(u for u in api.get('today-intake', headers=NO_CACHE).json() if u['id'] == user['id'])
+        assert (listed['timezone'], listed['todayIntake']) == (tz, 250)
+        bootstrap = api.get(f"users/{user['id']}/bootstrap", params={'days': 2}).json()
+        assert bootstrap['todayIntake'] == 250
+        assert [row['day'] for row in bootstrap['days']] == [(today - timedelta(days=1)).isoformat(), today.isoformat()]
+        assert [row['totalMl'] for row in bootstrap['days']] == [999, 250]
+
+
+def test_daily_totals_for_the_last_days(api, make_user):
+    user = make_user(timezone='Pacific/Kiritimati')
+    today = local_today('Pacific/Kiritimati')
+
+    response = api.get(f"users/{user['id']}/daily", params={'days': 3})
+    assert response.status_code == 200
+    assert [row['day'] for row in response.json()] == [(today - timedelta(days=i)).isoformat() for i in (2, 1, 0)]
+
+    for days in (0, 367, 'a'):
+        assert api.get(f"users/{user['id']}/daily", params={'days': days}).status_code == 400
+    assert api.get(f"users/{user['id']}/daily").status_code == 400
+    assert api.get(f"users/{uuid.uuid4()}/daily", params={'days': 3}).status_code == 404
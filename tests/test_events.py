@@ -0,0 +1,77 @@
+"""Live dashboard updates over Server-Sent Events"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+# Maximum time between a committed write and its Server-Sent Event
+EVENT_LATENCY_BUDGET_S = float(os.getenv('EVENT_LATENCY_BUDGET_S', '2.0'))
+
+
+def subscribe(api):
+    """Open the event stream; returns (response, queue of (received_at, type, data))"""
+    events = queue.Queue()
+    connected = threading.Event()
+    stream = api.get('events', stream=True, timeout=(10, 30))
+    assert stream.status_code == 200
+
+    def read_events():
+        event_type = None
+        try:
+            for line in stream.iter_lines(decode_unicode=True):
+                if line.startswith('retry:'):
+                    connected.set()
+                elif line.startswith('event:'):
+                    event_type = line[len('event:'):].strip()
+                elif line.startswith('data:'):
+                    events.put((time.perf_counter(), event_type, json.loads(line[len('data:'):])))
+        except Exception:
+            pass
+
+    threading.Thread(target=read_events, daemon=True).start()
+    assert connected.wait(timeout=10), 'Never received the SSE handshake'
+    return stream, events
+
+
+def wait_for(events, deadline, match):
+    while True:
+        received_at, event_type, event = events.get(timeout=max(deadline - time.perf_counter(), 0))
+        if match(event_type, event):
+            return received_at, event
+
+
+def test_intake_and_goal_events(api, make_user):
+    user = make_user()
+    stream, events = subscribe(api)
+    try:
+        sent_at = time.perf_counter()
+        log = api.post('water-logs', json={'userId': user['id'], 'amount': 225}).json()
+        _, event = wait_for(events, sent_at + EVENT_LATENCY_BUDGET_S,
+                            lambda kind, e: kind == 'intake' and e.get('logId') == log['id'])
+        assert (event['userId'], event['amountMl'], event['totalMl'], event['today']) == (user['id'], 225, 225, True)
+
+        sent_at = time.perf_counter()
+        api.put(f"users/{user['id']}", json={'dailyGoal': 3100}).raise_for_status()
+        _, event = wait_for(events, sent_at + EVENT_LATENCY_BUDGET_S,
+                            lambda kind, e: kind == 'goal' and e.get('userId') == user['id'])
+        assert event['dailyGoal'] == 3100
+    finally:
+        stream.close()
+
+
+def test_timezone_event_only_on_change(api, make_user):
+    user = make_user(timezone='Asia/Kolkata')
+    stream, events = subscribe(api)
+    try:
+        # Re-sending the current timezone changes nothing, so there is no event;
+        # the first one seen must be for the real change that follows
+        api.put(f"users/{user['id']}", json={'timezone': 'Asia/Kolkata'}).raise_for_status()
+        sent_at = time.perf_counter()
+        api.put(f"users/{user['id']}", json={'timezone': 'Europe/Paris'}).raise_for_status()
+        _, event = wait_for(events, sent_at + EVENT_LATENCY_BUDGET_S,
+                            lambda kind, e: kind == 'timezone' and e.get('userId') == user['id'])
+        assert event['timezone'] == 'Europe/Paris'
+    finally:
+        stream.close()
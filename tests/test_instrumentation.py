@@ -0,0 +1,38 @@
+"""Server-Timing headers, Prometheus metrics and response cache statistics"""
+
+from tests.support import NO_CACHE
+
+
+def test_server_timing(api):
+    timing = api.get('users', headers=NO_CACHE).headers.get('Server-Timing', '')
+    phases = {entry.split(';')[0].strip() for entry in timing.split(',') if entry.strip()}
+    assert {'db', 'app', 'total'} <= phases, timing
+
+
+def test_metrics_endpoint(api):
+    api.get('users', headers=NO_CACHE).raise_for_status()
+
+    response = api.get('internal/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain')
+    for series in (
+        'water_tracker_http_request_duration_seconds_count{route="users",method="GET",status="200"}',
+        'water_tracker_http_request_phase_seconds_sum{route="users",method="GET",phase="db"}',
+        'water_tracker_db_pool_connections{state="idle"}',
+    ):
+        assert series in response.text
+
+
+def test_cache_stats_count_hits(api, make_user):
+    user = make_user()
+    before = api.get('internal/stats').json()['cache']
+
+    first = api.get(f"users/{user['id']}")
+    second = api.get(f"users/{user['id']}")
+    revalidated = api.get(f"users/{user['id']}", headers={'If-None-Match': first.headers['ETag']})
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert revalidated.status_code == 304
+
+    after = api.get('internal/stats').json()['cache']
+    assert after['hits'] > before['hits']
+    assert after['notModified'] > before['notModified']
@@ -0,0 +1,126 @@
+"""The precomputed weekly leaderboard and goal streaks"""
+
+from datetime import timedelta
+
+from tests.support import local_today, logged_on
+
+ORDERINGS = {
+    'total': lambda entry: entry['weekTotalMl'],
+    'streak': lambda entry: (entry['currentStreak'], entry['longestStreak']),
+}
+
+
+def recompute(day_totals, goal, today):
+    """Leaderboard fields of one user from their per-day totals"""
+    week_start = today - timedelta(days=today.weekday())
+    longest = run = 0
+    previous = None
+    for day in sorted(day for day, total in day_totals.items() if total >= goal):
+        run = run + 1 if previous == day - timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    return {
+        'weekTotalMl': sum(total for day, total in day_totals.items() if week_start <= day < week_start + timedelta(days=7)),
+        'currentStreak': run if previous and previous >= today - timedelta(days=1) else 0,
+        'longestStreak': longest,
+    }
+
+
+class Tracker:
+    """Logs water for the test's users and checks the leaderboard against a recomputation"""
+
+    def __init__(self, api, add_logs, today):
+        self.api = api
+        self.add_logs = add_logs
+        self.today = today
+        self.totals = {}
+        self.goals = {}
+
+    def add_user(self, user):
+        self.totals[user['id']] = {}
+        self.goals[user['id']] = user['dailyGoal']
+
+    def log(self, user, days_ago, amount):
+        day = self.today - timedelta(days=days_ago)
+        if days_ago == 0:
+            self.api.post('water-logs', json={'userId': user['id'], 'amount': amount}).raise_for_status()
+        else:
+            self.add_logs(user['id'], [(amount, logged_on(day))])
+        self.totals[user['id']][day] = self.totals[user['id']].get(day, 0) + amount
+
+    def set_goal(self, user, goal):
+        self.api.put(f"users/{user['id']}", json={'dailyGoal': goal}).raise_for_status()
+        self.goals[user['id']] = goal
+
+    def check(self):
+        week_start = self.today - timedelta(days=self.today.weekday())
+        for by, score in ORDERINGS.items():
+            response = self.api.get('leaderboard', params={'by': by, 'limit': 500})
+            assert response.status_code == 200
+            board = response.json()
+            assert (board['week'], board['by']) == (week_start.isoformat(), by)
+
+            entries = {entry['id']: entry for entry in board['users']}
+            for user_id, day_totals in self.totals.items():
+                entry = entries[user_id]
+                expected = recompute(day_totals, self.goals[user_id], self.today)
+                assert {key: entry[key] for key in expected} == expected, by
+                assert entry['rank'] == 1 + sum(1 for other in board['users'] if score(other) > score(entry))
+
+
+def test_streaks_and_weekly_totals(api, make_user, add_logs):
+    tracker = Tracker(api, add_logs, local_today())
+    steady, lapsed = make_user(daily_goal=1000), make_user(daily_goal=1000)
+    tracker.add_user(steady)
+    tracker.add_user(lapsed)
+    tracker.check()
+
+    for days_ago in (3, 2, 1, 0):
+        tracker.log(steady, days_ago, 1000)
+    for days_ago, amount in ((5, 1500), (4, 1500), (1, 500), (0, 200)):
+        tracker.log(lapsed, days_ago, amount)
+    tracker.check()
+
+    # A day right after the latest met day extends that run
+    tracker.log(lapsed, 3, 1000)
+    tracker.check()
+
+    # A day before it can join earlier runs; the user is recomputed
+    tracker.log(lapsed, 6, 1000)
+    tracker.check()
+
+    # Streaks follow the goal, weekly totals do not
+    tracker.set_goal(steady, 1500)
+    tracker.check()
+    tracker.set_goal(steady, 1000)
+    tracker.check()
+
+
+def test_previous_week(api, make_user, add_logs):
+    user = make_user()
+    last_week = local_today() - timedelta(days=7)
+    add_logs(user['id'], [(700, logged_on(last_week))])
+
+    board = api.get('leaderboard', params={'week': last_week.isoformat(), 'limit': 500}).json()
+    assert board['week'] == (last_week - timedelta(days=last_week.weekday())).isoformat()
+    assert next(entry for entry in board['users'] if entry['id'] == user['id'])['weekTotalMl'] == 700
+
+
+def test_current_week_is_each_users_own(api, make_user):
+    # A day apart for most of the day, so near a week boundary they are in
+    # different weeks
+    for tz in ('Pacific/Kiritimati', 'Pacific/Pago_Pago'):
+        user = make_user(timezone=tz)
+        api.post('water-logs', json={'userId': user['id'], 'amount': 450}).raise_for_status()
+
+        board = api.get('leaderboard', params={'limit': 500}).json()
+        entry = next(entry for entry in board['users'] if entry['id'] == user['id'])
+        today = local_today(tz)
+        assert entry['week'] == (today - timedelta(days=today.weekday())).isoformat()
+        assert entry['weekTotalMl'] == 450
+
+
+def test_leaderboard_validation(api):
+    assert api.get('leaderboard', params={'by': 'volume'}).status_code == 400
+    assert api.get('leaderboard', params={'week': 'last'}).status_code == 400
+    assert api.get('leaderboard', params={'limit': 501}).status_code == 400
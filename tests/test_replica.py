@@ -0,0 +1,76 @@
+"""
+Read-only queries on the streaming replica: routing, read-your-writes while
+the replica lags, and falling back to the primary once it is too far behind.
+Skipped when the API is not reading from a replica.
+"""
+
+import fcntl
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from tests.support import NO_CACHE, REPLICA_MAX_LAG_MS, ROLLUP_TIMEZONE, fetch_all_water_logs, local_today
+
+
+@pytest.fixture
+def replica(replica_db):
+    """The replica, held exclusively: paused replay must not skew another worker's routing checks"""
+    if replica_db is None:
+        pytest.skip('The API is not reading from a replica')
+    with open(Path(os.environ['WATER_TRACKER_TEST_DIR']) / 'replica.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield replica_db
+
+
+def replica_stats(api):
+    return api.get('internal/stats').json()['replica']
+
+
+def test_reads_use_the_replica(api, make_user, replica):
+    user = make_user()
+    before = replica_stats(api)
+    assert before['healthy'], before
+
+    for _ in range(3):
+        response = api.get(f"users/{user['id']}", headers=NO_CACHE)
+        assert response.status_code == 200
+        assert response.json()['name'] == user['name']
+
+    after = replica_stats(api)
+    assert after['replicaReads'] >= before['replicaReads'] + 3
+    assert after['stalenessMs'] <= REPLICA_MAX_LAG_MS
+
+
+def test_read_your_writes_while_replay_is_paused(api, make_user, replica):
+    writer, other = make_user(), make_user()
+    replica.execute('SELECT pg_wal_replay_pause()')
+    try:
+        log = api.post('water-logs', json={'userId': writer['id'], 'amount': 300}).json()
+        assert replica.execute('SELECT count(*) FROM water_logs WHERE id::text = %s',
+                               [log['id']]).fetchone()[0] == 0
+
+        # The writer's reads go to the primary while the replica has not replayed the write
+        assert [entry['id'] for entry in fetch_all_water_logs(api, {'userId': writer['id']})] == [log['id']]
+        today = local_today().isoformat()
+        bootstrap = api.get(f"users/{writer['id']}/bootstrap",
+                            params={'from': today, 'to': today, 'tz': ROLLUP_TIMEZONE}).json()
+        assert bootstrap['todayIntake'] == 300
+
+        # Once the replica is too far behind nobody reads from it
+        time.sleep(REPLICA_MAX_LAG_MS / 1000 + 0.5)
+        before = replica_stats(api)
+        assert before['stalenessMs'] > REPLICA_MAX_LAG_MS
+        assert api.get(f"users/{other['id']}", headers=NO_CACHE).status_code == 200
+        assert replica_stats(api)['replicaReads'] == before['replicaReads']
+    finally:
+        replica.execute('SELECT pg_wal_replay_resume()')
+
+    # Caught up again, the replica serves reads that include the write
+    deadline = time.monotonic() + 10
+    while replica_stats(api)['stalenessMs'] > REPLICA_MAX_LAG_MS and time.monotonic() < deadline:
+        time.sleep(0.05)
+    before = replica_stats(api)
+    assert len(fetch_all_water_logs(api, {'userId': writer['id']})) == 1
+    assert replica_stats(api)['replicaReads'] > before['replicaReads']
@@ -0,0 +1,82 @@
+"""Users, daily goals and seeding of the default users"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.support import NO_CACHE, ROLLUP_TIMEZONE
+
+# Users created by db/seed.mjs
+DEFAULT_USER_NAMES = ['Nikhil', 'Karthik', 'Prabhath', 'Samson', 'Chakri', 'Praveen']
+
+
+def test_concurrent_seed_creates_each_default_user_once(api):
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        responses = list(pool.map(lambda _: api.get('seed'), range(20)))
+
+    assert [r.status_code for r in responses] == [200] * 20
+    assert {r.json()['count'] for r in responses} == {len(DEFAULT_USER_NAMES)}
+    names = [user['name'] for user in api.get('users', headers=NO_CACHE).json()]
+    assert {name: names.count(name) for name in DEFAULT_USER_NAMES} == dict.fromkeys(DEFAULT_USER_NAMES, 1)
+
+
+def test_list_users(api, make_user):
+    user = make_user(daily_goal=2500)
+
+    response = api.get('users', headers=NO_CACHE)
+    assert response.status_code == 200
+    listed = next(u for u in response.json() if u['id'] == user['id'])
+    assert set(listed) == {'id', 'name', 'dailyGoal', 'timezone', 'createdAt'}
+    assert (listed['name'], listed['dailyGoal']) == (user['name'], 2500)
+
+
+def test_get_user(api, make_user):
+    user = make_user()
+
+    response = api.get(f"users/{user['id']}")
+    assert response.status_code == 200
+    assert {key: response.json()[key] for key in user} == user
+    assert api.get(f"users/{uuid.uuid4()}").status_code == 404
+
+
+def test_update_daily_goal_invalidates_cached_user(api, make_user):
+    user = make_user(daily_goal=2000)
+    first = api.get(f"users/{user['id']}")
+    etag = first.headers['ETag']
+    assert api.get(f"users/{user['id']}", headers={'If-None-Match': etag}).status_code == 304
+
+    response = api.put(f"users/{user['id']}", json={'dailyGoal': 4000})
+    assert response.status_code == 200
+    assert response.json() == {'success': True}
+
+    updated = api.get(f"users/{user['id']}", headers={'If-None-Match': etag})
+    assert updated.status_code == 200
+    assert updated.json()['dailyGoal'] == 4000
+    assert updated.headers['ETag'] != etag
+
+
+def test_update_daily_goal_validation(api, make_user):
+    user = make_user()
+
+    assert api.put(f"users/{user['id']}", json={}).status_code == 400
+    assert api.put(f"users/{uuid.uuid4()}", json={'dailyGoal': 3000}).status_code == 404
+
+
+def test_update_timezone(api, make_user):
+    user = make_user()
+    assert api.get(f"users/{user['id']}").json()['timezone'] == ROLLUP_TIMEZONE
+
+    assert api.put(f"users/{user['id']}", json={'timezone': 'Asia/Kolkata'}).status_code == 200
+    assert api.get(f"users/{user['id']}").json()['timezone'] == 'Asia/Kolkata'
+
+    # Goal and timezone together; null goes back to the server's timezone
+    assert api.put(f"users/{user['id']}", json={'dailyGoal': 2800, 'timezone': None}).status_code == 200
+    updated = api.get(f"users/{user['id']}").json()
+    assert (updated['dailyGoal'], updated['timezone']) == (2800, ROLLUP_TIMEZONE)
+
+
+def test_update_timezone_validation(api, make_user):
+    user = make_user()
+
+    assert api.put(f"users/{user['id']}", json={'timezone': 'Not/AZone'}).status_code == 400
+    assert api.put(f"users/{uuid.uuid4()}", json={'timezone': 'Europe/Paris'}).status_code == 404
+    assert api.get(f"users/{user['id']}").json()['timezone'] == ROLLUP_TIMEZONE
@@ -0,0 +1,197 @@
+"""Logging water, listing, pagination, batch ingestion and write coalescing"""
+
+import base64
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from tests.support import (
+    ROLLUP_TIMEZONE, day_bounds, export_water_logs, fetch_all_water_logs, local_today, logged_on,
+    parse_logged_at,
+)
+
+
+def day_totals(api, user_id, day):
+    """(rollup total, raw log total, raw log rows) of one local day"""
+    daily = api.get(f"users/{user_id}/daily", params={'from': day.isoformat(), 'to': day.isoformat(),
+                                                       'tz': ROLLUP_TIMEZONE}).json()
+    start, end = day_bounds(day)
+    logs = [
+        log for log in fetch_all_water_logs(api, {'userId': user_id, 'startDate': start.isoformat(),
+                                                  'endDate': end.isoformat()})
+        if parse_logged_at(log['loggedAt']) < end
+    ]
+    return daily[0]['totalMl'], sum(log['amountMl'] for log in logs), len(logs)
+
+
+def test_log_water(api, make_user):
+    user = make_user()
+
+    response = api.post('water-logs', json={'userId': user['id'], 'amount': 250})
+    assert response.status_code == 200
+    log = response.json()
+    assert set(log) == {'id', 'userId', 'amountMl', 'loggedAt', 'status'}
+    assert (log['userId'], log['amountMl'], log['status']) == (user['id'], 250, 'created')
+
+    assert api.post('water-logs', json={'amount': 250}).status_code == 400
+
+
+def test_filter_by_user_and_date(api, make_user, add_logs):
+    user, other = make_user(), make_user()
+    today = local_today()
+    days = [today - timedelta(days=offset) for offset in (3, 2, 1)]
+    ids = add_logs(user['id'], [(100 * (i + 1), logged_on(day)) for i, day in enumerate(days)])
+    add_logs(other['id'], [(500, logged_on(day)) for day in days])
+
+    user_logs = fetch_all_water_logs(api, {'userId': user['id']})
+    assert sorted(log['id'] for log in user_logs) == sorted(ids)
+
+    start, end = day_bounds(days[1])
+    in_range = fetch_all_water_logs(api, {'userId': user['id'], 'startDate': start.isoformat(),
+                                          'endDate': end.isoformat()})
+    assert [(log['id'], log['amountMl']) for log in in_range] == [(ids[1], 200)]
+
+
+def test_pagination_matches_export(api, make_user, add_logs):
+    user = make_user()
+    base = logged_on(local_today() - timedelta(days=1), hour=8)
+    add_logs(user['id'], [(100 + 50 * i, base + timedelta(minutes=i)) for i in range(8)])
+
+    paged = fetch_all_water_logs(api, {'userId': user['id']}, page_size=3)
+    paged_ids = [log['id'] for log in paged]
+    assert len(paged_ids) == len(set(paged_ids)) == 8
+    assert all(a['loggedAt'] >= b['loggedAt'] for a, b in zip(paged, paged[1:]))
+
+    assert [log['id'] for log in export_water_logs(api, {'userId': user['id']})] == paged_ids
+    assert api.get('water-logs', params={'cursor': 'not-a-cursor'}).status_code == 400
+    # Well-formed cursors whose fields Postgres would reject
+    for forged in (['not a time', str(uuid.uuid4())], ['2026-02-30 08:00:00+00', str(uuid.uuid4())],
+                   ['2026-01-05 08:00:00+00', 'not-a-uuid']):
+        cursor = base64.urlsafe_b64encode(json.dumps(forged).encode()).decode().rstrip('=')
+        assert api.get('water-logs', params={'cursor': cursor}).status_code == 400
+    assert api.get('water-logs', params={'limit': 0}).status_code == 400
+
+
+def test_batch_is_idempotent(api, make_user):
+    users = [make_user(), make_user()]
+    base = logged_on(local_today() - timedelta(days=2))
+    run_id = uuid.uuid4().hex
+    logs = [
+        {
+            'userId': users[i % 2]['id'],
+            'amount': 50,
+            'loggedAt': (base + timedelta(seconds=i)).isoformat(),
+            'idempotencyKey': f"{run_id}-{i}",
+        }
+        for i in range(50)
+    ]
+
+    result = api.post('water-logs/batch', json=logs).json()
+    assert result['created'] == len(result['results']) == 50
+
+    # Retrying the same upload (as NDJSON this time) inserts nothing
+    retry = api.post(
+        'water-logs/batch',
+        data=''.join(json.dumps(log) + '\n' for log in logs),
+        headers={'Content-Type': 'application/x-ndjson'},
+    ).json()
+    assert (retry['created'], retry['duplicate']) == (0, 50)
+    assert [item['id'] for item in retry['results']] == [item['id'] for item in result['results']]
+    assert len(fetch_all_water_logs(api, {'userId': users[0]['id']})) == 25
+
+
+def test_batch_repeating_a_claimed_key(api, make_user):
+    user = make_user()
+    first = api.post('water-logs/batch', json=[{'userId': user['id'], 'amount': 250, 'idempotencyKey': 'once'}])
+    first_id = first.json()['results'][0]['id']
+
+    # Both repeats resolve to the log the key already points at, not to an id
+    # assigned within the batch
+    retry = api.post('water-logs/batch', json=[{'userId': user['id'], 'amount': 250, 'idempotencyKey': 'once'}] * 2)
+    assert [(item['status'], item['id']) for item in retry.json()['results']] == [('duplicate', first_id)] * 2
+    assert [log['id'] for log in fetch_all_water_logs(api, {'userId': user['id']})] == [first_id]
+
+
+def test_batch_rejects_invalid_items_individually(api, make_user):
+    user = make_user()
+
+    response = api.post('water-logs/batch', json=[
+        {'userId': user['id'], 'amount': 100},
+        {'userId': user['id'], 'amount': -5},
+        {'userId': str(uuid.uuid4()), 'amount': 100},
+        # Amounts and timestamps that are not exactly what gets stored
+        {'userId': user['id'], 'amount': '1e3'},
+        {'userId': user['id'], 'amount': True},
+        {'userId': user['id'], 'amount': 2 ** 31},
+        {'userId': user['id'], 'amount': 100, 'loggedAt': 'March 7'},
+        {'userId': user['id'], 'amount': 100, 'loggedAt': '2026-02-30T08:00:00Z'},
+        {'userId': user['id'], 'amount': 100, 'loggedAt': '2026-01-05T08:00:00'},
+        # Outside the accepted window, which would otherwise create partitions
+        {'userId': user['id'], 'amount': 100, 'loggedAt': '9999-12-31T00:00:00Z'},
+        {'userId': user['id'], 'amount': 100, 'loggedAt': '1970-01-01T00:00:00Z'},
+    ])
+    assert response.status_code == 200
+    assert [item['status'] for item in response.json()['results']] == ['created'] + ['rejected'] * 10
+    assert [log['amountMl'] for log in fetch_all_water_logs(api, {'userId': user['id']})] == [100]
+    assert api.post('water-logs/batch', json=[]).status_code == 400
+
+
+def test_burst_writes_add_each_amount_once(api, make_user, writes=40):
+    user = make_user()
+    day = local_today()
+    rollup_before, raw_before, rows_before = day_totals(api, user['id'], day)
+
+    # Every slider nudge is sent twice at once, as a client retrying on a
+    # flaky network would
+    run_id = uuid.uuid4().hex
+    amounts = [10 + (i * 37) % 90 for i in range(writes)]
+
+    def post(item):
+        i, amount = item
+        return i, api.post('water-logs', json={'userId': user['id'], 'amount': amount},
+                           headers={'Idempotency-Key': f"{run_id}-{i}"})
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        responses = list(pool.map(post, list(enumerate(amounts)) * 2))
+
+    assert [r.status_code for _, r in responses] == [200] * len(responses)
+    statuses = [r.json()['status'] for _, r in responses]
+    assert statuses.count('duplicate') == writes
+    assert statuses.count('created') + statuses.count('coalesced') == writes
+
+    rollup_after, raw_after, rows_after = day_totals(api, user['id'], day)
+    assert rollup_after - rollup_before == raw_after - raw_before == sum(amounts)
+    assert rows_after - rows_before < writes
+
+    # A late retry reports the log its key was applied to and adds nothing
+    first_id = next(r.json()['id'] for i, r in responses if i == 0 and r.json()['status'] != 'duplicate')
+    retry = api.post('water-logs', json={'userId': user['id'], 'amount': amounts[0],
+                                         'idempotencyKey': f"{run_id}-0"}).json()
+    assert (retry['status'], retry['id']) == ('duplicate', first_id)
+    assert day_totals(api, user['id'], day)[0] == rollup_after
+
+
+def test_log_water_rejects_invalid_amounts(api, make_user):
+    user = make_user()
+    api.post('water-logs', json={'userId': user['id'], 'amount': 300}).raise_for_status()
+    rollup_before, raw_before, _ = day_totals(api, user['id'], local_today())
+
+    # Inside the coalescing window a negative amount would be merged into the log above
+    for amount in (-100, 0, 'abc', '1e3', 2.5, 2 ** 31):
+        assert api.post('water-logs', json={'userId': user['id'], 'amount': amount}).status_code == 400
+    assert day_totals(api, user['id'], local_today())[:2] == (rollup_before, raw_before)
+
+
+def test_single_logs_do_not_merge_into_batch_logs(api, make_user):
+    user = make_user()
+    batch = api.post('water-logs/batch', json=[{'userId': user['id'], 'amount': 400, 'idempotencyKey': 'shared'}])
+    batch_id = batch.json()['results'][0]['id']
+
+    log = api.post('water-logs', json={'userId': user['id'], 'amount': 100}).json()
+    assert (log['status'], log['amountMl']) == ('created', 100)
+
+    # A key the batch already holds makes the single log a duplicate of the batch's
+    retry = api.post('water-logs', json={'userId': user['id'], 'amount': 400}, headers={'Idempotency-Key': 'shared'})
+    assert retry.status_code == 200
+    assert (retry.json()['status'], retry.json()['id']) == ('duplicate', batch_id)